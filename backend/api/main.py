@@ -1,26 +1,33 @@
 from fastapi import FastAPI, UploadFile, File, Depends, HTTPException
 from contextlib import asynccontextmanager
 from fastapi.middleware.cors import CORSMiddleware
+from sqlalchemy import select
 from sqlalchemy.orm import Session
-from minio import Minio
+from sqlalchemy.ext.asyncio import AsyncSession
 import os
 import uuid
+import asyncio
 import logging
 
-from shared.database import get_db, engine, Base
-from shared.models import Document, DocumentStatus
+from shared.database import get_db, get_async_db, dispose_async_engine, engine, Base, SessionLocal
+from shared.models import Document, DocumentStatus, Job, JobStatus
 # from worker.celery_app import celery_app # Deferred import to avoid circular issues if any, but usually fine.
-from celery import Celery
-from datetime import timedelta
+from celery import Celery, group
+from datetime import datetime, timedelta
 from fastapi import status
 from qdrant_client.http import models as qmodels
 from pydantic import BaseModel
-from typing import Optional
+from typing import Optional, List
 
 from shared.middleware import RequestLoggerMiddleware, RateLimitMiddleware
 from shared.models import User
 from shared.auth import create_access_token, verify_password, get_password_hash, RoleChecker
 from fastapi.security import OAuth2PasswordRequestForm
+from fastapi.concurrency import run_in_threadpool
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse, PlainTextResponse, StreamingResponse, RedirectResponse
+from shared.model_registry import warm_up, model_stats, DEFAULT_EMBEDDING_MODEL
+from shared.metrics import render_metrics
 
 # Setup Logging
 logging.basicConfig(level=logging.INFO)
@@ -32,7 +39,16 @@ logger = logging.getLogger(__name__)
 async def lifespan(app: FastAPI):
     # Create tables (Simple init for now, will use Alembic later)
     Base.metadata.create_all(bind=engine)
+    # Load the embedding model before serving so the first search/risk request
+    # does not pay for it
+    await run_in_threadpool(warm_up)
+    try:
+        await run_in_threadpool(ensure_bucket)
+    except Exception as e:
+        # Retried on the first upload
+        logger.error(f"MinIO bucket check failed: {e}")
     yield
+    await dispose_async_engine()
 
 app = FastAPI(title="AI Contract Intelligence API", lifespan=lifespan)
 
@@ -45,90 +61,194 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Custom Middleware
-app.add_middleware(RequestLoggerMiddleware)
+# Custom Middleware (the last added runs first: requests are timed
+# including any rate limit rejection)
 app.add_middleware(RateLimitMiddleware, limit=60, window=60)
+app.add_middleware(RequestLoggerMiddleware)
 
 # MinIO Client
-MINIO_ENDPOINT = os.getenv("MINIO_ENDPOINT", "minio:9000")
-MINIO_ACCESS_KEY = os.getenv("MINIO_ACCESS_KEY", "minioadmin")
-MINIO_SECRET_KEY = os.getenv("MINIO_SECRET_KEY", "minioadmin")
-MINIO_BUCKET = os.getenv("MINIO_BUCKET", "documents")
-MINIO_SECURE = False
-
-minio_client = Minio(
-    MINIO_ENDPOINT.replace("http://", "").replace("https://", ""), # Minio client expects host:port
-    access_key=MINIO_ACCESS_KEY,
-    secret_key=MINIO_SECRET_KEY,
-    secure=MINIO_SECURE
-)
+from shared.storage import ensure_bucket, upload_stream, remove_object, presigned_url
+from shared.dedup import DocumentDedup
+from shared.queues import configure_routes, document_pipeline, queue_stats
+from shared.page_store import PageStore
+from shared.jobs import submit_job, submit_batch_job, submit_export_job, job_to_dict
+from shared.pagination import keyset_page, estimate_count
+from shared.document_fields import fields_to_dict
+from shared.reports import report_rows, audit_decisions, export_watermark, to_ndjson, to_csv, EXPORT_URL_EXPIRY
 
 # Celery Client (Simple init for pushing tasks)
 REDIS_URL = os.getenv("REDIS_URL", "redis://redis:6379/0")
 celery_app = Celery("worker", broker=REDIS_URL)
+configure_routes(celery_app)
+# Jobs are tracked in the jobs table, so the API never reads Celery results
 
 @app.get("/health")
 def health_check():
     return {"status": "ok", "services": {"database": "connected", "minio": "connected"}}
 
+@app.get("/metrics", response_class=PlainTextResponse)
+def metrics():
+    # Prometheus text format; per-route p50/p95/p99 are in
+    # http_request_duration_seconds_quantile
+    return PlainTextResponse(render_metrics(), media_type="text/plain; version=0.0.4")
+
+UPLOAD_CONCURRENCY = int(os.getenv("UPLOAD_CONCURRENCY", 4))
+
+async def _store_upload(file: UploadFile):
+    # UploadFile is spooled to a temp file by Starlette; stream it to MinIO in
+    # multipart chunks from a worker thread so the event loop is never blocked.
+    # The SHA-256 used for deduplication is computed in the same pass.
+    file_ext = file.filename.split(".")[-1]
+    unique_filename = f"{uuid.uuid4()}.{file_ext}"
+    sha256, size = await run_in_threadpool(upload_stream, unique_filename, file.file, file.content_type)
+    logger.info(f"Uploaded {unique_filename} to MinIO ({size} bytes)")
+    return unique_filename, sha256
+
+async def _create_documents(db: Session, uploads, force: bool = False):
+    """uploads: (filename, s3_key, sha256). Returns the Documents in the same
+    order. Exact duplicates of an earlier upload (including one earlier in the
+    same batch) are linked to it instead of being processed, unless force."""
+    originals = {} if force else DocumentDedup.find_originals(db, [sha for _, _, sha in uploads])
+    docs, to_process, duplicates = [], [], []
+    for filename, s3_key, sha256 in uploads:
+        doc = Document(filename=filename, s3_key=s3_key, status=DocumentStatus.PENDING, content_sha256=sha256)
+        original = originals.get(sha256)
+        if original is None:
+            if not force:
+                originals[sha256] = doc
+            to_process.append(doc)
+        else:
+            duplicates.append((doc, original))
+        docs.append(doc)
+
+    # One INSERT batch and one broker round-trip for all uploaded files
+    db.add_all(docs)
+    db.flush()
+    redundant_keys = []
+    for doc, original in duplicates:
+        redundant_keys.append(doc.s3_key)
+        DocumentDedup.link(db, doc, original)
+    db.commit()
+    enqueue_error = None
+    if to_process:
+        try:
+            group(document_pipeline(celery_app, d.id) for d in to_process).apply_async()
+        except Exception as e:
+            enqueue_error = e
+
+    for key in redundant_keys:
+        try:
+            await run_in_threadpool(remove_object, key)
+        except Exception as e:
+            logger.warning(f"Failed to remove duplicate object {key}: {e}")
+    if enqueue_error is not None:
+        _fail_unqueued(db, to_process, enqueue_error)
+    return docs
+
+def _fail_unqueued(db: Session, docs: List[Document], error: Exception):
+    # The documents are already committed; without this they would stay
+    # PENDING with nothing queued to process them (nor their duplicates)
+    logger.error(f"Failed to enqueue documents {[d.id for d in docs]}: {error}")
+    for doc in docs:
+        doc.status = DocumentStatus.FAILED
+        DocumentDedup.propagate(db, doc)
+    db.commit()
+    raise HTTPException(status_code=503, detail="Task queue unavailable")
+
+def _document_summary(doc: Document):
+    return {"id": doc.id, "filename": doc.filename, "status": doc.status, "duplicate_of": doc.duplicate_of_id}
+
 @app.post("/upload")
 async def upload_document(
     file: UploadFile = File(...), 
+    force: bool = False,
     db: Session = Depends(get_db),
     user: User = Depends(RoleChecker(["ap", "admin"]))
 ):
     try:
-        # 1. Generate unique filename
-        file_ext = file.filename.split(".")[-1]
-        unique_filename = f"{uuid.uuid4()}.{file_ext}"
-        
-        # 2. Upload to MinIO
-        # Check bucket exists
-        if not minio_client.bucket_exists(MINIO_BUCKET):
-            minio_client.make_bucket(MINIO_BUCKET)
-        
-        # Upload
-        # To handle async reads from FastAPI upload file, we might need to read into memory or stream
-        # For MVP, read small files into memory
-        file_content = await file.read()
-        import io
-        file_stream = io.BytesIO(file_content)
-        
-        minio_client.put_object(
-            MINIO_BUCKET,
-            unique_filename,
-            file_stream,
-            length=len(file_content),
-            content_type=file.content_type
-        )
-        logger.info(f"Uploaded {unique_filename} to MinIO")
+        s3_key, sha256 = await _store_upload(file)
+        db_doc = (await _create_documents(db, [(file.filename, s3_key, sha256)], force=force))[0]
+        return {**_document_summary(db_doc), "message": "Upload successful"}
 
-        # 3. Create DB Record
-        db_doc = Document(
-            filename=file.filename,
-            s3_key=unique_filename,
-            status=DocumentStatus.PENDING
-        )
-        db.add(db_doc)
-        db.commit()
-        db.refresh(db_doc)
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Upload failed: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
 
-        # 4. Trigger Worker
-        celery_app.send_task("process_document", args=[db_doc.id])
-        
-        return {"id": db_doc.id, "filename": db_doc.filename, "status": db_doc.status, "message": "Upload successful"}
+@app.post("/upload/batch")
+async def upload_documents(
+    files: List[UploadFile] = File(...),
+    force: bool = False,
+    db: Session = Depends(get_db),
+    user: User = Depends(RoleChecker(["ap", "admin"]))
+):
+    semaphore = asyncio.Semaphore(max(1, UPLOAD_CONCURRENCY))
 
+    async def store(file: UploadFile):
+        async with semaphore:
+            try:
+                return await _store_upload(file), None
+            except Exception as e:
+                logger.error(f"Upload of {file.filename} failed: {e}")
+                return None, str(e)
+
+    stored = await asyncio.gather(*(store(f) for f in files))
+    uploaded = [(f.filename, *result) for f, (result, _) in zip(files, stored) if result]
+
+    try:
+        docs = iter(await _create_documents(db, uploaded, force=force) if uploaded else [])
+    except HTTPException:
+        raise
     except Exception as e:
-        logger.error(f"Upload failed: {e}")
+        logger.error(f"Batch upload failed: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
-from shared.ingestion import VectorService
-vector_service = VectorService()
+    results = []
+    for f, (_, error) in zip(files, stored):
+        if error:
+            results.append({"filename": f.filename, "status": "FAILED", "error": error})
+        else:
+            results.append(_document_summary(next(docs)))
+    return {
+        "uploaded": len(uploaded),
+        "failed": len(files) - len(uploaded),
+        "duplicates": sum(1 for r in results if r.get("duplicate_of")),
+        "documents": results
+    }
+
+@app.post("/documents/{doc_id}/reprocess")
+def reprocess_document(
+    doc_id: int,
+    db: Session = Depends(get_db),
+    user: User = Depends(RoleChecker(["ap", "admin"]))
+):
+    # Force a full pipeline run, e.g. for a duplicate whose original was wrong.
+    # The MinIO object stays shared; pages and chunks are rebuilt under doc_id
+    # from scratch rather than resumed.
+    doc = db.query(Document).filter(Document.id == doc_id).first()
+    if not doc:
+        raise HTTPException(status_code=404, detail="Document not found")
+    doc.duplicate_of_id = None
+    doc.status = DocumentStatus.PENDING
+    doc.processing_stage = None
+    db.commit()
+    try:
+        document_pipeline(celery_app, doc.id).apply_async()
+    except Exception as e:
+        _fail_unqueued(db, [doc], e)
+    return _document_summary(doc)
+
+@app.get("/debug/dedup")
+def debug_dedup(db: Session = Depends(get_db)):
+    return DocumentDedup.stats(db)
+
+from shared.ingestion import get_vector_service
 
 @app.get("/search")
 def search_documents(q: str, doc_id: int = None, limit: int = 5):
     try:
-        results = vector_service.search(q, limit, doc_id)
+        results = get_vector_service().search(q, limit, doc_id)
         return {"results": [
             {
                 "score": hit.score,
@@ -142,20 +262,63 @@ def search_documents(q: str, doc_id: int = None, limit: int = 5):
         logger.error(f"Search failed: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.get("/debug/models")
+def debug_models():
+    return model_stats()
+
+@app.get("/debug/embedding_cache")
+def debug_embedding_cache(model: str = DEFAULT_EMBEDDING_MODEL):
+    # Lookups summed over all workers embedding with this model
+    from shared.embedding_cache import EMBEDDING_CACHE_BACKEND, embedding_cache_stats
+    if EMBEDDING_CACHE_BACKEND.lower() in ("off", "none", ""):
+        return {"enabled": False}
+    try:
+        stats = embedding_cache_stats.snapshot(model)
+    except Exception as e:
+        logger.error(f"Embedding cache stats unavailable: {e}")
+        raise HTTPException(status_code=503, detail="Redis unavailable")
+    return {"enabled": True, "backend": EMBEDDING_CACHE_BACKEND, "model": model, **stats}
+
+@app.get("/debug/llm_cache")
+def debug_llm_cache():
+    # Lookups summed over all workers; the API process itself never runs a chain
+    from shared.llm_cache import LLM_CACHE_BACKEND, LLM_CACHE_TTL_SECONDS, llm_cache_stats
+    if LLM_CACHE_BACKEND.lower() in ("off", "none", ""):
+        return {"enabled": False}
+    try:
+        stats = llm_cache_stats.snapshot()
+    except Exception as e:
+        logger.error(f"LLM cache stats unavailable: {e}")
+        raise HTTPException(status_code=503, detail="Redis unavailable")
+    return {"enabled": True, "backend": LLM_CACHE_BACKEND, "ttl_seconds": LLM_CACHE_TTL_SECONDS, **stats}
+
+
+@app.get("/debug/term_comparisons")
+def debug_term_comparisons():
+    # How payment-term comparisons were resolved, summed over all workers
+    from shared.payment_terms import comparison_stats
+    try:
+        return comparison_stats.snapshot()
+    except Exception as e:
+        logger.error(f"Term comparison stats unavailable: {e}")
+        raise HTTPException(status_code=503, detail="Redis unavailable")
+
 @app.get("/debug/chunks/{doc_id}")
-def debug_chunks(doc_id: int):
+def debug_chunks(doc_id: int, db: Session = Depends(get_db)):
     # This is a bit of a hack to peek at Qdrant
     # In a real app we might query by filter without vector
+    content_id = DocumentDedup.content_id(db, doc_id)
     try:
         # Dummy search to find chunks for this doc
         # Ideally Qdrant client has scroll() API
+        vector_service = get_vector_service()
         results = vector_service.qdrant.scroll(
             collection_name=vector_service.collection_name,
             scroll_filter=qmodels.Filter(
                 must=[
                     qmodels.FieldCondition(
                         key="doc_id",
-                        match=qmodels.MatchValue(value=doc_id)
+                        match=qmodels.MatchValue(value=content_id)
                     )
                 ]
             ),
@@ -167,22 +330,64 @@ def debug_chunks(doc_id: int):
         logger.error(f"Debug failed: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.get("/debug/pages/{doc_id}")
+def debug_pages(doc_id: int, db: Session = Depends(get_db)):
+    from shared.models import DocumentPage
+    content_id = DocumentDedup.content_id(db, doc_id)
+    rows = db.query(DocumentPage.page_number, DocumentPage.char_count, DocumentPage.parser_version).filter(
+        DocumentPage.document_id == content_id
+    ).order_by(DocumentPage.page_number).all()
+    return {
+        "doc_id": doc_id,
+        "content_doc_id": content_id,
+        "current": PageStore.is_current(db, content_id),
+        "pages": [{"page_number": r.page_number, "chars": r.char_count, "parser_version": r.parser_version} for r in rows],
+        "text_preview": PageStore.load_text(db, content_id, max_chars=2000)
+    }
+
+DOCUMENTS_PAGE_MAX = int(os.getenv("DOCUMENTS_PAGE_MAX", 500))
+
 @app.get("/documents")
-def list_documents(db: Session = Depends(get_db)):
-    docs = db.query(Document).order_by(Document.created_at.desc()).all()
+def list_documents(
+    limit: int = 50,
+    cursor: Optional[str] = None,
+    status: Optional[DocumentStatus] = None,
+    doc_type: Optional[str] = None,
+    db: Session = Depends(get_db)
+):
+    # Newest first, one page per call: pass next_cursor back as cursor for the
+    # next page. Only the listed columns are selected (never extraction_result),
+    # and each filter has a (filter, created_at, id) index to seek on.
+    limit = max(1, min(limit, DOCUMENTS_PAGE_MAX))
+    query = db.query(Document.id, Document.filename, Document.status, Document.doc_type, Document.created_at)
+    if status:
+        query = query.filter(Document.status == status)
+    if doc_type:
+        query = query.filter(Document.doc_type == doc_type)
+    try:
+        rows, next_cursor = keyset_page(query, Document.created_at, Document.id, cursor, limit)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    total, estimated = estimate_count(db, query)
     # Normalize for frontend
-    return {"documents": [
-        {
-            "id": d.id,
-            "filename": d.filename,
-            "status": d.status,
-            "created_at": d.created_at
-        } for d in docs
-    ]}
+    return {
+        "documents": [
+            {
+                "id": d.id,
+                "filename": d.filename,
+                "status": d.status,
+                "doc_type": d.doc_type,
+                "created_at": d.created_at
+            } for d in rows
+        ],
+        "next_cursor": next_cursor,
+        "total": total,
+        "total_is_estimate": estimated
+    }
 
 @app.get("/documents/{doc_id}/extraction")
-def get_extraction_result(doc_id: int, db: Session = Depends(get_db)):
-    doc = db.query(Document).filter(Document.id == doc_id).first()
+async def get_extraction_result(doc_id: int, db: AsyncSession = Depends(get_async_db)):
+    doc = await db.get(Document, doc_id)
     if not doc:
         raise HTTPException(status_code=404, detail="Document not found")
     
@@ -190,97 +395,104 @@ def get_extraction_result(doc_id: int, db: Session = Depends(get_db)):
         "id": doc.id,
         "filename": doc.filename,
         "status": doc.status,
+        "fields": fields_to_dict(doc),
         "result": doc.extraction_result
     }
 
-@app.post("/documents/{doc_id}/analyze")
-def analyze_document(doc_id: int, db: Session = Depends(get_db)):
-    from shared.comparison import ComparisonGraph
-    from shared.models import Finding as DBFinding
-    
-    # Run Comparison
-    try:
-        graph = ComparisonGraph(db)
-        findings = graph.run(doc_id)
-        
-        # Save Findings
-        db_findings = []
-        for f in findings:
-            db_f = DBFinding(
-                document_id=doc_id,
-                finding_type=f.finding_type,
-                severity=f.severity,
-                description=f.description,
-                evidence=f.evidence or {},
-                status="open"
-            )
-            db.add(db_f)
-            db_findings.append(db_f)
-        
-        db.commit()
-        return {"status": "success", "findings_count": len(db_findings)}
-        
-    except Exception as e:
-        logger.error(f"Analysis failed: {e}")
-        raise HTTPException(status_code=500, detail=str(e))
+def _enqueue_job(db: Session, kind: str, task_name: str, doc_id: int, force: bool):
+    doc = db.query(Document).filter(Document.id == doc_id).first()
+    if not doc:
+        raise HTTPException(status_code=404, detail="Document not found")
+
+    job, created = submit_job(db, kind, doc, force=force)
+    return _dispatch_job(db, job, created, task_name)
+
+def _dispatch_job(db: Session, job: Job, created: bool, task_name: str):
+    if created:
+        try:
+            celery_app.send_task(task_name, args=[job.id], task_id=job.id)
+        except Exception as e:
+            logger.error(f"Failed to enqueue {job.kind} job {job.id}: {e}")
+            job.status = JobStatus.FAILED
+            job.error = f"enqueue failed: {e}"
+            job.dedup_key = None
+            db.commit()
+            raise HTTPException(status_code=503, detail="Task queue unavailable")
+    return JSONResponse(status_code=202, content=jsonable_encoder({**job_to_dict(job), "deduplicated": not created}))
+
+@app.post("/documents/{doc_id}/analyze", status_code=202)
+def analyze_document(doc_id: int, force: bool = False, db: Session = Depends(get_db)):
+    # Comparison runs on the worker; poll the returned status_url for findings_count
+    return _enqueue_job(db, "analyze", "analyze_document", doc_id, force)
 
 @app.get("/documents/{doc_id}/findings")
-def get_findings(doc_id: int, db: Session = Depends(get_db)):
+async def get_findings(doc_id: int, db: AsyncSession = Depends(get_async_db)):
     from shared.models import Finding as DBFinding
-    findings = db.query(DBFinding).filter(DBFinding.document_id == doc_id).all()
+    findings = (await db.execute(
+        select(DBFinding).filter(DBFinding.document_id == doc_id).order_by(DBFinding.id)
+    )).scalars().all()
     return {"findings": findings}
 
-@app.post("/contracts/{doc_id}/risk_assessment")
-def assess_risk(doc_id: int, db: Session = Depends(get_db)):
-    from shared.risk import RiskAssessmentGraph
-    
-    doc = db.query(Document).filter(Document.id == doc_id).first()
-    if not doc:
-        raise HTTPException(status_code=404, detail="Document not found")
-        
-    # Get text from chunks (better than storing huge text in DB, but for now we re-construct or use what we have)
-    # Ideally extraction_result has full text? No.
-    # We should fetch from Qdrant or store text in extraction?
-    # For MVP, let's fetch chunks from Qdrant or just assume we have text access 
-    # (Actually we don't store full text in DB).
-    # Solution: We will fetch full text from Qdrant chunks for this doc.
-    
+@app.post("/contracts/{doc_id}/risk_assessment", status_code=202)
+def assess_risk(doc_id: int, force: bool = False, db: Session = Depends(get_db)):
+    # The risk graph (clause identification + per-clause LLM scoring) runs on
+    # the worker; the job result carries the risks once COMPLETED
+    return _enqueue_job(db, "risk_assessment", "assess_risk", doc_id, force)
+
+RECONCILE_MAX_INVOICES = int(os.getenv("RECONCILE_MAX_INVOICES", 5000))
+
+class ReconcileRequest(BaseModel):
+    invoice_ids: Optional[List[int]] = None
+    # Or every processed document uploaded in [created_from, created_to)
+    created_from: Optional[datetime] = None
+    created_to: Optional[datetime] = None
+    force: bool = False
+
+@app.post("/invoices/reconcile", status_code=202)
+def reconcile_invoices(req: ReconcileRequest, db: Session = Depends(get_db)):
+    # Month-end batch: one job compares every invoice against its vendor's
+    # contract; the job result has a per-invoice status and findings_count
+    if req.invoice_ids:
+        ids = sorted(set(req.invoice_ids))
+    elif req.created_from or req.created_to:
+        query = db.query(Document.id).filter(
+            Document.status == DocumentStatus.COMPLETED,
+            Document.doc_type == "invoice"
+        )
+        if req.created_from:
+            query = query.filter(Document.created_at >= req.created_from)
+        if req.created_to:
+            query = query.filter(Document.created_at < req.created_to)
+        ids = [row.id for row in query.order_by(Document.id).limit(RECONCILE_MAX_INVOICES + 1)]
+    else:
+        raise HTTPException(status_code=400, detail="Provide invoice_ids or a created_from/created_to range")
+
+    if not ids:
+        raise HTTPException(status_code=404, detail="No documents to reconcile")
+    if len(ids) > RECONCILE_MAX_INVOICES:
+        raise HTTPException(status_code=400, detail=f"At most {RECONCILE_MAX_INVOICES} invoices per batch")
+
+    job, created = submit_batch_job(db, "reconcile", ids, force=req.force)
+    return _dispatch_job(db, job, created, "reconcile_invoices")
+
+@app.get("/queues")
+def get_queues():
+    # Pending messages per queue (broker) and per-queue completions/runtime
+    # recorded by the workers
+    import redis
     try:
-
-
-        # Hacky: search with empty query to get all chunks? No limit is 100 usually.
-        # Better: Re-download from MinIO and parse? Yes, cleaner.
-        # But for speed, let's use the text from the Extraction result if available? No.
-        
-        # Re-download logic (duplicated from worker slightly)
-        minio_client.fget_object("documents", doc.s3_key, f"/tmp/{doc.s3_key}")
-        from shared.ingestion import ParsingService
-        pages = ParsingService.parse_pdf(f"/tmp/{doc.s3_key}")
-        full_text = "\n".join([p.text for p in pages])
-        
-        graph = RiskAssessmentGraph()
-        findings = graph.run(doc.id, full_text)
-        
-        # Save Findings to DB
-        from shared.models import Finding as DBFinding
-        for f in findings:
-            # Check if exists? For MVP just add.
-            db_f = DBFinding(
-                document_id=doc.id,
-                finding_type=f.clause_type, # e.g. "Liability Cap"
-                severity=f.risk_level, # "high"
-                description=f"{f.explanation}\nOriginal: {f.original_text}\nRedline: {f.redline_text}",
-                evidence={"original": f.original_text, "standard": f.standard_clause, "risk_score": f.risk_score},
-                status="open"
-            )
-            db.add(db_f)
-        db.commit()
-        
-        return {"status": "success", "risks": findings}
-        
+        return queue_stats(redis.from_url(REDIS_URL))
     except Exception as e:
-        logger.error(f"Risk assessment failed: {e}")
-        raise HTTPException(status_code=500, detail=str(e))
+        logger.error(f"Queue stats unavailable: {e}")
+        raise HTTPException(status_code=503, detail="Broker unavailable")
+
+@app.get("/jobs/{job_id}")
+async def get_job(job_id: str, db: AsyncSession = Depends(get_async_db)):
+    # Polled by clients while jobs run, so it stays off the threadpool
+    job = await db.get(Job, job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job_to_dict(job)
 
 class ReviewRequest(BaseModel):
     decision: str # APPROVE, OVERRIDE
@@ -316,54 +528,80 @@ def review_finding(
 
 @app.get("/documents/{doc_id}/audit")
 def get_audit_log(doc_id: int, db: Session = Depends(get_db)):
-    from shared.models import ReviewDecision, Finding as DBFinding
-    
-    # Join findings and decisions? Or just fetch all decisions for findings of this doc
-    # MVP: Fetch all findings, then fetch decisions where finding_id in findings
-    findings = db.query(DBFinding).filter(DBFinding.document_id == doc_id).all()
-    finding_ids = [f.id for f in findings]
-    
-    decisions = db.query(ReviewDecision).filter(ReviewDecision.finding_id.in_(finding_ids)).all()
-    
-    return {"decisions": decisions}
+    return {"decisions": audit_decisions(db, doc_id)}
+
+REPORT_MEDIA_TYPES = {"ndjson": "application/x-ndjson", "csv": "text/csv"}
+
+def _stream_report(doc_id: int, fmt: str):
+    # Runs while the response is being sent, after the request's session has
+    # been closed, so it holds its own
+    db = SessionLocal()
+    try:
+        rows = report_rows(db, doc_id)
+        yield from (to_ndjson(rows) if fmt == "ndjson" else to_csv(rows))
+    finally:
+        db.close()
 
 @app.get("/documents/{doc_id}/report")
-def export_report(doc_id: int, db: Session = Depends(get_db)):
-    from shared.models import ReviewDecision, Finding as DBFinding
-    
+def export_report(doc_id: int, format: str = "json", db: Session = Depends(get_db)):
+    # format=ndjson|csv streams one line per finding, so memory stays flat for
+    # documents with many findings; json keeps the original single object
     doc = db.query(Document).filter(Document.id == doc_id).first()
     if not doc:
         raise HTTPException(status_code=404, detail="Document not found")
-        
-    findings = db.query(DBFinding).filter(DBFinding.document_id == doc_id).all()
-    finding_ids = [f.id for f in findings]
-    decisions = db.query(ReviewDecision).filter(ReviewDecision.finding_id.in_(finding_ids)).all()
-    
-    # Map decisions to findings
-    decision_map = {d.finding_id: d for d in decisions}
-    
+
+    if format in REPORT_MEDIA_TYPES:
+        return StreamingResponse(
+            _stream_report(doc_id, format),
+            media_type=REPORT_MEDIA_TYPES[format],
+            headers={"Content-Disposition": f'attachment; filename="report_{doc_id}.{format}"'}
+        )
+    if format != "json":
+        raise HTTPException(status_code=400, detail="format must be json, ndjson or csv")
+
     report_data = {
         "document_id": doc.id,
         "filename": doc.filename,
         "status": doc.status,
+        **fields_to_dict(doc),
         "findings": []
     }
-    
-    for f in findings:
-        decision = decision_map.get(f.id)
-        report_data["findings"].append({
-            "type": f.finding_type,
-            "severity": f.severity,
-            "description": f.description,
-            "status": f.status,
-            "review_decision": decision.decision if decision else None,
-            "review_comment": decision.comment if decision else None,
-            "reviewed_by": decision.user_id if decision else None,
-            "reviewed_at": decision.created_at if decision else None
-        })
-        
+    for row in report_rows(db, doc_id):
+        row.pop("finding_id")
+        report_data["findings"].append(row)
     return report_data
 
+class ExportRequest(BaseModel):
+    # Documents uploaded in [created_from, created_to)
+    created_from: Optional[datetime] = None
+    created_to: Optional[datetime] = None
+    doc_type: Optional[str] = None
+    format: str = "csv"  # csv or ndjson, gzipped
+    force: bool = False
+
+@app.post("/reports/export", status_code=202)
+def export_portfolio_report(req: ExportRequest, db: Session = Depends(get_db)):
+    # Every finding and its latest decision across the range, written by the
+    # worker to MinIO; the job result has rows_written while it runs and a
+    # presigned download_url once COMPLETED
+    if req.format not in REPORT_MEDIA_TYPES:
+        raise HTTPException(status_code=400, detail="format must be csv or ndjson")
+    params = jsonable_encoder(req.dict(exclude={"force"}))
+    watermark = export_watermark(db, req.created_from, req.created_to, req.doc_type)
+    job, created = submit_export_job(db, params, watermark, force=req.force)
+    return _dispatch_job(db, job, created, "export_report")
+
+@app.get("/reports/export/{job_id}/download")
+def download_portfolio_report(job_id: str, db: Session = Depends(get_db)):
+    # A fresh link, for when the one in the job result has expired
+    job = db.query(Job).filter(Job.id == job_id, Job.kind == "report_export").first()
+    if not job:
+        raise HTTPException(status_code=404, detail="Export not found")
+    if job.status != JobStatus.COMPLETED:
+        raise HTTPException(status_code=409, detail=f"Export is {job.status.value}")
+    url = presigned_url(job.result["s3_key"], EXPORT_URL_EXPIRY)
+    return RedirectResponse(url)
+
 @app.get("/evaluation/report")
 def get_eval_report():
     try:
@@ -378,9 +616,10 @@ def get_eval_report():
 # --- Auth ---
 
 @app.post("/token")
-async def login_for_access_token(form_data: OAuth2PasswordRequestForm = Depends(), db: Session = Depends(get_db)):
-    user = db.query(User).filter(User.username == form_data.username).first()
-    if not user or not verify_password(form_data.password, user.hashed_password):
+async def login_for_access_token(form_data: OAuth2PasswordRequestForm = Depends(), db: AsyncSession = Depends(get_async_db)):
+    user = (await db.execute(select(User).filter(User.username == form_data.username))).scalars().first()
+    # bcrypt is deliberately slow; keep it off the event loop
+    if not user or not await run_in_threadpool(verify_password, form_data.password, user.hashed_password):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect username or password",
@@ -0,0 +1,102 @@
+"""Invoice -> contract lookup: legacy full scan vs PartyIndex.
+
+    cd backend && python -m benchmarks.bench_contract_lookup
+
+Seeds BENCH_CONTRACTS (default 10000,100000) synthetic contracts into
+BENCH_DATABASE_URL (a throwaway SQLite file by default; point it at a scratch
+Postgres to exercise the trigram index) and times exact, fuzzy and missing
+vendor lookups.
+"""
+import os
+import sys
+import time
+import random
+import tempfile
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from shared.database import Base
+from shared.models import Document, ContractParty
+from shared.parties import PartyIndex, normalize_party_name
+
+SIZES = [int(n) for n in os.getenv("BENCH_CONTRACTS", "10000,100000").split(",")]
+LOOKUPS = int(os.getenv("BENCH_LOOKUPS", 50))
+
+WORDS = ["acme", "globex", "initech", "umbrella", "stark", "wayne", "wonka", "tyrell", "cyberdyne",
+         "soylent", "hooli", "vandelay", "gringotts", "oscorp", "massive", "dynamic", "prime", "nova"]
+SUFFIXES = ["Inc.", "LLC", "Ltd", "Corporation", "GmbH", ""]
+
+
+def vendor_name(i: int) -> str:
+    rnd = random.Random(i)
+    return f"{rnd.choice(WORDS).title()} {rnd.choice(WORDS).title()} {i} {rnd.choice(SUFFIXES)}".strip()
+
+
+def legacy_lookup(db, vendor):
+    # The scan ComparisonGraph.retrieve_contract used to do
+    for doc in db.query(Document).filter(Document.extraction_result.isnot(None)).all():
+        if not doc.extraction_result or doc.extraction_result.get("doc_type") != "contract":
+            continue
+        data = doc.extraction_result.get("data", {})
+        party_a = data.get("party_a", {}).get("value", "")
+        party_b = data.get("party_b", {}).get("value", "")
+        if vendor.lower() in party_a.lower() or vendor.lower() in party_b.lower():
+            return doc.id
+    return None
+
+
+def seed(db, n: int):
+    docs, parties = [], []
+    for i in range(1, n + 1):
+        name = vendor_name(i)
+        docs.append({
+            "id": i, "filename": f"msa_{i}.pdf", "s3_key": f"bench/msa_{i}.pdf",
+            "extraction_result": {"doc_type": "contract", "data": {
+                "party_a": {"value": "Our Company Inc."}, "party_b": {"value": name}}},
+        })
+        parties.append({"document_id": i, "role": "party_b", "name": name, "normalized_name": normalize_party_name(name)})
+        parties.append({"document_id": i, "role": "party_a", "name": "Our Company Inc.", "normalized_name": "our company"})
+    db.bulk_insert_mappings(Document, docs)
+    db.bulk_insert_mappings(ContractParty, parties)
+    db.commit()
+
+
+def timed(fn, queries):
+    start = time.perf_counter()
+    for q in queries:
+        fn(q)
+    return (time.perf_counter() - start) / len(queries) * 1000
+
+
+def run():
+    for n in SIZES:
+        with tempfile.TemporaryDirectory() as tmp:
+            url = os.getenv("BENCH_DATABASE_URL", f"sqlite:///{tmp}/bench.db")
+            engine = create_engine(url)
+            Base.metadata.drop_all(engine)
+            Base.metadata.create_all(engine)
+            db = sessionmaker(bind=engine)()
+            seed(db, n)
+
+            rnd = random.Random(42)
+            ids = [rnd.randint(1, n) for _ in range(LOOKUPS)]
+            exact = [vendor_name(i).upper() for i in ids]
+            fuzzy = [" ".join(vendor_name(i).split()[:3]) for i in ids]
+            missing = [f"Nonexistent Vendor {i}" for i in range(LOOKUPS)]
+
+            legacy_queries = exact[:5]
+            print(f"contracts={n}")
+            print(f"  legacy scan        {timed(lambda q: legacy_lookup(db, q), legacy_queries):9.2f} ms/lookup")
+            print(f"  index exact        {timed(lambda q: PartyIndex.find_contract(db, q), exact):9.2f} ms/lookup")
+            print(f"  index fuzzy        {timed(lambda q: PartyIndex.find_contract(db, q), fuzzy):9.2f} ms/lookup")
+            print(f"  index miss         {timed(lambda q: PartyIndex.find_contract(db, q), missing):9.2f} ms/lookup")
+            db.close()
+            Base.metadata.drop_all(engine)
+            engine.dispose()
+
+
+if __name__ == "__main__":
+    run()
@@ -0,0 +1,68 @@
+"""Per-request graph setup vs per-process reuse.
+
+    cd backend && python -m benchmarks.bench_graph_setup
+
+Times what every task used to pay before doing any work (a new chat client
+plus StateGraph compilation, for each of the three graphs) against fetching
+the process-wide instances from the get_*_graph accessors. Qdrant runs in
+memory here, so the per-request figures leave out the extra Qdrant client and
+get_collection round trip each graph also used to make. Set MISTRAL_API_KEY or
+OPENAI_API_KEY to a real key to include your provider's client; a dummy
+Mistral key is used otherwise (no request is sent).
+"""
+import os
+import sys
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+if not (os.getenv("MISTRAL_API_KEY") or os.getenv("OPENAI_API_KEY")):
+    os.environ["MISTRAL_API_KEY"] = "bench"
+
+from qdrant_client import QdrantClient
+
+from shared.ingestion import VectorService, _vector_services
+from shared.llm import get_llm
+from shared.comparison import ComparisonGraph, get_comparison_graph
+from shared.extraction import ExtractionGraph, get_extraction_graph
+from shared.risk import RiskAssessmentGraph, get_risk_graph
+
+ITERATIONS = int(os.getenv("BENCH_ITERATIONS", 50))
+
+GRAPHS = [
+    ("extraction", ExtractionGraph, get_extraction_graph),
+    ("comparison", ComparisonGraph, get_comparison_graph),
+    ("risk", RiskAssessmentGraph, get_risk_graph),
+]
+
+
+def timed(fn, iterations: int = ITERATIONS) -> float:
+    start = time.perf_counter()
+    for _ in range(iterations):
+        fn()
+    return (time.perf_counter() - start) / iterations * 1000
+
+
+def per_request(graph):
+    # What the constructor did on every task: a fresh client and a fresh compile
+    graph.llm = get_llm.__wrapped__()
+    graph.build_graph()
+
+
+def run():
+    client = QdrantClient(location=":memory:")
+    for collection in ("contract_chunks", "clause_library"):
+        _vector_services()[collection] = VectorService(collection_name=collection, client=client)
+
+    print(f"iterations={ITERATIONS}")
+    for name, cls, accessor in GRAPHS:
+        graph = cls()
+        accessor()  # first call builds the process-wide instance
+        print(f"  {name:<11} client    {timed(get_llm.__wrapped__):9.2f} ms")
+        print(f"  {name:<11} compile   {timed(graph.build_graph):9.2f} ms")
+        print(f"  {name:<11} per task  {timed(lambda: per_request(graph)):9.2f} ms")
+        print(f"  {name:<11} reused    {timed(accessor, 10000) * 1000:9.2f} us")
+
+
+if __name__ == "__main__":
+    run()
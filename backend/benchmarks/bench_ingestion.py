@@ -0,0 +1,87 @@
+"""Embedding/upsert throughput benchmark.
+
+Generates synthetic 10, 100 and 1000 page PDFs, then times parse, chunk and
+VectorService.upsert_chunks separately and reports chunks per second.
+
+    cd backend && python -m benchmarks.bench_ingestion
+
+Uses an in-memory Qdrant unless QDRANT_HOST is set, so it can run without the
+docker-compose stack. The embedding cache is off, so every run measures
+encoding rather than cache hits from the previous run.
+"""
+import os
+import sys
+import time
+import tempfile
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+# Read when shared.embedding_cache is imported
+os.environ["EMBEDDING_CACHE"] = "off"
+
+from reportlab.lib.pagesizes import letter
+from reportlab.pdfgen import canvas
+from qdrant_client import QdrantClient
+
+from shared.ingestion import ParsingService, ChunkingService, VectorService
+from shared.model_registry import get_embedding_model
+from shared.embedding_cache import EMBEDDING_CACHE_BACKEND
+
+PAGE_COUNTS = [int(n) for n in os.getenv("BENCH_PAGES", "10,100,1000").split(",")]
+
+CLAUSE = (
+    "The Vendor shall invoice the Customer monthly in arrears and the Customer shall pay all "
+    "undisputed amounts within thirty (30) days of receipt. Liability of either party shall not "
+    "exceed the fees paid in the twelve months preceding the claim. "
+)
+
+
+def make_pdf(path: str, pages: int):
+    c = canvas.Canvas(path, pagesize=letter)
+    for p in range(pages):
+        y = 750
+        c.drawString(50, y, f"Master Services Agreement - Section {p + 1}")
+        for line in range(40):
+            y -= 17
+            c.drawString(50, y, f"{p + 1}.{line + 1} {CLAUSE[(line * 7) % 60:(line * 7) % 60 + 90]}")
+        c.showPage()
+    c.save()
+
+
+def make_client() -> QdrantClient:
+    if os.getenv("QDRANT_HOST"):
+        return QdrantClient(host=os.getenv("QDRANT_HOST"), port=int(os.getenv("QDRANT_PORT", 6333)))
+    return QdrantClient(":memory:")
+
+
+def run():
+    # Keep model load out of the timings
+    get_embedding_model()
+
+    print(f"Embedding cache: {EMBEDDING_CACHE_BACKEND}")
+    print(f"{'pages':>6} {'chunks':>7} {'parse_s':>8} {'chunk_s':>8} {'embed_s':>8} {'chunks/s':>9}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for pages in PAGE_COUNTS:
+            path = os.path.join(tmp, f"bench_{pages}.pdf")
+            make_pdf(path, pages)
+
+            service = VectorService(collection_name=f"bench_{pages}", client=make_client())
+
+            start = time.perf_counter()
+            parsed = ParsingService.parse_pdf(path)
+            parse_s = time.perf_counter() - start
+
+            start = time.perf_counter()
+            chunks = ChunkingService.chunk_document(pages, parsed)
+            chunk_s = time.perf_counter() - start
+
+            start = time.perf_counter()
+            service.upsert_chunks(chunks)
+            embed_s = time.perf_counter() - start
+
+            service.qdrant.delete_collection(service.collection_name)
+            print(f"{pages:>6} {len(chunks):>7} {parse_s:>8.2f} {chunk_s:>8.2f} {embed_s:>8.2f} "
+                  f"{len(chunks) / embed_s:>9.1f}")
+
+
+if __name__ == "__main__":
+    run()
@@ -0,0 +1,48 @@
+"""Serial vs page-parallel ParsingService.parse_pdf.
+
+    cd backend && python -m benchmarks.bench_parsing
+
+BENCH_PAGES and PDF_PARSE_WORKERS control the documents and pool size.
+"""
+import os
+import sys
+import time
+import tempfile
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from shared.ingestion import ParsingService, PDF_PARSE_WORKERS
+from benchmarks.bench_ingestion import make_pdf
+
+PAGE_COUNTS = [int(n) for n in os.getenv("BENCH_PAGES", "10,50,200,500").split(",")]
+
+
+def timed(fn):
+    start = time.perf_counter()
+    result = fn()
+    return result, time.perf_counter() - start
+
+
+def run():
+    workers = max(2, PDF_PARSE_WORKERS)
+    print(f"workers={workers}")
+    print(f"{'pages':>6} {'serial_s':>9} {'parallel_s':>11} {'speedup':>8}")
+    with tempfile.TemporaryDirectory() as tmp:
+        # Start the pool outside the timings; it is reused across documents
+        warm = os.path.join(tmp, "warm.pdf")
+        make_pdf(warm, 64)
+        list(ParsingService._iter_parallel(warm, 64, workers))
+
+        for pages in PAGE_COUNTS:
+            path = os.path.join(tmp, f"bench_{pages}.pdf")
+            make_pdf(path, pages)
+
+            serial, serial_s = timed(lambda: ParsingService.parse_pdf(path, workers=1))
+            parallel, parallel_s = timed(lambda: list(ParsingService._iter_parallel(path, pages, workers)))
+            assert serial == parallel, "parallel parsing changed the output"
+
+            print(f"{pages:>6} {serial_s:>9.2f} {parallel_s:>11.2f} {serial_s / parallel_s:>7.2f}x")
+
+
+if __name__ == "__main__":
+    run()
@@ -0,0 +1,131 @@
+"""Rate limiter overhead: legacy sync GET + INCR pipeline vs the async Lua
+sliding window, plus the in-process fallback and the middleware end to end.
+
+    cd backend && python -m benchmarks.bench_rate_limit
+
+Redis timings need a reachable REDIS_URL (e.g. `docker compose up redis` and
+REDIS_URL=redis://localhost:6379/0); they are skipped otherwise.
+BENCH_CHECKS (default 2000) checks per case, BENCH_CONCURRENCY (default 50)
+in flight for the concurrent case.
+"""
+import os
+import sys
+import time
+import asyncio
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import httpx
+import redis
+from fastapi import FastAPI
+
+from shared.middleware import RateLimitMiddleware
+from shared.rate_limit import LocalRateLimiter, RateLimiter
+
+CHECKS = int(os.getenv("BENCH_CHECKS", 2000))
+CONCURRENCY = int(os.getenv("BENCH_CONCURRENCY", 50))
+REDIS_URL = os.getenv("REDIS_URL", "redis://localhost:6379/0")
+LIMIT = 10 ** 9  # never reject, so every case does the full check
+
+
+def legacy_hit(r, key):
+    # What RateLimitMiddleware.dispatch used to do, blocking the event loop
+    current = r.get(key)
+    if current and int(current) >= LIMIT:
+        return False
+    p = r.pipeline()
+    p.incr(key)
+    if not current:
+        p.expire(key, 60)
+    p.execute()
+    return True
+
+
+async def legacy_concurrent(r):
+    async def one(i):
+        legacy_hit(r, f"bench:legacy:{i % CONCURRENCY}")
+    await asyncio.gather(*(one(i) for i in range(CHECKS)))
+
+
+async def lua_sequential(limiter):
+    for i in range(CHECKS):
+        await limiter.hit(f"bench:lua:{i % CONCURRENCY}", LIMIT, 60)
+
+
+async def lua_concurrent(limiter):
+    semaphore = asyncio.Semaphore(CONCURRENCY)
+
+    async def one(i):
+        async with semaphore:
+            await limiter.hit(f"bench:lua:{i % CONCURRENCY}", LIMIT, 60)
+    await asyncio.gather(*(one(i) for i in range(CHECKS)))
+
+
+async def requests_per_second(app) -> float:
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench") as client:
+        start = time.perf_counter()
+        for _ in range(CHECKS // 4):
+            await client.get("/ping")
+        return (CHECKS // 4) / (time.perf_counter() - start)
+
+
+def make_app(limited: bool) -> FastAPI:
+    app = FastAPI()
+
+    @app.get("/ping")
+    def ping():
+        return {"ok": True}
+
+    if limited:
+        app.add_middleware(RateLimitMiddleware, limit=LIMIT, window=60)
+    return app
+
+
+def report(name, seconds):
+    print(f"  {name:<28} {seconds / CHECKS * 1e6:9.1f} us/check")
+
+
+def run():
+    print(f"checks={CHECKS} concurrency={CONCURRENCY}")
+    local = LocalRateLimiter()
+    start = time.perf_counter()
+    for i in range(CHECKS):
+        local.hit(f"ip:{i % CONCURRENCY}", LIMIT, 60)
+    report("in-process fallback", time.perf_counter() - start)
+
+    sync_redis = redis.from_url(REDIS_URL, decode_responses=True)
+    try:
+        sync_redis.ping()
+    except Exception as e:
+        print(f"  Redis at {REDIS_URL} unreachable ({e}); skipping Redis cases")
+    else:
+        start = time.perf_counter()
+        for i in range(CHECKS):
+            legacy_hit(sync_redis, f"bench:legacy:{i % CONCURRENCY}")
+        report("legacy sync, sequential", time.perf_counter() - start)
+        start = time.perf_counter()
+        asyncio.run(legacy_concurrent(sync_redis))
+        report("legacy sync, concurrent", time.perf_counter() - start)
+
+        async def lua_cases():
+            limiter = RateLimiter(redis_url=REDIS_URL, prefix="bench:rl")
+            for name, case in (("lua async, sequential", lua_sequential), ("lua async, concurrent", lua_concurrent)):
+                start = time.perf_counter()
+                await case(limiter)
+                report(name, time.perf_counter() - start)
+            await limiter.redis.aclose()
+        asyncio.run(lua_cases())
+        for pattern in ("bench:legacy:*", "bench:rl:*"):
+            keys = list(sync_redis.scan_iter(pattern))
+            if keys:
+                sync_redis.delete(*keys)
+
+    # End to end through the ASGI stack (Redis if reachable, else the fallback)
+    bare = asyncio.run(requests_per_second(make_app(limited=False)))
+    limited = asyncio.run(requests_per_second(make_app(limited=True)))
+    print(f"  {'app without limiter':<28} {bare:9.0f} req/s")
+    print(f"  {'app with limiter':<28} {limited:9.0f} req/s")
+
+
+if __name__ == "__main__":
+    run()
@@ -32,15 +32,24 @@ def wait_for_extraction(doc_id):
         if res.status_code == 200:
             data = res.json()
             if data["status"] == "COMPLETED":
-                return data["result"]
+                return data["fields"]
             if data["status"] == "FAILED":
                 return None
         time.sleep(1)
     return None
 
 def trigger_analysis(invoice_id):
+    # Analysis is a background job: poll it instead of sleeping a fixed time
     res = requests.post(f"{API_URL}/documents/{invoice_id}/analyze")
-    return res.status_code == 200
+    if res.status_code != 202:
+        return False
+    job = res.json()
+    for _ in range(60):
+        if job["status"] in ("COMPLETED", "FAILED"):
+            return job["status"] == "COMPLETED"
+        time.sleep(1)
+        job = requests.get(f"{API_URL}{job['status_url']}").json()
+    return False
 
 def get_findings(invoice_id):
     res = requests.get(f"{API_URL}/documents/{invoice_id}/findings")
@@ -100,13 +109,12 @@ def run_eval():
         extraction_score = 0
         if inv_data:
             # Simple exact match on total (float)
-            if abs(inv_data.get("total_amount", 0) - item["expected_invoice"]["total_amount"]) < 0.01:
+            if abs((inv_data.get("total_amount") or 0) - item["expected_invoice"]["total_amount"]) < 0.01:
                 extraction_score = 1.0
             # Could check vendor name too
         
         # Analysis Check
         trigger_analysis(inv_id)
-        time.sleep(2) # Wait for analysis to save findings
         findings = get_findings(inv_id)
         
         # Mismatch Logic Check
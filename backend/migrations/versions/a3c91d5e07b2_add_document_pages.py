@@ -0,0 +1,41 @@
+"""add_document_pages
+
+Revision ID: a3c91d5e07b2
+Revises: f7a6ffcd1599
+Create Date: 2026-10-17 09:12:40.118204
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a3c91d5e07b2'
+down_revision: Union[str, None] = 'f7a6ffcd1599'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'document_pages',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('document_id', sa.Integer(), nullable=False),
+        sa.Column('page_number', sa.Integer(), nullable=False),
+        sa.Column('text_compressed', sa.LargeBinary(), nullable=False),
+        sa.Column('char_count', sa.Integer(), nullable=True),
+        sa.Column('parser_version', sa.String(), nullable=False),
+        sa.ForeignKeyConstraint(['document_id'], ['documents.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('document_id', 'page_number', name='uq_document_pages_document_page')
+    )
+    op.create_index(op.f('ix_document_pages_id'), 'document_pages', ['id'], unique=False)
+    op.create_index(op.f('ix_document_pages_document_id'), 'document_pages', ['document_id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_document_pages_document_id'), table_name='document_pages')
+    op.drop_index(op.f('ix_document_pages_id'), table_name='document_pages')
+    op.drop_table('document_pages')
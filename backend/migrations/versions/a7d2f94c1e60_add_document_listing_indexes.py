@@ -0,0 +1,37 @@
+"""add_document_listing_indexes
+
+Revision ID: a7d2f94c1e60
+Revises: f1c83e5a9b27
+Create Date: 2026-10-17 18:42:10.512304
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a7d2f94c1e60'
+down_revision: Union[str, None] = 'f1c83e5a9b27'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('documents', sa.Column('doc_type', sa.String(), nullable=True))
+    if op.get_bind().dialect.name == 'postgresql':
+        op.execute("UPDATE documents SET doc_type = extraction_result->>'doc_type' WHERE extraction_result IS NOT NULL")
+    else:
+        op.execute("UPDATE documents SET doc_type = json_extract(extraction_result, '$.doc_type') WHERE extraction_result IS NOT NULL")
+
+    op.create_index('ix_documents_created_at_id', 'documents', ['created_at', 'id'], unique=False)
+    op.create_index('ix_documents_status_created_at_id', 'documents', ['status', 'created_at', 'id'], unique=False)
+    op.create_index('ix_documents_doc_type_created_at_id', 'documents', ['doc_type', 'created_at', 'id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_documents_doc_type_created_at_id', table_name='documents')
+    op.drop_index('ix_documents_status_created_at_id', table_name='documents')
+    op.drop_index('ix_documents_created_at_id', table_name='documents')
+    op.drop_column('documents', 'doc_type')
@@ -0,0 +1,40 @@
+"""add_document_fields
+
+Revision ID: b4e8c1d7a352
+Revises: a7d2f94c1e60
+Create Date: 2026-10-17 19:26:47.031558
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b4e8c1d7a352'
+down_revision: Union[str, None] = 'a7d2f94c1e60'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('documents', sa.Column('vendor_name', sa.String(), nullable=True))
+    op.add_column('documents', sa.Column('vendor_normalized', sa.String(), nullable=True))
+    op.add_column('documents', sa.Column('total_amount', sa.Numeric(18, 2), nullable=True))
+    op.add_column('documents', sa.Column('currency', sa.String(length=3), nullable=True))
+    op.add_column('documents', sa.Column('document_date', sa.Date(), nullable=True))
+    op.create_index('ix_documents_doc_type_vendor_normalized', 'documents', ['doc_type', 'vendor_normalized'], unique=False)
+    op.create_index('ix_documents_doc_type_document_date', 'documents', ['doc_type', 'document_date'], unique=False)
+    # Existing documents: run the backfill_document_fields worker task once
+    # (values are parsed in Python, see shared.document_fields)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_documents_doc_type_document_date', table_name='documents')
+    op.drop_index('ix_documents_doc_type_vendor_normalized', table_name='documents')
+    op.drop_column('documents', 'document_date')
+    op.drop_column('documents', 'currency')
+    op.drop_column('documents', 'total_amount')
+    op.drop_column('documents', 'vendor_normalized')
+    op.drop_column('documents', 'vendor_name')
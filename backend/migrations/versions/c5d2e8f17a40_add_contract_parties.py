@@ -0,0 +1,52 @@
+"""add_contract_parties
+
+Revision ID: c5d2e8f17a40
+Revises: b81f4c2a9d6e
+Create Date: 2026-10-17 11:26:54.903112
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c5d2e8f17a40'
+down_revision: Union[str, None] = 'b81f4c2a9d6e'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'contract_parties',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('document_id', sa.Integer(), nullable=False),
+        sa.Column('role', sa.String(), nullable=True),
+        sa.Column('name', sa.String(), nullable=True),
+        sa.Column('normalized_name', sa.String(), nullable=False),
+        sa.ForeignKeyConstraint(['document_id'], ['documents.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_contract_parties_id'), 'contract_parties', ['id'], unique=False)
+    op.create_index(op.f('ix_contract_parties_document_id'), 'contract_parties', ['document_id'], unique=False)
+    op.create_index(op.f('ix_contract_parties_normalized_name'), 'contract_parties', ['normalized_name'], unique=False)
+
+    # Fuzzy vendor lookup (similarity / % and LIKE '%..%') in PartyIndex.find_contract
+    if op.get_bind().dialect.name == 'postgresql':
+        op.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+        op.create_index(
+            'ix_contract_parties_normalized_name_trgm', 'contract_parties', ['normalized_name'],
+            postgresql_using='gin', postgresql_ops={'normalized_name': 'gin_trgm_ops'}
+        )
+    # Existing contracts: run the backfill_contract_parties worker task once
+
+
+def downgrade() -> None:
+    if op.get_bind().dialect.name == 'postgresql':
+        op.drop_index('ix_contract_parties_normalized_name_trgm', table_name='contract_parties')
+    op.drop_index(op.f('ix_contract_parties_normalized_name'), table_name='contract_parties')
+    op.drop_index(op.f('ix_contract_parties_document_id'), table_name='contract_parties')
+    op.drop_index(op.f('ix_contract_parties_id'), table_name='contract_parties')
+    op.drop_table('contract_parties')
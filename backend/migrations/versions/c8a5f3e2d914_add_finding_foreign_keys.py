@@ -0,0 +1,52 @@
+"""add_finding_foreign_keys
+
+Revision ID: c8a5f3e2d914
+Revises: b4e8c1d7a352
+Create Date: 2026-10-17 20:05:12.448190
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c8a5f3e2d914'
+down_revision: Union[str, None] = 'b4e8c1d7a352'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Rows pointing at deleted documents/findings would violate the new keys
+    op.execute("DELETE FROM findings WHERE document_id IS NULL OR document_id NOT IN (SELECT id FROM documents)")
+    op.execute("UPDATE findings SET related_document_id = NULL WHERE related_document_id NOT IN (SELECT id FROM documents)")
+    op.execute("DELETE FROM review_decisions WHERE finding_id IS NULL OR finding_id NOT IN (SELECT id FROM findings)")
+
+    # batch mode so SQLite (which cannot add constraints in place) works too
+    with op.batch_alter_table('findings') as batch:
+        batch.alter_column('document_id', existing_type=sa.Integer(), nullable=False)
+        batch.create_foreign_key('fk_findings_document_id', 'documents', ['document_id'], ['id'], ondelete='CASCADE')
+        batch.create_foreign_key('fk_findings_related_document_id', 'documents', ['related_document_id'], ['id'], ondelete='SET NULL')
+        batch.create_index('ix_findings_document_id', ['document_id'], unique=False)
+        batch.create_index('ix_findings_related_document_id', ['related_document_id'], unique=False)
+
+    with op.batch_alter_table('review_decisions') as batch:
+        batch.alter_column('finding_id', existing_type=sa.Integer(), nullable=False)
+        batch.create_foreign_key('fk_review_decisions_finding_id', 'findings', ['finding_id'], ['id'], ondelete='CASCADE')
+        batch.create_index('ix_review_decisions_finding_id_created_at', ['finding_id', 'created_at'], unique=False)
+
+
+def downgrade() -> None:
+    with op.batch_alter_table('review_decisions') as batch:
+        batch.drop_index('ix_review_decisions_finding_id_created_at')
+        batch.drop_constraint('fk_review_decisions_finding_id', type_='foreignkey')
+        batch.alter_column('finding_id', existing_type=sa.Integer(), nullable=True)
+
+    with op.batch_alter_table('findings') as batch:
+        batch.drop_index('ix_findings_related_document_id')
+        batch.drop_index('ix_findings_document_id')
+        batch.drop_constraint('fk_findings_related_document_id', type_='foreignkey')
+        batch.drop_constraint('fk_findings_document_id', type_='foreignkey')
+        batch.alter_column('document_id', existing_type=sa.Integer(), nullable=True)
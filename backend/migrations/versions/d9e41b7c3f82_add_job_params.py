@@ -0,0 +1,26 @@
+"""add_job_params
+
+Revision ID: d9e41b7c3f82
+Revises: c5d2e8f17a40
+Create Date: 2026-10-17 14:02:11.418305
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd9e41b7c3f82'
+down_revision: Union[str, None] = 'c5d2e8f17a40'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('jobs', sa.Column('params', sa.JSON(), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column('jobs', 'params')
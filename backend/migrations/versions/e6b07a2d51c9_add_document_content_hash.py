@@ -0,0 +1,42 @@
+"""add_document_content_hash
+
+Revision ID: e6b07a2d51c9
+Revises: d9e41b7c3f82
+Create Date: 2026-10-17 15:20:47.662190
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e6b07a2d51c9'
+down_revision: Union[str, None] = 'd9e41b7c3f82'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # batch mode so SQLite (which cannot add constraints in place) works too
+    with op.batch_alter_table('documents') as batch:
+        batch.add_column(sa.Column('content_sha256', sa.String(length=64), nullable=True))
+        batch.add_column(sa.Column('duplicate_of_id', sa.Integer(), nullable=True))
+        batch.create_foreign_key('fk_documents_duplicate_of_id', 'documents', ['duplicate_of_id'], ['id'])
+        batch.create_index(batch.f('ix_documents_content_sha256'), ['content_sha256'], unique=False)
+        batch.create_index(batch.f('ix_documents_duplicate_of_id'), ['duplicate_of_id'], unique=False)
+        # Duplicates point at the original's MinIO object
+        batch.drop_index('ix_documents_s3_key')
+        batch.create_index(batch.f('ix_documents_s3_key'), ['s3_key'], unique=False)
+
+
+def downgrade() -> None:
+    with op.batch_alter_table('documents') as batch:
+        batch.drop_index(batch.f('ix_documents_s3_key'))
+        batch.create_index('ix_documents_s3_key', ['s3_key'], unique=True)
+        batch.drop_index(batch.f('ix_documents_duplicate_of_id'))
+        batch.drop_index(batch.f('ix_documents_content_sha256'))
+        batch.drop_constraint('fk_documents_duplicate_of_id', type_='foreignkey')
+        batch.drop_column('duplicate_of_id')
+        batch.drop_column('content_sha256')
@@ -0,0 +1,28 @@
+"""add_document_processing_stage
+
+Revision ID: f1c83e5a9b27
+Revises: e6b07a2d51c9
+Create Date: 2026-10-17 16:08:33.217640
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f1c83e5a9b27'
+down_revision: Union[str, None] = 'e6b07a2d51c9'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('documents', sa.Column('processing_stage', sa.String(), nullable=True))
+    # Documents processed before checkpoints existed are complete
+    op.execute("UPDATE documents SET processing_stage = 'extracted' WHERE status = 'COMPLETED'")
+
+
+def downgrade() -> None:
+    op.drop_column('documents', 'processing_stage')
@@ -2,20 +2,27 @@ from typing import Dict, Any, TypedDict, Optional, List
 import logging
 import json
 import os
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 
-from langchain_openai import ChatOpenAI
-from langchain_mistralai import ChatMistralAI
 from langchain.prompts import ChatPromptTemplate
 from langchain.output_parsers import PydanticOutputParser
+from langchain_core.runnables import RunnableConfig
 from langgraph.graph import StateGraph, END
 from sqlalchemy.orm import Session
 
 from shared.models import Document, Finding as DBFinding
+from shared.llm import llm_provider, provider_slot, get_llm, per_process
+from shared.parties import PartyIndex, normalize_party_name
+from shared.payment_terms import compare_payment_terms, comparison_stats
 from shared.schemas import Finding, FindingType, FindingSeverity, InvoiceSchema, ContractSchema
 
 logger = logging.getLogger(__name__)
 
+# Invoices compared at once in run_batch; LLM calls are further capped per
+# provider by shared.llm.provider_slot
+RECONCILE_CONCURRENCY = int(os.getenv("RECONCILE_CONCURRENCY", 8))
+
 class ComparisonState(TypedDict):
     invoice_id: int
     invoice_data: Dict[str, Any]
@@ -24,20 +31,16 @@ class ComparisonState(TypedDict):
     findings: List[Finding]
 
 class ComparisonGraph:
-    def __init__(self, db: Session):
-        self.db = db
-        self.openai_key = os.getenv("OPENAI_API_KEY")
-        self.mistral_key = os.getenv("MISTRAL_API_KEY")
-        
-        if self.mistral_key:
-            self.llm = ChatMistralAI(model="mistral-small-latest", temperature=0)
-        elif self.openai_key:
-            self.llm = ChatOpenAI(model="gpt-3.5-turbo", temperature=0)
-        else:
-            self.llm = None
-
-    def retrieve_contract(self, state: ComparisonState):
+    # Shared per process through get_comparison_graph(). The DB session is
+    # per run: it reaches the nodes through the run config, not self.
+    def __init__(self):
+        self.provider = llm_provider()
+        self.llm = get_llm()
+        self.app = self.build_graph()
+
+    def retrieve_contract(self, state: ComparisonState, config: RunnableConfig):
         logger.info("Node: Retrieve Contract")
+        db = config["configurable"]["db"]
         invoice_data = state["invoice_data"]
         vendor_name = invoice_data.get("vendor_name", {}).get("value")
         
@@ -45,26 +48,14 @@ class ComparisonGraph:
             logger.warning("No vendor name in invoice data")
             return {"contract_id": None}
 
-        # Naive Search: Find any contract where party_b (Vendor) roughly matches vendor_name
-        # In prod, use Vector Search or specific metadata columns
-        # Fetch all contracts
-        contracts = self.db.query(Document).filter(
-            Document.extraction_result.isnot(None)
-            # In a real system we would filter by doc_type inside JSON, but specific SQL required for that
-        ).all()
-        
+        # Indexed lookup over normalised party names (populated by the worker at
+        # extraction time) instead of scanning every extracted document
+        match = PartyIndex.find_contract(db, vendor_name)
         best_match = None
-        for doc in contracts:
-            if not doc.extraction_result or doc.extraction_result.get("doc_type") != "contract":
-                continue
-            
-            data = doc.extraction_result.get("data", {})
-            party_a = data.get("party_a", {}).get("value", "")
-            party_b = data.get("party_b", {}).get("value", "")
-            
-            if (vendor_name.lower() in party_a.lower()) or (vendor_name.lower() in party_b.lower()):
-                best_match = doc
-                break
+        if match:
+            contract_id, score = match
+            logger.info(f"Party index match for '{vendor_name}': contract {contract_id} (score {score:.2f})")
+            best_match = db.query(Document).filter(Document.id == contract_id).first()
         
         if best_match:
             logger.info(f"Found related contract: {best_match.id}")
@@ -115,7 +106,31 @@ class ComparisonGraph:
         # Use LLM to compare if we have data
         inv_terms_val = state["invoice_data"].get("payment_terms", {}).get("value")
         
-        if inv_terms_val and count_terms_val and self.llm:
+        # Deterministic fast path: most term pairs ("Net 30" vs "within thirty
+        # (30) days") parse into structured terms and can be decided locally.
+        # Unparseable pairs, and pairs where only one side offers an early
+        # payment discount, go to the LLM.
+        verdict = None
+        if inv_terms_val and count_terms_val:
+            verdict = compare_payment_terms(inv_terms_val, count_terms_val)
+
+        if verdict is not None:
+            comparison_stats.record("rules")
+            consistent, explanation = verdict
+            if not consistent:
+                findings.append(Finding(
+                    finding_type=FindingType.TERM_MISMATCH,
+                    severity=FindingSeverity.HIGH,
+                    description=f"Invoice terms '{inv_terms_val}' conflict with Contract '{count_terms_val}'. {explanation}",
+                    evidence={
+                        "invoice_evidence": state["invoice_data"].get("payment_terms"),
+                        "contract_evidence": cont_terms_node,
+                        "resolved_by": "rules"
+                    }
+                ))
+
+        elif inv_terms_val and count_terms_val and self.llm:
+            comparison_stats.record("llm")
             prompt = ChatPromptTemplate.from_template(
                 """Compare the following payment terms. Are they consistent?
                 If no, explain why briefly.
@@ -126,7 +141,8 @@ class ComparisonGraph:
                 Return JSON: {{"consistent": bool, "explanation": str}}"""
             )
             chain = prompt | self.llm
-            res = chain.invoke({"inv_terms": inv_terms_val, "cont_terms": count_terms_val})
+            with provider_slot(self.provider):
+                res = chain.invoke({"inv_terms": inv_terms_val, "cont_terms": count_terms_val})
             try:
                 # Naive parse
                 content = res.content.replace("```json", "").replace("```", "")
@@ -138,13 +154,15 @@ class ComparisonGraph:
                         description=f"Invoice terms '{inv_terms_val}' conflict with Contract '{count_terms_val}'. {parsed['explanation']}",
                         evidence={
                             "invoice_evidence": state["invoice_data"].get("payment_terms"),
-                            "contract_evidence": cont_terms_node
+                            "contract_evidence": cont_terms_node,
+                            "resolved_by": "llm"
                         }
                     ))
             except Exception as e:
                 logger.error(f"Comparison LLM failed: {e}")
 
         elif not self.llm and inv_terms_val and count_terms_val:
+            comparison_stats.record("fallback")
             # Fallback for Mock Mode / No-LLM
             # Simple string equality or containment check
             # Normalize strings roughly
@@ -175,9 +193,9 @@ class ComparisonGraph:
         
         return workflow.compile()
 
-    def run(self, invoice_id: int):
+    def run(self, db: Session, invoice_id: int):
         # Fetch Invoice Data
-        doc = self.db.query(Document).filter(Document.id == invoice_id).first()
+        doc = db.query(Document).filter(Document.id == invoice_id).first()
         if not doc or not doc.extraction_result:
             raise ValueError("Invoice not found or not extracted")
             
@@ -189,6 +207,71 @@ class ComparisonGraph:
             "findings": []
         }
         
-        app = self.build_graph()
-        result = app.invoke(initial_state)
+        result = self.app.invoke(initial_state, config={"configurable": {"db": db}})
         return result["findings"]
+
+    def run_batch(self, db: Session, invoice_ids: List[int]) -> List[Dict[str, Any]]:
+        """Reconcile many invoices in one pass. Each distinct vendor is resolved
+        and its contract loaded once; comparisons then run concurrently (the
+        compare node only reads its state, so it never touches the session).
+        Returns one entry per invoice id, in input order."""
+        docs = {d.id: d for d in db.query(Document).filter(Document.id.in_(invoice_ids)).all()}
+
+        outcomes = {}
+        states = []
+        contract_for_vendor = {}
+        for invoice_id in invoice_ids:
+            doc = docs.get(invoice_id)
+            if not doc or not doc.extraction_result:
+                outcomes[invoice_id] = {"status": "skipped", "reason": "not found or not extracted"}
+                continue
+            if doc.doc_type != "invoice":
+                outcomes[invoice_id] = {"status": "skipped", "reason": "not an invoice"}
+                continue
+
+            invoice_data = doc.extraction_result.get("data", {})
+            vendor_name = (invoice_data.get("vendor_name") or {}).get("value")
+            vendor_key = normalize_party_name(vendor_name)
+            if vendor_name and vendor_key not in contract_for_vendor:
+                match = PartyIndex.find_contract(db, vendor_name)
+                contract_for_vendor[vendor_key] = match[0] if match else None
+            states.append({
+                "invoice_id": invoice_id,
+                "invoice_data": invoice_data,
+                "contract_id": contract_for_vendor.get(vendor_key) if vendor_name else None,
+                "contract_data": None,
+                "findings": []
+            })
+
+        contract_ids = {s["contract_id"] for s in states if s["contract_id"]}
+        contracts = {}
+        if contract_ids:
+            for contract in db.query(Document).filter(Document.id.in_(contract_ids)).all():
+                contracts[contract.id] = (contract.extraction_result or {}).get("data") or {}
+        for state in states:
+            if state["contract_id"] not in contracts:
+                state["contract_id"] = None
+            else:
+                state["contract_data"] = contracts[state["contract_id"]]
+
+        logger.info(f"Reconciling {len(states)} invoices against {len(contracts)} contracts")
+
+        def compare(state):
+            try:
+                return self.compare_terms(state)["findings"], None
+            except Exception as e:
+                logger.error(f"Reconciliation failed for invoice {state['invoice_id']}: {e}")
+                return [], str(e)
+
+        with ThreadPoolExecutor(max_workers=max(1, RECONCILE_CONCURRENCY)) as pool:
+            for state, (findings, error) in zip(states, pool.map(compare, states)):
+                outcomes[state["invoice_id"]] = {
+                    "status": "failed" if error else "compared",
+                    "contract_id": state["contract_id"],
+                    "findings": findings,
+                    "error": error,
+                }
+
+        return [{"invoice_id": invoice_id, **outcomes[invoice_id]} for invoice_id in invoice_ids]
+
+get_comparison_graph = per_process(ComparisonGraph)
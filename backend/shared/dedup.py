@@ -0,0 +1,86 @@
+import logging
+from typing import Dict, Iterable
+
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from shared.models import Document, DocumentStatus
+from shared.parties import PartyIndex
+from shared.document_fields import apply_document_fields
+
+logger = logging.getLogger(__name__)
+
+
+class DocumentDedup:
+    """Exact-duplicate uploads (same SHA-256) reuse the original's MinIO object,
+    pages, chunks and extraction result instead of being processed again."""
+
+    @staticmethod
+    def find_originals(db: Session, hashes: Iterable[str]) -> Dict[str, Document]:
+        # Earliest non-failed, non-duplicate document for each hash
+        hashes = [h for h in set(hashes) if h]
+        if not hashes:
+            return {}
+        originals = {}
+        rows = db.query(Document).filter(
+            Document.content_sha256.in_(hashes),
+            Document.duplicate_of_id.is_(None),
+            Document.status != DocumentStatus.FAILED
+        ).order_by(Document.id)
+        for doc in rows:
+            originals.setdefault(doc.content_sha256, doc)
+        return originals
+
+    @staticmethod
+    def link(db: Session, doc: Document, original: Document):
+        doc.duplicate_of_id = original.id
+        doc.s3_key = original.s3_key
+        if original.status == DocumentStatus.COMPLETED:
+            DocumentDedup._copy_result(db, doc, original)
+        # Otherwise the worker fills it in when the original finishes (propagate)
+        # Sessions do not autoflush; callers query the link right away
+        db.flush()
+
+    @staticmethod
+    def propagate(db: Session, original: Document):
+        # Called by the worker once the original is COMPLETED or FAILED
+        waiting = db.query(Document).filter(
+            Document.duplicate_of_id == original.id,
+            Document.status.in_([DocumentStatus.PENDING, DocumentStatus.PROCESSING])
+        ).all()
+        for doc in waiting:
+            if original.status == DocumentStatus.COMPLETED:
+                DocumentDedup._copy_result(db, doc, original)
+            else:
+                doc.status = DocumentStatus.FAILED
+        if waiting:
+            logger.info(f"Updated {len(waiting)} duplicates of document {original.id} ({original.status})")
+
+    @staticmethod
+    def _copy_result(db: Session, doc: Document, original: Document):
+        doc.extraction_result = original.extraction_result
+        apply_document_fields(doc)
+        doc.status = DocumentStatus.COMPLETED
+        if doc.id is None:
+            db.flush()
+        PartyIndex.index_contract(db, doc.id, doc.extraction_result)
+
+    @staticmethod
+    def content_id(db: Session, doc_id: int) -> int:
+        # Id under which a document's pages and chunks are stored
+        row = db.query(Document.duplicate_of_id).filter(Document.id == doc_id).first()
+        return row.duplicate_of_id if row and row.duplicate_of_id else doc_id
+
+    @staticmethod
+    def stats(db: Session):
+        total, duplicates, hashed = db.query(
+            func.count(Document.id),
+            func.count(Document.duplicate_of_id),
+            func.count(Document.content_sha256)
+        ).one()
+        return {
+            "documents": total,
+            "hashed": hashed,
+            "duplicates": duplicates,
+            "hit_rate": round(duplicates / hashed, 4) if hashed else 0.0,
+        }
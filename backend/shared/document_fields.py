@@ -0,0 +1,105 @@
+import re
+import logging
+from datetime import date, datetime
+from typing import Any, Dict, Optional
+
+from shared.models import Document
+from shared.parties import normalize_party_name
+
+logger = logging.getLogger(__name__)
+
+_DATE_FORMATS = (
+    "%Y-%m-%d", "%Y/%m/%d", "%m/%d/%Y", "%d.%m.%Y",
+    "%B %d, %Y", "%b %d, %Y", "%d %B %Y", "%d %b %Y",
+)
+_AMOUNT = re.compile(r"-?\d[\d,]*(?:\.\d+)?")
+_CURRENCY_SYMBOLS = {"$": "USD", "€": "EUR", "£": "GBP", "¥": "JPY"}
+
+
+def _value(data: Dict[str, Any], key: str):
+    # Extraction results wrap each field as {"value": ..., "evidence": ...}
+    value = data.get(key)
+    if isinstance(value, dict):
+        return value.get("value")
+    return value
+
+
+def parse_date(value: Any) -> Optional[date]:
+    if not value:
+        return None
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    text = str(value).strip()
+    try:
+        return datetime.fromisoformat(text[:10]).date()
+    except ValueError:
+        pass
+    for fmt in _DATE_FORMATS:
+        try:
+            return datetime.strptime(text, fmt).date()
+        except ValueError:
+            continue
+    return None
+
+
+def parse_amount(value: Any) -> Optional[float]:
+    # 1000.0, "1,000.00", "$1,000" -> 1000.0
+    if value is None or isinstance(value, bool):
+        return None
+    if isinstance(value, (int, float)):
+        return float(value)
+    match = _AMOUNT.search(str(value))
+    return float(match.group(0).replace(",", "")) if match else None
+
+
+def parse_currency(value: Any) -> Optional[str]:
+    if not value:
+        return None
+    text = str(value).strip()
+    if text in _CURRENCY_SYMBOLS:
+        return _CURRENCY_SYMBOLS[text]
+    return text.upper()[:3] if len(text) >= 3 and text[:3].isalpha() else None
+
+
+def document_fields(extraction_result: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    """Typed columns derived from an extraction result. Contract parties are
+    indexed separately (shared.parties.PartyIndex)."""
+    fields = {
+        "doc_type": None, "vendor_name": None, "vendor_normalized": None,
+        "total_amount": None, "currency": None, "document_date": None,
+    }
+    if not extraction_result:
+        return fields
+    doc_type = extraction_result.get("doc_type")
+    data = extraction_result.get("data") or {}
+    fields["doc_type"] = doc_type
+    if doc_type == "invoice":
+        vendor = _value(data, "vendor_name")
+        fields["vendor_name"] = str(vendor) if vendor else None
+        fields["vendor_normalized"] = normalize_party_name(vendor) or None
+        fields["total_amount"] = parse_amount(_value(data, "total_amount"))
+        fields["currency"] = parse_currency(_value(data, "currency"))
+        if fields["total_amount"] is not None and not fields["currency"]:
+            fields["currency"] = "USD"  # InvoiceSchema default
+        fields["document_date"] = parse_date(_value(data, "invoice_date"))
+    elif doc_type == "contract":
+        fields["document_date"] = parse_date(_value(data, "effective_date"))
+    return fields
+
+
+def apply_document_fields(doc: Document):
+    # Called whenever doc.extraction_result is (re)written
+    for column, value in document_fields(doc.extraction_result).items():
+        setattr(doc, column, value)
+
+
+def fields_to_dict(doc: Document) -> Dict[str, Any]:
+    return {
+        "doc_type": doc.doc_type,
+        "vendor_name": doc.vendor_name,
+        "total_amount": doc.total_amount,
+        "currency": doc.currency,
+        "document_date": doc.document_date,
+    }
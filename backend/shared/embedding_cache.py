@@ -0,0 +1,230 @@
+import os
+import re
+import time
+import sqlite3
+import hashlib
+import logging
+import threading
+import unicodedata
+from abc import ABC, abstractmethod
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from shared.redis_counters import RedisCounters
+
+logger = logging.getLogger(__name__)
+
+EMBEDDING_CACHE_BACKEND = os.getenv("EMBEDDING_CACHE", "sqlite")  # sqlite | redis | off
+EMBEDDING_CACHE_PATH = os.getenv("EMBEDDING_CACHE_PATH", "/tmp/embedding_cache.sqlite3")
+EMBEDDING_CACHE_MAX_ENTRIES = int(os.getenv("EMBEDDING_CACHE_MAX_ENTRIES", 500_000))
+# The SQLite cache keeps a running row count per connection and recounts the
+# table only every this many writes (to pick up other processes' inserts)
+EMBEDDING_CACHE_RECOUNT_WRITES = 1000
+EMBEDDING_CACHE_STATS_PREFIX = "embedding_cache_stats"
+
+_WHITESPACE = re.compile(r"\s+")
+
+
+def normalize_text(text: str) -> str:
+    # Same clause extracted from two PDFs often differs only in ligatures,
+    # non-breaking spaces and line wrapping
+    text = unicodedata.normalize("NFKC", text)
+    return _WHITESPACE.sub(" ", text).strip()
+
+
+class EmbeddingCacheStats:
+    """Per-model hit/miss counters summed over every process, whatever the
+    backend (the SQLite cache is per container). Buffered through
+    RedisCounters, so recording never waits on Redis."""
+
+    def __init__(self, redis_url: Optional[str] = None):
+        self.counters = RedisCounters(redis_url)
+
+    def record(self, model_id: str, hits: int, misses: int, encode_seconds: float):
+        self.counters.incr(f"{EMBEDDING_CACHE_STATS_PREFIX}:{model_id}",
+                           hits=hits, misses=misses, encode_seconds=float(encode_seconds))
+
+    def snapshot(self, model_id: str) -> Dict[str, object]:
+        totals = {"hits": 0, "misses": 0, "encode_seconds": 0.0}
+        totals.update(self.counters.snapshot(f"{EMBEDDING_CACHE_STATS_PREFIX}:{model_id}"))
+        lookups = totals["hits"] + totals["misses"]
+        per_text = totals["encode_seconds"] / totals["misses"] if totals["misses"] else 0.0
+        return {
+            "hits": int(totals["hits"]),
+            "misses": int(totals["misses"]),
+            "hit_rate": round(totals["hits"] / lookups, 4) if lookups else 0.0,
+            # Estimated from the measured cost of the texts we did have to encode
+            "encode_seconds_saved": round(totals["hits"] * per_text, 3),
+        }
+
+
+embedding_cache_stats = EmbeddingCacheStats()
+
+
+class EmbeddingCache(ABC):
+    """Content-addressed store of float32 embeddings keyed by model + normalised text."""
+
+    def __init__(self, model_id: str, max_entries: int = EMBEDDING_CACHE_MAX_ENTRIES):
+        self.model_id = model_id
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self.encode_seconds = 0.0
+
+    def key(self, text: str) -> str:
+        payload = f"{self.model_id}\x00{normalize_text(text)}".encode("utf-8")
+        return hashlib.sha256(payload).hexdigest()
+
+    @abstractmethod
+    def get_many(self, keys: List[str]) -> Dict[str, np.ndarray]:
+        """Cached vectors for whichever of keys are present."""
+
+    @abstractmethod
+    def put_many(self, vectors: Dict[str, np.ndarray]):
+        """Store vectors by key, evicting the least recently used past max_entries."""
+
+    def record(self, hits: int, misses: int, encode_seconds: float):
+        self.hits += hits
+        self.misses += misses
+        self.encode_seconds += encode_seconds
+        embedding_cache_stats.record(self.model_id, hits, misses, encode_seconds)
+
+    def stats(self) -> Dict[str, object]:
+        # This process only; embedding_cache_stats has the totals per model
+        return {"backend": type(self).__name__, "model": self.model_id, "hits": self.hits, "misses": self.misses}
+
+
+class SQLiteEmbeddingCache(EmbeddingCache):
+    def __init__(self, model_id: str, path: str = EMBEDDING_CACHE_PATH, max_entries: int = EMBEDDING_CACHE_MAX_ENTRIES):
+        super().__init__(model_id, max_entries)
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = None
+        self._pid = None
+
+    def _connection(self) -> sqlite3.Connection:
+        # sqlite connections must not cross a fork
+        if self._conn is None or self._pid != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=30, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS embeddings ("
+                "key TEXT PRIMARY KEY, vector BLOB NOT NULL, last_access REAL NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS ix_embeddings_last_access ON embeddings (last_access)")
+            conn.commit()
+            self._conn = conn
+            self._pid = os.getpid()
+            # Counted once per connection, then kept from insert/delete rowcounts
+            self._rows = conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+            self._writes = 0
+        return self._conn
+
+    def get_many(self, keys: List[str]) -> Dict[str, np.ndarray]:
+        if not keys:
+            return {}
+        found = {}
+        with self._lock:
+            conn = self._connection()
+            # Stay well below SQLITE_MAX_VARIABLE_NUMBER
+            for i in range(0, len(keys), 500):
+                part = keys[i:i + 500]
+                placeholders = ",".join("?" * len(part))
+                rows = conn.execute(
+                    f"SELECT key, vector FROM embeddings WHERE key IN ({placeholders})", part
+                ).fetchall()
+                for key, blob in rows:
+                    found[key] = np.frombuffer(blob, dtype=np.float32)
+            if found:
+                now = time.time()
+                conn.executemany(
+                    "UPDATE embeddings SET last_access = ? WHERE key = ?",
+                    [(now, k) for k in found]
+                )
+                conn.commit()
+        return found
+
+    def put_many(self, vectors: Dict[str, np.ndarray]):
+        if not vectors:
+            return
+        now = time.time()
+        rows = [(np.asarray(v, dtype=np.float32).tobytes(), now, k) for k, v in vectors.items()]
+        with self._lock:
+            conn = self._connection()
+            # Insert new keys and update existing ones separately, so the
+            # insert's rowcount keeps the running count without a COUNT(*)
+            self._rows += conn.executemany(
+                "INSERT OR IGNORE INTO embeddings (vector, last_access, key) VALUES (?, ?, ?)", rows
+            ).rowcount
+            conn.executemany("UPDATE embeddings SET vector = ?, last_access = ? WHERE key = ?", rows)
+            self._writes += 1
+            if self._writes % EMBEDDING_CACHE_RECOUNT_WRITES == 0:
+                self._rows = conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+            if self._rows > self.max_entries:
+                # Least recently used first
+                evicted = conn.execute(
+                    "DELETE FROM embeddings WHERE key IN ("
+                    "SELECT key FROM embeddings ORDER BY last_access ASC LIMIT ?)",
+                    (self._rows - self.max_entries,)
+                ).rowcount
+                self._rows -= evicted
+            conn.commit()
+
+
+class RedisEmbeddingCache(EmbeddingCache):
+    """Shared cache for multi-host deployments. Recency is tracked in a sorted set."""
+
+    def __init__(self, model_id: str, url: Optional[str] = None, max_entries: int = EMBEDDING_CACHE_MAX_ENTRIES):
+        super().__init__(model_id, max_entries)
+        import redis
+        self.redis = redis.from_url(url or os.getenv("REDIS_URL", "redis://redis:6379/0"))
+        self.prefix = "emb"
+
+    def get_many(self, keys: List[str]) -> Dict[str, np.ndarray]:
+        if not keys:
+            return {}
+        blobs = self.redis.mget([f"{self.prefix}:{k}" for k in keys])
+        found = {k: np.frombuffer(b, dtype=np.float32) for k, b in zip(keys, blobs) if b is not None}
+        if found:
+            now = time.time()
+            self.redis.zadd(f"{self.prefix}:lru", {k: now for k in found})
+        return found
+
+    def put_many(self, vectors: Dict[str, np.ndarray]):
+        if not vectors:
+            return
+        now = time.time()
+        p = self.redis.pipeline()
+        p.mset({f"{self.prefix}:{k}": np.asarray(v, dtype=np.float32).tobytes() for k, v in vectors.items()})
+        p.zadd(f"{self.prefix}:lru", {k: now for k in vectors})
+        p.zcard(f"{self.prefix}:lru")
+        count = p.execute()[-1]
+        if count > self.max_entries:
+            evicted = self.redis.zpopmin(f"{self.prefix}:lru", count - self.max_entries)
+            if evicted:
+                self.redis.delete(*[f"{self.prefix}:{k.decode() if isinstance(k, bytes) else k}" for k, _ in evicted])
+
+
+_caches: Dict[str, EmbeddingCache] = {}
+_caches_lock = threading.Lock()
+
+
+def get_embedding_cache(model_id: str) -> Optional[EmbeddingCache]:
+    backend = EMBEDDING_CACHE_BACKEND.lower()
+    if backend in ("off", "none", ""):
+        return None
+    with _caches_lock:
+        cache = _caches.get(model_id)
+        if cache is None:
+            try:
+                if backend == "redis":
+                    cache = RedisEmbeddingCache(model_id)
+                else:
+                    cache = SQLiteEmbeddingCache(model_id)
+            except Exception as e:
+                logger.error(f"Embedding cache unavailable ({backend}): {e}")
+                return None
+            _caches[model_id] = cache
+    return cache
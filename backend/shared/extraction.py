@@ -1,19 +1,49 @@
 from typing import Dict, Any, TypedDict, Optional
 from enum import Enum
 import os
+import re
+import time
 import logging
 import json
 
-from langchain_openai import ChatOpenAI
-from langchain_mistralai import ChatMistralAI
 from langchain.prompts import ChatPromptTemplate
 from langchain.output_parsers import PydanticOutputParser
 from langgraph.graph import StateGraph, END
+from shared.llm import get_llm, per_process
 from shared.schemas import InvoiceSchema, ContractSchema, DocumentExtraction, ExtractedField
-from shared.ingestion import VectorService
+from shared.ingestion import get_vector_service
 
 logger = logging.getLogger(__name__)
 
+# Pages scanned for an exact match before falling back to vector search
+EVIDENCE_SCAN_PAGES = int(os.getenv("EVIDENCE_SCAN_PAGES", 10))
+
+_WHITESPACE = re.compile(r"\s+")
+
+def _normalize(text: str) -> str:
+    return _WHITESPACE.sub(" ", str(text)).strip().lower()
+
+def _value_variants(value):
+    # Extracted numbers come back as floats (1000.0) while the PDF says
+    # "1,000.00" or "$1,000"; try the common renderings
+    if isinstance(value, bool):
+        return []
+    if isinstance(value, (int, float)):
+        variants = [f"{value:,.2f}", f"{value:.2f}"]
+        if float(value).is_integer():
+            variants += [f"{int(value):,}", str(int(value))]
+        return [v for v in dict.fromkeys(variants) if len(v) >= 3]
+    text = _normalize(value)
+    # Very short strings ("30", "US") match almost anywhere
+    return [text] if len(text) >= 4 else []
+
+def _value_patterns(value):
+    # Whole matches only: a total of 100 must not match "1000" or "$2,100.00",
+    # nor a short code match inside a longer word
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return [re.compile(rf"(?<![\d.,]){re.escape(v)}(?!\d|[.,]\d)") for v in _value_variants(value)]
+    return [re.compile(rf"(?<!\w){re.escape(v)}(?!\w)") for v in _value_variants(value)]
+
 class DocumentType(str, Enum):
     INVOICE = "invoice"
     CONTRACT = "contract"
@@ -25,22 +55,16 @@ class GraphState(TypedDict):
     doc_type: Optional[str]
     extracted_data: Optional[Dict[str, Any]]
     final_output: Optional[Dict[str, Any]]
+    evidence_stats: Optional[Dict[str, Any]]
 
 class ExtractionGraph:
+    # Build through get_extraction_graph(): the LLM client, Qdrant client and
+    # compiled graph are then created once per process. Nodes keep no per-run
+    # state on self, so one instance serves concurrent runs.
     def __init__(self):
-        self.vector_service = VectorService()
-        self.openai_key = os.getenv("OPENAI_API_KEY")
-        self.mistral_key = os.getenv("MISTRAL_API_KEY")
-        
-        if self.mistral_key:
-            logger.info("Using Mistral AI")
-            self.llm = ChatMistralAI(model="mistral-small-latest", temperature=0)
-        elif self.openai_key:
-            logger.info("Using OpenAI")
-            self.llm = ChatOpenAI(model="gpt-3.5-turbo", temperature=0)
-        else:
-            logger.warning("No API Key found. Using Mock Mode.")
-            self.llm = None # Mock mode
+        self.vector_service = get_vector_service()
+        self.llm = get_llm()
+        self.app = self.build_graph()
 
     def classify_document(self, state: GraphState):
         logger.info("Node: Classify Document")
@@ -120,42 +144,72 @@ class ExtractionGraph:
 
     def link_evidence(self, state: GraphState):
         logger.info("Node: Link Evidence")
+        started = time.perf_counter()
         data = state["extracted_data"]
         doc_id = state["doc_id"]
         
         final_output = {}
+        to_search = []
+        stats = {"fields": 0, "exact_matches": 0, "vector_searches": 0, "vector_calls": 0}
+        
+        # Extraction only reads the start of the document, so the values we are
+        # linking appear in its first pages. A plain text match there is exact
+        # evidence and needs no vector search at all.
+        chunks = []
+        linkable = {k: v for k, v in data.items() if v and not isinstance(v, (list, dict))}
+        if linkable:
+            chunks = self.vector_service.scroll_document(doc_id, max_page=EVIDENCE_SCAN_PAGES)
+            chunks.sort(key=lambda p: (p.payload.get("page_number") or 0, str(p.id)))
+            stats["vector_calls"] += 1
+        normalized_chunks = [(p, _normalize(p.payload.get("text", ""))) for p in chunks]
         
         for key, value in data.items():
             # Skip empty or complex types for now simple linking
-            if not value or isinstance(value, (list, dict)):
+            if key not in linkable:
                 final_output[key] = {"value": value, "evidence": None}
                 continue
-                
-            # Search for value in chunks to find evidence
-            # This is a heuristic: query the vector DB with the value? 
-            # Or better: search for the key+value context.
-            # Simplified: Exact string match check in top chunks for the value
-            
-            # Use vector search to find context of this field
-            search_query = f"{key}: {value}"
-            results = self.vector_service.search(query=search_query, doc_id=doc_id, limit=1)
+            stats["fields"] += 1
             
             evidence = None
-            if results:
-                top_hit = results[0]
-                evidence = {
-                    "chunk_id": top_hit.id,
-                    "text": top_hit.payload.get("text"),
-                    "page_number": top_hit.payload.get("page_number"),
-                    "score": top_hit.score
-                }
-            
-            final_output[key] = {
-                "value": value,
-                "evidence": evidence
-            }
+            for pattern in _value_patterns(value):
+                hit = next((p for p, text in normalized_chunks if pattern.search(text)), None)
+                if hit is not None:
+                    evidence = {
+                        "chunk_id": hit.id,
+                        "text": hit.payload.get("text"),
+                        "page_number": hit.payload.get("page_number"),
+                        "score": 1.0,
+                        "match": "exact"
+                    }
+                    stats["exact_matches"] += 1
+                    break
             
-        return {"final_output": final_output}
+            if evidence is None:
+                to_search.append(key)
+            final_output[key] = {"value": value, "evidence": evidence}
+        
+        # Remaining fields: one batched encode + one Qdrant batch search for all
+        # of them, using the field context as the query.
+        if to_search:
+            queries = [f"{key}: {data[key]}" for key in to_search]
+            batch_results = self.vector_service.search_batch(queries, doc_id=doc_id, limit=1)
+            stats["vector_searches"] += len(queries)
+            stats["vector_calls"] += 1
+            for key, results in zip(to_search, batch_results):
+                if results:
+                    top_hit = results[0]
+                    final_output[key]["evidence"] = {
+                        "chunk_id": top_hit.id,
+                        "text": top_hit.payload.get("text"),
+                        "page_number": top_hit.payload.get("page_number"),
+                        "score": top_hit.score,
+                        "match": "vector"
+                    }
+        
+        # Timing goes to the log only; stats are persisted with the result
+        latency_ms = round((time.perf_counter() - started) * 1000, 1)
+        logger.info(f"Evidence linking for document {doc_id} took {latency_ms} ms: {stats}")
+        return {"final_output": final_output, "evidence_stats": stats}
 
     def build_graph(self):
         workflow = StateGraph(GraphState)
@@ -177,9 +231,11 @@ class ExtractionGraph:
         return workflow.compile()
 
     def run(self, doc_id: int, text: str):
-        app = self.build_graph()
-        result = app.invoke({"doc_id": doc_id, "doc_text": text, "doc_type": None, "extracted_data": None, "final_output": None})
+        result = self.app.invoke({"doc_id": doc_id, "doc_text": text, "doc_type": None, "extracted_data": None, "final_output": None, "evidence_stats": None})
         return {
             "doc_type": result.get("doc_type"),
-            "data": result.get("final_output") or result.get("extracted_data")
+            "data": result.get("final_output") or result.get("extracted_data"),
+            "evidence_stats": result.get("evidence_stats")
         }
+
+get_extraction_graph = per_process(ExtractionGraph)
@@ -1,15 +1,60 @@
 import pdfplumber
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Iterable, Iterator
 from dataclasses import dataclass
 import logging
-from sentence_transformers import SentenceTransformer
 from qdrant_client import QdrantClient
 from qdrant_client.http import models as qmodels
 import os
+import time
 import uuid
+import multiprocessing
+import threading
+from collections import deque
+from itertools import islice
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+
+from shared.model_registry import get_embedding_model, DEFAULT_EMBEDDING_MODEL
+from shared.embedding_cache import get_embedding_cache
+from shared.llm import per_process
 
 logger = logging.getLogger(__name__)
 
+# Embedding batch sizing. The batch is capped by count and by an approximate token
+# budget derived from available memory, so long chunks produce smaller batches.
+EMBEDDING_MAX_BATCH_SIZE = int(os.getenv("EMBEDDING_BATCH_SIZE", 64))
+EMBEDDING_MEMORY_FRACTION = float(os.getenv("EMBEDDING_MEMORY_FRACTION", 0.1))
+EMBEDDING_BYTES_PER_TOKEN = int(os.getenv("EMBEDDING_BYTES_PER_TOKEN", 32 * 1024))
+MAX_SEQ_TOKENS = 256  # all-MiniLM-L6-v2 truncates inputs at 256 word pieces
+
+# Page-parallel PDF parsing. Small documents are parsed serially since pool
+# dispatch costs more than it saves. The pool needs a non-daemon process:
+# Celery prefork children are daemons, so the worker that parses runs with
+# --pool=threads (docker-compose worker-embed).
+PDF_PARSE_WORKERS = int(os.getenv("PDF_PARSE_WORKERS", os.cpu_count() or 1))
+PDF_PARALLEL_MIN_PAGES = int(os.getenv("PDF_PARALLEL_MIN_PAGES", 32))
+PDF_MIN_PAGES_PER_RANGE = 8
+# Bump when parsing output changes so persisted page text is regenerated
+PARSER_VERSION = f"pdfplumber-{pdfplumber.__version__}/1"
+
+# Characters of page text loaded for ExtractionGraph / RiskAssessmentGraph.
+# The graphs themselves read at most the first 5k (extraction) and 8k (risk)
+# of it; the default leaves room for those limits to grow.
+EXTRACTION_CONTEXT_CHARS = int(os.getenv("EXTRACTION_CONTEXT_CHARS", 20000))
+
+def _estimate_tokens(text: str) -> int:
+    # ~4 characters per word piece for English contract text
+    return min(MAX_SEQ_TOKENS, len(text) // 4 + 1)
+
+def _available_memory_bytes():
+    try:
+        with open("/proc/meminfo") as f:
+            for line in f:
+                if line.startswith("MemAvailable:"):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    return None
+
 @dataclass
 class Page:
     page_number: int
@@ -23,24 +68,119 @@ class Chunk:
     page_number: int
     metadata: Dict[str, Any]
 
+def _page_text(page) -> str:
+    text = page.extract_text() or ""
+    # pdfplumber keeps each page's layout objects alive on the PDF handle;
+    # drop them so memory does not grow with the number of pages already read
+    page.flush_cache()
+    page.get_textmap.cache_clear()
+    return text
+
+def _parse_page_range(file_path: str, start: int, stop: int) -> List[Page]:
+    # Runs in a pool process; each worker opens its own handle on the file
+    with pdfplumber.open(file_path, pages=list(range(start + 1, stop + 1))) as pdf:
+        return [
+            Page(page_number=start + i + 1, text=_page_text(page))
+            for i, page in enumerate(pdf.pages)
+        ]
+
+_parse_pool = None
+_parse_pool_key = None
+_parse_pool_lock = threading.Lock()
+
+def _get_parse_pool(workers: int) -> ProcessPoolExecutor:
+    # Kept alive for the lifetime of the process so large documents do not pay
+    # pool start-up every time. "spawn" avoids forking a threaded API process.
+    # Shared by the worker's task threads.
+    global _parse_pool, _parse_pool_key
+    key = (os.getpid(), workers)
+    with _parse_pool_lock:
+        if _parse_pool is None or _parse_pool_key != key:
+            _parse_pool = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"))
+            _parse_pool_key = key
+        return _parse_pool
+
+def _reset_parse_pool():
+    global _parse_pool, _parse_pool_key
+    with _parse_pool_lock:
+        if _parse_pool is not None and _parse_pool_key[0] == os.getpid():
+            _parse_pool.shutdown(wait=False, cancel_futures=True)
+        _parse_pool = None
+        _parse_pool_key = None
+
 class ParsingService:
     @staticmethod
-    def parse_pdf(file_path: str) -> List[Page]:
-        pages = []
+    def parse_pdf(file_path: str, workers: int = None) -> List[Page]:
+        return list(ParsingService.iter_pages(file_path, workers=workers))
+
+    @staticmethod
+    def iter_pages(file_path: str, workers: int = None) -> Iterator[Page]:
+        # Yields pages in order as soon as they are parsed, so callers can start
+        # chunking/embedding before the whole document has been read.
+        workers = workers or PDF_PARSE_WORKERS
         try:
             with pdfplumber.open(file_path) as pdf:
-                for i, page in enumerate(pdf.pages):
-                    text = page.extract_text() or ""
-                    pages.append(Page(page_number=i+1, text=text))
-            return pages
+                page_count = len(pdf.pages)
+                parallel = workers > 1 and page_count >= PDF_PARALLEL_MIN_PAGES
+                if parallel and multiprocessing.current_process().daemon:
+                    logger.warning(f"Parsing {file_path} serially: daemon processes (Celery prefork children) "
+                                   f"cannot start the parse pool; run the worker with --pool=threads or solo")
+                    parallel = False
+                if not parallel:
+                    for i, page in enumerate(pdf.pages):
+                        yield Page(page_number=i+1, text=_page_text(page))
+                    return
         except Exception as e:
             logger.error(f"Error parsing PDF {file_path}: {e}")
             raise
 
+        yielded = 0
+        try:
+            for page in ParsingService._iter_parallel(file_path, page_count, workers):
+                yield page
+                yielded += 1
+        except Exception as e:
+            logger.warning(f"Parallel parsing failed for {file_path}, falling back to serial: {e}")
+            _reset_parse_pool()
+            # Resume after the last page we handed out
+            for page in _parse_page_range(file_path, yielded, page_count):
+                yield page
+
+    @staticmethod
+    def _iter_parallel(file_path: str, page_count: int, workers: int) -> Iterator[Page]:
+        # Several ranges per worker so one slow (scanned / table heavy) range
+        # does not leave the other workers idle. Only ~2 ranges per worker are in
+        # flight, so parsed text cannot pile up ahead of a slower consumer.
+        range_size = max(PDF_MIN_PAGES_PER_RANGE, -(-page_count // (workers * 4)))
+        ranges = iter([(start, min(start + range_size, page_count)) for start in range(0, page_count, range_size)])
+        pool = _get_parse_pool(workers)
+        pending = deque(pool.submit(_parse_page_range, file_path, start, stop) for start, stop in islice(ranges, workers * 2))
+        try:
+            while pending:
+                part = pending.popleft().result()
+                following = next(ranges, None)
+                if following is not None:
+                    pending.append(pool.submit(_parse_page_range, file_path, *following))
+                yield from part
+        finally:
+            for future in pending:
+                future.cancel()
+
+# Fixed namespace: the same (doc, page, offset) always maps to the same point,
+# so re-embedding a document overwrites its chunks instead of duplicating them
+CHUNK_ID_NAMESPACE = uuid.UUID("2b05aa32-7460-4bdd-81ed-edb7b63f21b2")
+
+def chunk_point_id(doc_id: int, page_number: int, offset: int) -> str:
+    return str(uuid.uuid5(CHUNK_ID_NAMESPACE, f"{doc_id}:{page_number}:{offset}"))
+
 class ChunkingService:
     @staticmethod
     def chunk_document(doc_id: int, pages: List[Page], chunk_size: int = 500, overlap: int = 50) -> List[Chunk]:
-        chunks = []
+        return list(ChunkingService.iter_chunks(doc_id, pages, chunk_size=chunk_size, overlap=overlap))
+
+    @staticmethod
+    def iter_chunks(doc_id: int, pages: Iterable[Page], chunk_size: int = 500, overlap: int = 50, metadata: Dict[str, Any] = None) -> Iterator[Chunk]:
+        metadata = metadata or {"filename": "TODO", "type": "text"}
         for page in pages:
             text = page.text
             # Simple sliding window chunking per page for now
@@ -61,14 +201,14 @@ class ChunkingService:
                         end = start + last_space
                         chunk_text = text[start:end]
                 
-                chunk_id = str(uuid.uuid4())
-                chunks.append(Chunk(
+                chunk_id = chunk_point_id(doc_id, page.page_number, start)
+                yield Chunk(
                     id=chunk_id,
                     doc_id=doc_id,
                     text=chunk_text,
                     page_number=page.page_number,
-                    metadata={"filename": "TODO", "type": "text"} 
-                ))
+                    metadata=dict(metadata)
+                )
                 
                 # Ensure we advance, preventing infinite loop if chunk is small
                 stride = len(chunk_text) - overlap
@@ -79,21 +219,27 @@ class ChunkingService:
                 
                 if start >= len(text):
                     break
-        return chunks
 
 class VectorService:
-    def __init__(self, collection_name: str = "contract_chunks"):
-        # Models are downloaded to /root/.cache/torch/sentence_transformers
-        # Should be cached in docker volume ideally, but okay for MVP
-        self.model = SentenceTransformer('all-MiniLM-L6-v2')
+    def __init__(self, collection_name: str = "contract_chunks", model_name: str = DEFAULT_EMBEDDING_MODEL, client: QdrantClient = None):
+        # The model itself lives in the process-wide registry, so constructing a
+        # VectorService is cheap and every instance shares one loaded copy.
+        self.model_name = model_name
+        self.cache = get_embedding_cache(model_name)
         
-        qdrant_host = os.getenv("QDRANT_HOST", "qdrant")
-        qdrant_port = int(os.getenv("QDRANT_PORT", 6333))
-        self.qdrant = QdrantClient(host=qdrant_host, port=qdrant_port)
+        if client is None:
+            qdrant_host = os.getenv("QDRANT_HOST", "qdrant")
+            qdrant_port = int(os.getenv("QDRANT_PORT", 6333))
+            client = QdrantClient(host=qdrant_host, port=qdrant_port)
+        self.qdrant = client
         self.collection_name = collection_name
         
         self._ensure_collection()
 
+    @property
+    def model(self):
+        return get_embedding_model(self.model_name)
+
     def _ensure_collection(self):
         try:
             self.qdrant.get_collection(self.collection_name)
@@ -113,63 +259,145 @@ class VectorService:
                 else:
                     raise e
 
-    def upsert_chunks(self, chunks: List[Chunk]):
-        if not chunks:
-            return
-            
-        logger.info(f"Upserting {len(chunks)} chunks...")
-        batch_size = 4 # Small batch size to prevent OOM / debug progress
-        
-        for i in range(0, len(chunks), batch_size):
-            batch = chunks[i:i+batch_size]
-            texts = [c.text for c in batch]
-            
-            logger.info(f"Encoding batch {i} to {i+len(batch)}...")
+    def _encode(self, texts: List[str]):
+        # Serve repeated text (re-uploads, shared MSA boilerplate, repeated
+        # queries) from the embedding cache and only encode what is missing.
+        if self.cache is None:
+            return self.model.encode(texts, batch_size=len(texts))
+
+        keys = [self.cache.key(t) for t in texts]
+        try:
+            cached = self.cache.get_many(list(set(keys)))
+        except Exception as e:
+            logger.warning(f"Embedding cache lookup failed: {e}")
+            cached = {}
+        missing = {}
+        for key, text in zip(keys, texts):
+            if key not in cached and key not in missing:
+                missing[key] = text
+
+        encode_seconds = 0.0
+        if missing:
+            start = time.perf_counter()
+            encoded = self.model.encode(list(missing.values()), batch_size=len(missing))
+            encode_seconds = time.perf_counter() - start
+            fresh = dict(zip(missing.keys(), encoded))
             try:
-                embeddings = self.model.encode(texts)
-                logger.info(f"Encoded batch {i}.")
+                self.cache.put_many(fresh)
             except Exception as e:
-                logger.error(f"Encoding failed: {e}")
-                raise e
-            
-            points = []
-            for j, chunk in enumerate(batch):
-                points.append(qmodels.PointStruct(
-                    id=chunk.id,
-                    vector=embeddings[j].tolist(),
-                    payload={
-                        "text": chunk.text,
-                        "doc_id": chunk.doc_id,
-                        "page_number": chunk.page_number,
-                        **chunk.metadata
-                    }
-                ))
-            
-            logger.info(f"Pushing batch {i} to Qdrant...")
-            try:
-                self.qdrant.upsert(
-                    collection_name=self.collection_name,
-                    points=points
+                logger.warning(f"Embedding cache write failed: {e}")
+            cached.update(fresh)
+
+        self.cache.record(hits=len(texts) - len(missing), misses=len(missing), encode_seconds=encode_seconds)
+        return [cached[k] for k in keys]
+
+    def _token_budget(self) -> int:
+        # How many (approximate) tokens we allow in flight per encode call.
+        # Activation memory grows with batch_size * sequence length, so size the
+        # batch from the memory we can actually spare rather than a fixed count.
+        available = _available_memory_bytes()
+        if available is None:
+            return EMBEDDING_MAX_BATCH_SIZE * MAX_SEQ_TOKENS
+        budget = int(available * EMBEDDING_MEMORY_FRACTION / EMBEDDING_BYTES_PER_TOKEN)
+        return max(MAX_SEQ_TOKENS, budget)
+
+    def _iter_batches(self, chunks: Iterable[Chunk]):
+        token_budget = self._token_budget()
+        batch, batch_tokens = [], 0
+        for chunk in chunks:
+            tokens = _estimate_tokens(chunk.text)
+            if batch and (len(batch) >= EMBEDDING_MAX_BATCH_SIZE or batch_tokens + tokens > token_budget):
+                yield batch
+                batch, batch_tokens = [], 0
+            batch.append(chunk)
+            batch_tokens += tokens
+        if batch:
+            yield batch
+
+    def _to_points(self, batch: List[Chunk], embeddings) -> List[qmodels.PointStruct]:
+        return [
+            qmodels.PointStruct(
+                id=chunk.id,
+                vector=embeddings[j].tolist(),
+                payload={
+                    "text": chunk.text,
+                    "doc_id": chunk.doc_id,
+                    "page_number": chunk.page_number,
+                    **chunk.metadata
+                }
+            )
+            for j, chunk in enumerate(batch)
+        ]
+
+    def _push(self, points: List[qmodels.PointStruct]):
+        try:
+            self.qdrant.upsert(
+                collection_name=self.collection_name,
+                points=points
+            )
+        except Exception as e:
+            logger.error(f"Qdrant push failed: {e}")
+            raise e
+
+    def upsert_chunks(self, chunks: Iterable[Chunk]) -> int:
+        # Accepts a list or a lazy iterator (see ChunkingService.iter_chunks);
+        # only the current batch and one in-flight upsert are held in memory.
+        logger.info("Upserting chunks...")
+        
+        # Encoding runs on this thread while the previous batch's upsert is in
+        # flight on a single background thread. At most one upsert is pending, so
+        # memory stays bounded to ~2 batches of vectors.
+        total = 0
+        pending = None
+        with ThreadPoolExecutor(max_workers=1, thread_name_prefix="qdrant-upsert") as pusher:
+            for batch in self._iter_batches(chunks):
+                texts = [c.text for c in batch]
+                try:
+                    embeddings = self._encode(texts)
+                except Exception as e:
+                    logger.error(f"Encoding failed: {e}")
+                    raise e
+
+                if pending is not None:
+                    pending.result()
+                pending = pusher.submit(self._push, self._to_points(batch, embeddings))
+                total += len(batch)
+                logger.debug(f"Encoded batch of {len(batch)} ({total} so far)")
+
+            if pending is not None:
+                pending.result()
+
+        logger.info(f"Upserted all {total} chunks.")
+        if self.cache is not None:
+            logger.info(f"Embedding cache: {self.cache.hits} hits / {self.cache.misses} misses this process")
+        return total
+
+    @staticmethod
+    def _doc_filter(doc_id: int = None):
+        if not doc_id:
+            return None
+        return qmodels.Filter(
+            must=[
+                qmodels.FieldCondition(
+                    key="doc_id",
+                    match=qmodels.MatchValue(value=doc_id)
                 )
-            except Exception as e:
-                logger.error(f"Qdrant push failed: {e}")
-                raise e
+            ]
+        )
 
-        logger.info(f"Upserted all {len(chunks)} chunks.")
+    def delete_document(self, doc_id: int):
+        # Drops every chunk of the document (e.g. legacy random-id chunks
+        # before a full re-run)
+        self.qdrant.delete(
+            collection_name=self.collection_name,
+            points_selector=qmodels.FilterSelector(filter=self._doc_filter(doc_id)),
+            wait=True
+        )
 
     def search(self, query: str, limit: int = 5, doc_id: int = None):
-        query_vector = self.model.encode(query).tolist()
+        query_vector = self._encode([query])[0].tolist()
         
-        query_filter = None
-        if doc_id:
-            query_filter = qmodels.Filter(
-                must=[
-                    qmodels.FieldCondition(
-                        key="doc_id",
-                        match=qmodels.MatchValue(value=doc_id)
-                    )
-                ]
-            )
+        query_filter = self._doc_filter(doc_id)
 
         results = self.qdrant.search(
             collection_name=self.collection_name,
@@ -178,3 +406,43 @@ class VectorService:
             limit=limit
         )
         return results
+
+    def search_batch(self, queries: List[str], limit: int = 5, doc_id: int = None):
+        # One encode call and one Qdrant round-trip for all queries
+        if not queries:
+            return []
+        vectors = self._encode(queries)
+        query_filter = self._doc_filter(doc_id)
+        return self.qdrant.search_batch(
+            collection_name=self.collection_name,
+            requests=[
+                qmodels.SearchRequest(vector=v.tolist(), filter=query_filter, limit=limit, with_payload=True)
+                for v in vectors
+            ]
+        )
+
+    def scroll_document(self, doc_id: int, max_page: int = None, limit: int = 1000):
+        # Payload-only read of a document's chunks (no vectors, no scoring)
+        conditions = [qmodels.FieldCondition(key="doc_id", match=qmodels.MatchValue(value=doc_id))]
+        if max_page is not None:
+            conditions.append(qmodels.FieldCondition(key="page_number", range=qmodels.Range(lte=max_page)))
+        points, _ = self.qdrant.scroll(
+            collection_name=self.collection_name,
+            scroll_filter=qmodels.Filter(must=conditions),
+            limit=limit,
+            with_payload=True,
+            with_vectors=False
+        )
+        return points
+
+@per_process
+def _vector_services() -> Dict[str, "VectorService"]:
+    return {}
+
+def get_vector_service(collection_name: str = "contract_chunks") -> VectorService:
+    # One VectorService (and Qdrant HTTP client) per collection per process
+    services = _vector_services()
+    service = services.get(collection_name)
+    if service is None:
+        service = services.setdefault(collection_name, VectorService(collection_name=collection_name))
+    return service
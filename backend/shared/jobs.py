@@ -0,0 +1,113 @@
+import json
+import uuid
+import hashlib
+import logging
+from typing import Callable, Dict, Any, List, Optional, Tuple
+
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from shared.models import Document, Job, JobStatus
+from shared.ingestion import PARSER_VERSION
+
+logger = logging.getLogger(__name__)
+
+
+def document_version(doc: Document) -> str:
+    # Changes whenever the document is re-extracted or the parser changes, so a
+    # resubmission after reprocessing is a new job rather than a duplicate
+    digest = hashlib.sha1(
+        json.dumps(doc.extraction_result, sort_keys=True, default=str).encode("utf-8")
+    ).hexdigest()[:16]
+    return f"{PARSER_VERSION}:{digest}"
+
+
+def submit_job(db: Session, kind: str, doc: Document, force: bool = False) -> Tuple[Job, bool]:
+    """Return (job, created). An existing job for the same kind, document and
+    version is reused unless it failed or force is set."""
+    dedup_key = f"{kind}:{doc.id}:{document_version(doc)}"
+    return _submit(db, dedup_key, force, kind=kind, document_id=doc.id)
+
+
+def submit_batch_job(db: Session, kind: str, document_ids: List[int], force: bool = False) -> Tuple[Job, bool]:
+    # Batch jobs are keyed on the exact set of documents they cover and each
+    # one's version, so re-extracting any of them makes a new job
+    ids = sorted(set(document_ids))
+    docs = {d.id: d for d in db.query(Document).filter(Document.id.in_(ids)).all()}
+    versions = [f"{i}:{document_version(docs[i]) if i in docs else 'missing'}" for i in ids]
+    digest = hashlib.sha1(",".join(versions).encode("utf-8")).hexdigest()[:16]
+    return _submit(db, f"{kind}:batch:{digest}", force, kind=kind, params={"document_ids": ids})
+
+
+def submit_export_job(db: Session, params: Dict[str, Any], watermark: Dict[str, Any],
+                      force: bool = False) -> Tuple[Job, bool]:
+    # The same export (range, filter and format) is only built once per state
+    # of its data (shared.reports.export_watermark); new findings or review
+    # decisions in the range make it a new export
+    key = {"params": params, "watermark": watermark}
+    digest = hashlib.sha1(json.dumps(key, sort_keys=True, default=str).encode("utf-8")).hexdigest()[:16]
+    return _submit(db, f"report_export:{digest}", force, kind="report_export", params=params)
+
+
+def _submit(db: Session, dedup_key: str, force: bool, **fields) -> Tuple[Job, bool]:
+    existing = db.query(Job).filter(Job.dedup_key == dedup_key).first()
+    if existing is not None:
+        if not force and existing.status != JobStatus.FAILED:
+            return existing, False
+        # Keep the old job for history but free its key for the new run
+        existing.dedup_key = None
+        db.commit()
+
+    job = Job(id=str(uuid.uuid4()), dedup_key=dedup_key, status=JobStatus.PENDING, **fields)
+    db.add(job)
+    try:
+        db.commit()
+    except IntegrityError:
+        # A concurrent request inserted the same key first
+        db.rollback()
+        return db.query(Job).filter(Job.dedup_key == dedup_key).first(), False
+    return job, True
+
+
+def run_job(db: Session, job_id: str, fn: Callable[[Job], Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+    job = db.query(Job).filter(Job.id == job_id).first()
+    if job is None:
+        logger.warning(f"Job {job_id} not found")
+        return None
+    if job.status == JobStatus.COMPLETED:
+        return job.result
+
+    job.status = JobStatus.RUNNING
+    db.commit()
+    try:
+        result = fn(job)
+    except Exception as e:
+        logger.error(f"Job {job_id} ({job.kind}) failed: {e}")
+        db.rollback()
+        job.status = JobStatus.FAILED
+        job.error = str(e)
+        # Allow an immediate resubmission of the same document/version
+        job.dedup_key = None
+        db.commit()
+        raise
+
+    job.status = JobStatus.COMPLETED
+    job.result = result
+    job.error = None
+    db.commit()
+    return result
+
+
+def job_to_dict(job: Job) -> Dict[str, Any]:
+    return {
+        "job_id": job.id,
+        "kind": job.kind,
+        "document_id": job.document_id,
+        "params": job.params,
+        "status": job.status,
+        "result": job.result,
+        "error": job.error,
+        "created_at": job.created_at,
+        "updated_at": job.updated_at,
+        "status_url": f"/jobs/{job.id}",
+    }
@@ -0,0 +1,84 @@
+import os
+import logging
+import functools
+import threading
+from contextlib import contextmanager
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+# Upper bound on simultaneous in-flight requests per provider for this process,
+# shared by every graph, so fan-out inside one task cannot trip provider rate limits.
+LLM_MAX_CONCURRENCY = {
+    "mistral": int(os.getenv("LLM_MAX_CONCURRENCY_MISTRAL", os.getenv("LLM_MAX_CONCURRENCY", 4))),
+    "openai": int(os.getenv("LLM_MAX_CONCURRENCY_OPENAI", os.getenv("LLM_MAX_CONCURRENCY", 8))),
+}
+
+_semaphores = {}
+_semaphores_lock = threading.Lock()
+
+def llm_provider() -> Optional[str]:
+    # None when no provider key is set (mock mode)
+    if os.getenv("MISTRAL_API_KEY"):
+        return "mistral"
+    if os.getenv("OPENAI_API_KEY"):
+        return "openai"
+    return None
+
+@contextmanager
+def provider_slot(provider: Optional[str]):
+    if provider is None:
+        yield
+        return
+    with _semaphores_lock:
+        semaphore = _semaphores.get(provider)
+        if semaphore is None:
+            semaphore = threading.BoundedSemaphore(LLM_MAX_CONCURRENCY.get(provider, 4))
+            _semaphores[provider] = semaphore
+    with semaphore:
+        yield
+
+def per_process(factory):
+    """Memoise a zero-argument factory once per process. Objects holding HTTP
+    connection pools must not be shared across a fork, so a forked child
+    (Celery prefork) builds its own on first use."""
+    lock = threading.Lock()
+    cache = {}
+
+    @functools.wraps(factory)
+    def get():
+        pid = os.getpid()
+        if pid not in cache:
+            with lock:
+                if pid not in cache:
+                    cache.clear()
+                    cache[pid] = factory()
+        return cache[pid]
+
+    # A child forked while the lock was held would otherwise deadlock
+    def _reset_lock():
+        nonlocal lock
+        lock = threading.Lock()
+    os.register_at_fork(after_in_child=_reset_lock)
+    return get
+
+@per_process
+def get_llm():
+    # One chat client per process, shared by every graph and thread. Reusing it
+    # keeps the provider's HTTP connections alive between calls; httpx's default
+    # pool (20 keep-alive connections) covers LLM_MAX_CONCURRENCY.
+    provider = llm_provider()
+    if provider is None:
+        logger.warning("No API Key found. Using Mock Mode.")
+        return None
+    # Identical prompts (reprocessing, eval runs, repeated term pairs) are
+    # answered from the response cache instead of the provider
+    from shared.llm_cache import configure_llm_cache
+    configure_llm_cache()
+    if provider == "mistral":
+        from langchain_mistralai import ChatMistralAI
+        logger.info("Using Mistral AI")
+        return ChatMistralAI(model="mistral-small-latest", temperature=0)
+    from langchain_openai import ChatOpenAI
+    logger.info("Using OpenAI")
+    return ChatOpenAI(model="gpt-3.5-turbo", temperature=0)
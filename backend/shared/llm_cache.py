@@ -0,0 +1,241 @@
+import os
+import time
+import sqlite3
+import hashlib
+import logging
+import threading
+from abc import abstractmethod
+from typing import Any, Dict, Optional, Sequence
+
+from langchain_core.caches import BaseCache
+from langchain_core.globals import get_llm_cache, set_llm_cache
+from langchain_core.load import dumps, loads
+from langchain_core.outputs import Generation
+
+from shared.redis_counters import RedisCounters
+
+logger = logging.getLogger(__name__)
+
+LLM_CACHE_BACKEND = os.getenv("LLM_CACHE", "sqlite")  # sqlite | redis | off
+LLM_CACHE_PATH = os.getenv("LLM_CACHE_PATH", "/tmp/llm_cache.sqlite3")
+LLM_CACHE_TTL_SECONDS = int(os.getenv("LLM_CACHE_TTL_SECONDS", 7 * 24 * 3600))
+LLM_CACHE_MAX_ENTRIES = int(os.getenv("LLM_CACHE_MAX_ENTRIES", 100_000))
+LLM_CACHE_STATS_KEY = "llm_cache_stats"
+# The SQLite cache keeps a running row count per connection; every this many
+# writes it drops expired rows and recounts the table (other processes' inserts)
+LLM_CACHE_RECOUNT_WRITES = 1000
+
+
+class CacheStats:
+    """Hit/miss counters summed over every process, whatever the backend (the
+    SQLite cache is per container), so the API can report them without
+    running any chain itself. Buffered through RedisCounters, so recording
+    never waits on Redis."""
+
+    def __init__(self, redis_url: Optional[str] = None):
+        self.counters = RedisCounters(redis_url)
+
+    def record(self, hit: bool):
+        self.counters.incr(LLM_CACHE_STATS_KEY, **{"hits" if hit else "misses": 1})
+
+    def snapshot(self) -> Dict[str, Any]:
+        counts = {"hits": 0, "misses": 0}
+        counts.update({k: int(v) for k, v in self.counters.snapshot(LLM_CACHE_STATS_KEY).items()})
+        lookups = counts["hits"] + counts["misses"]
+        return {**counts, "hit_rate": round(counts["hits"] / lookups, 4) if lookups else 0.0}
+
+
+llm_cache_stats = CacheStats()
+
+
+class ResponseCache(BaseCache):
+    """langchain global cache for chat model responses.
+
+    langchain calls lookup/update with the serialised prompt messages (template
+    already rendered with the inputs) and the model's llm_string (class, model
+    name, temperature and other call params), so every classify / extract /
+    compare / risk chain is covered without touching the chains."""
+
+    def __init__(self, ttl_seconds: int = LLM_CACHE_TTL_SECONDS, max_entries: int = LLM_CACHE_MAX_ENTRIES):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def key(prompt: str, llm_string: str) -> str:
+        return hashlib.sha256(f"{llm_string}\x00{prompt}".encode("utf-8")).hexdigest()
+
+    @abstractmethod
+    def _get(self, key: str) -> Optional[str]:
+        """Stored value for key, or None when missing or expired."""
+
+    @abstractmethod
+    def _set(self, key: str, value: str):
+        """Store value under key, evicting past max_entries."""
+
+    def _count(self, hit: bool):
+        if hit:
+            self.hits += 1
+        else:
+            self.misses += 1
+        llm_cache_stats.record(hit)
+
+    def lookup(self, prompt: str, llm_string: str) -> Optional[Sequence[Generation]]:
+        try:
+            raw = self._get(self.key(prompt, llm_string))
+        except Exception as e:
+            logger.warning(f"LLM cache lookup failed: {e}")
+            raw = None
+        self._count(raw is not None)
+        if raw is None:
+            return None
+        return loads(raw)
+
+    def update(self, prompt: str, llm_string: str, return_val: Sequence[Generation]):
+        try:
+            self._set(self.key(prompt, llm_string), dumps(list(return_val)))
+        except Exception as e:
+            logger.warning(f"LLM cache write failed: {e}")
+
+    def stats(self) -> Dict[str, Any]:
+        # This process only; llm_cache_stats has the totals
+        lookups = self.hits + self.misses
+        return {
+            "backend": type(self).__name__,
+            "ttl_seconds": self.ttl_seconds,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+        }
+
+
+class SQLiteResponseCache(ResponseCache):
+    def __init__(self, path: str = LLM_CACHE_PATH, **kwargs):
+        super().__init__(**kwargs)
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = None
+        self._pid = None
+
+    def _connection(self) -> sqlite3.Connection:
+        # sqlite connections must not cross a fork
+        if self._conn is None or self._pid != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=30, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS responses ("
+                "key TEXT PRIMARY KEY, value TEXT NOT NULL, created_at REAL NOT NULL, last_access REAL NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS ix_responses_last_access ON responses (last_access)")
+            conn.commit()
+            self._conn = conn
+            self._pid = os.getpid()
+            # Counted once per connection, then kept from insert/delete rowcounts
+            self._rows = conn.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+            self._writes = 0
+        return self._conn
+
+    def _get(self, key: str) -> Optional[str]:
+        now = time.time()
+        with self._lock:
+            conn = self._connection()
+            row = conn.execute("SELECT value, created_at FROM responses WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                return None
+            if now - row[1] > self.ttl_seconds:
+                conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+                conn.commit()
+                return None
+            conn.execute("UPDATE responses SET last_access = ? WHERE key = ?", (now, key))
+            conn.commit()
+            return row[0]
+
+    def _set(self, key: str, value: str):
+        now = time.time()
+        with self._lock:
+            conn = self._connection()
+            self._rows += conn.execute(
+                "INSERT OR IGNORE INTO responses (key, value, created_at, last_access) VALUES (?, ?, ?, ?)",
+                (key, value, now, now)
+            ).rowcount
+            conn.execute(
+                "UPDATE responses SET value = ?, created_at = ?, last_access = ? WHERE key = ?", (value, now, now, key)
+            )
+            self._writes += 1
+            if self._writes % LLM_CACHE_RECOUNT_WRITES == 0:
+                # Between these, expired rows are dropped when read
+                self._purge_expired(conn, now)
+                self._rows = conn.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+            if self._rows > self.max_entries:
+                self._rows -= conn.execute(
+                    "DELETE FROM responses WHERE key IN ("
+                    "SELECT key FROM responses ORDER BY last_access ASC LIMIT ?)",
+                    (self._rows - self.max_entries,)
+                ).rowcount
+            conn.commit()
+
+    def _purge_expired(self, conn: sqlite3.Connection, now: float) -> int:
+        return conn.execute("DELETE FROM responses WHERE created_at < ?", (now - self.ttl_seconds,)).rowcount
+
+    def clear(self, **kwargs: Any):
+        with self._lock:
+            self._connection().execute("DELETE FROM responses")
+            self._conn.commit()
+            self._rows = 0
+
+
+class RedisResponseCache(ResponseCache):
+    """Shared across API and worker hosts. Redis expires entries after the TTL;
+    a recency sorted set bounds the number of entries."""
+
+    def __init__(self, url: Optional[str] = None, **kwargs):
+        super().__init__(**kwargs)
+        import redis
+        self.redis = redis.from_url(url or os.getenv("REDIS_URL", "redis://redis:6379/0"), decode_responses=True)
+        self.prefix = "llm"
+
+    def _get(self, key: str) -> Optional[str]:
+        value = self.redis.get(f"{self.prefix}:{key}")
+        if value is not None:
+            self.redis.zadd(f"{self.prefix}:lru", {key: time.time()})
+        return value
+
+    def _set(self, key: str, value: str):
+        p = self.redis.pipeline()
+        p.set(f"{self.prefix}:{key}", value, ex=self.ttl_seconds)
+        p.zadd(f"{self.prefix}:lru", {key: time.time()})
+        p.zcard(f"{self.prefix}:lru")
+        count = p.execute()[-1]
+        if count > self.max_entries:
+            evicted = self.redis.zpopmin(f"{self.prefix}:lru", count - self.max_entries)
+            if evicted:
+                self.redis.delete(*[f"{self.prefix}:{k}" for k, _ in evicted])
+
+    def clear(self, **kwargs: Any):
+        keys = self.redis.zrange(f"{self.prefix}:lru", 0, -1)
+        if keys:
+            self.redis.delete(*[f"{self.prefix}:{k}" for k in keys])
+        self.redis.delete(f"{self.prefix}:lru")
+
+
+_configure_lock = threading.Lock()
+
+
+def configure_llm_cache() -> Optional[ResponseCache]:
+    # Idempotent; installs the process-wide langchain cache on first use
+    with _configure_lock:
+        current = get_llm_cache()
+        if isinstance(current, ResponseCache):
+            return current
+        backend = LLM_CACHE_BACKEND.lower()
+        if backend in ("off", "none", ""):
+            return None
+        try:
+            cache = RedisResponseCache() if backend == "redis" else SQLiteResponseCache()
+        except Exception as e:
+            logger.error(f"LLM cache unavailable ({backend}): {e}")
+            return None
+        set_llm_cache(cache)
+        logger.info(f"LLM response cache enabled ({type(cache).__name__})")
+        return cache
@@ -0,0 +1,168 @@
+import bisect
+import threading
+from typing import Dict, Iterable, List, Sequence, Tuple
+
+# Prometheus-style metrics kept in process memory and rendered in the text
+# exposition format at GET /metrics. Each API process has its own values, so
+# scrape every process (or run one per container) rather than a load balancer.
+
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+QUANTILES = (0.5, 0.95, 0.99)
+
+REGISTRY: List["Metric"] = []
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n")
+
+
+def _labels(names: Sequence[str], values: Sequence, extra: str = "") -> str:
+    pairs = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _number(value: float) -> str:
+    return repr(float(value)) if value != int(value) else str(int(value))
+
+
+class Metric:
+    kind = "untyped"
+
+    def __init__(self, name: str, description: str, label_names: Sequence[str] = (), registry: list = REGISTRY):
+        self.name = name
+        self.description = description
+        self.label_names = tuple(label_names)
+        self.lock = threading.Lock()
+        registry.append(self)
+
+    def render(self) -> List[str]:
+        return [f"# HELP {self.name} {self.description}", f"# TYPE {self.name} {self.kind}"]
+
+
+class Counter(Metric):
+    kind = "counter"
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.values: Dict[Tuple, float] = {}
+
+    def inc(self, labels: Tuple = (), amount: float = 1):
+        with self.lock:
+            self.values[labels] = self.values.get(labels, 0) + amount
+
+    def render(self) -> List[str]:
+        lines = super().render()
+        with self.lock:
+            items = sorted(self.values.items())
+        lines.extend(f"{self.name}{_labels(self.label_names, k)} {_number(v)}" for k, v in items)
+        return lines
+
+
+class Gauge(Counter):
+    kind = "gauge"
+
+    def set(self, value: float, labels: Tuple = ()):
+        with self.lock:
+            self.values[labels] = value
+
+
+class Histogram(Metric):
+    """Cumulative bucket counts per label set, plus p50/p95/p99 estimated from
+    the buckets (as Prometheus' histogram_quantile does) and rendered as a
+    separate <name>_quantile gauge."""
+    kind = "histogram"
+
+    def __init__(self, name, description, label_names=(), buckets=DURATION_BUCKETS, quantile_labels=None,
+                 registry: list = REGISTRY):
+        super().__init__(name, description, label_names, registry)
+        self.buckets = tuple(buckets)
+        # Labels the quantiles are aggregated over (e.g. route but not status)
+        self.quantile_labels = tuple(quantile_labels if quantile_labels is not None else label_names)
+        self.series: Dict[Tuple, List] = {}  # labels -> [bucket counts..., +Inf count, sum]
+
+    def observe(self, value: float, labels: Tuple = ()):
+        index = bisect.bisect_left(self.buckets, value)
+        with self.lock:
+            series = self.series.get(labels)
+            if series is None:
+                series = self.series[labels] = [0] * (len(self.buckets) + 1) + [0.0]
+            series[index] += 1
+            series[-1] += value
+
+    def quantiles(self, qs: Iterable[float] = QUANTILES) -> Dict[Tuple, Dict[float, float]]:
+        positions = [self.label_names.index(n) for n in self.quantile_labels]
+        grouped: Dict[Tuple, List[int]] = {}
+        with self.lock:
+            for labels, series in self.series.items():
+                key = tuple(labels[i] for i in positions)
+                counts = grouped.setdefault(key, [0] * (len(self.buckets) + 1))
+                for i, c in enumerate(series[:-1]):
+                    counts[i] += c
+        return {key: {q: self._estimate(counts, q) for q in qs} for key, counts in grouped.items()}
+
+    def _estimate(self, counts: List[int], q: float) -> float:
+        total = sum(counts)
+        if not total:
+            return 0.0
+        rank, cumulative = q * total, 0
+        for i, count in enumerate(counts):
+            if cumulative + count >= rank and count:
+                if i == len(self.buckets):
+                    # Beyond the last finite bucket: all we know is the bound
+                    return self.buckets[-1]
+                lower = self.buckets[i - 1] if i else 0.0
+                return lower + (self.buckets[i] - lower) * (rank - cumulative) / count
+            cumulative += count
+        return self.buckets[-1]
+
+    def render(self) -> List[str]:
+        lines = super().render()
+        with self.lock:
+            items = sorted((k, list(v)) for k, v in self.series.items())
+        for labels, series in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), series[:-1]):
+                cumulative += count
+                le = "+Inf" if bound == float("inf") else _number(bound)
+                label_text = _labels(self.label_names, labels, f'le="{le}"')
+                lines.append(f"{self.name}_bucket{label_text} {cumulative}")
+            lines.append(f"{self.name}_sum{_labels(self.label_names, labels)} {series[-1]:.6f}")
+            lines.append(f"{self.name}_count{_labels(self.label_names, labels)} {cumulative}")
+
+        quantile_name = f"{self.name}_quantile"
+        lines.append(f"# HELP {quantile_name} {self.description} (quantiles estimated from the histogram buckets)")
+        lines.append(f"# TYPE {quantile_name} gauge")
+        for labels, values in sorted(self.quantiles().items()):
+            for q, value in values.items():
+                label_text = _labels(self.quantile_labels, labels, f'quantile="{q}"')
+                lines.append(f"{quantile_name}{label_text} {value:.6f}")
+        return lines
+
+
+def render_metrics() -> str:
+    lines = []
+    for metric in REGISTRY:
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
+
+
+# HTTP request metrics, recorded by RequestLoggerMiddleware
+http_request_duration = Histogram(
+    "http_request_duration_seconds", "HTTP request duration, including streaming the response body",
+    ("method", "route", "status"), quantile_labels=("method", "route")
+)
+http_response_bytes = Counter(
+    "http_response_size_bytes_total", "HTTP response body bytes sent", ("method", "route", "status")
+)
+
+# Connection pool metrics, recorded by shared.database's instrumented pools
+POOL_WAIT_BUCKETS = (0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 10.0, 30.0)
+db_pool_wait = Histogram(
+    "db_pool_wait_seconds", "Time spent waiting to check a connection out of the pool", ("pool",),
+    buckets=POOL_WAIT_BUCKETS
+)
+db_pool_checkouts = Counter("db_pool_checkouts_total", "Connections checked out of the pool", ("pool",))
+db_pool_timeouts = Counter("db_pool_timeouts_total", "Checkouts that gave up after DB_POOL_TIMEOUT", ("pool",))
+db_pool_in_use = Gauge("db_pool_connections_in_use", "Connections currently checked out", ("pool",))
@@ -1,60 +1,96 @@
-from starlette.middleware.base import BaseHTTPMiddleware
-from fastapi import Request, Response
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
 from fastapi.responses import JSONResponse
 import time
 import logging
-import redis
-import os
+
+from shared.metrics import http_request_duration, http_response_bytes
+from shared.rate_limit import RATE_LIMITS, RateLimiter, client_identity, parse_limit, route_class
 
 logger = logging.getLogger("middleware")
 logging.basicConfig(level=logging.INFO)
 
-class RequestLoggerMiddleware(BaseHTTPMiddleware):
-    async def dispatch(self, request: Request, call_next):
-        start_time = time.time()
-        response = await call_next(request)
-        process_time = time.time() - start_time
-        logger.info(f"{request.method} {request.url.path} - {response.status_code} - {process_time:.4f}s")
-        return response
-
-class RateLimitMiddleware(BaseHTTPMiddleware):
-    def __init__(self, app, limit=60, window=60):
-        super().__init__(app)
-        self.limit = limit
-        self.window = window
-        redis_url = os.getenv("REDIS_URL", "redis://redis:6379/0")
-        try:
-            self.redis = redis.from_url(redis_url, decode_responses=True)
-        except Exception as e:
-            logger.error(f"Failed to connect to Redis for rate limiting: {e}")
-            self.redis = None
-
-    async def dispatch(self, request: Request, call_next):
-        if not self.redis:
-            return await call_next(request)
-
-        client_ip = request.client.host if request.client else "unknown"
-        # Skip rate limiting for internal health checks or metrics if needed
-        if request.url.path == "/health":
-            return await call_next(request)
-            
-        key = f"rate_limit:{client_ip}"
-        
+# Both middlewares are plain ASGI callables: unlike BaseHTTPMiddleware they
+# add no extra task or response stream per request and never buffer the body.
+
+def route_template(scope: Scope) -> str:
+    # FastAPI stores the matched route in the scope, so metrics are labelled
+    # /documents/{doc_id} rather than one series per id. Requests that never
+    # reached a route (404, 429) share one label.
+    route = scope.get("route")
+    return getattr(route, "path", None) or "unmatched"
+
+class RequestLoggerMiddleware:
+    """Logs one key=value line per request and records its duration (up to
+    the last body chunk) and response size in shared.metrics."""
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        start_time = time.perf_counter()
+        status_code, size = 500, 0
+
+        async def send_wrapper(message: Message):
+            nonlocal status_code, size
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            elif message["type"] == "http.response.body":
+                size += len(message.get("body", b""))
+            await send(message)
+
         try:
-            current = self.redis.get(key)
-            if current and int(current) >= self.limit:
-                logger.warning(f"Rate limit exceeded for {client_ip}")
-                return JSONResponse(status_code=429, content={"detail": "Too Many Requests"})
-            
-            p = self.redis.pipeline()
-            p.incr(key)
-            if not current:
-                p.expire(key, self.window)
-            p.execute()
-        except Exception as e:
-            logger.error(f"Rate limit error: {e}")
-            # Fail open
-            pass
-            
-        response = await call_next(request)
-        return response
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            duration = time.perf_counter() - start_time
+            route = route_template(scope)
+            labels = (scope["method"], route, status_code)
+            http_request_duration.observe(duration, labels)
+            http_response_bytes.inc(labels, size)
+            logger.info(
+                f"method={scope['method']} route={route} path={scope['path']} "
+                f"status={status_code} duration_ms={duration * 1000:.1f} bytes={size}"
+            )
+
+class RateLimitMiddleware:
+    """Sliding window limits per user/role (or IP when anonymous) and route
+    class; see shared.rate_limit. The check is a single non-blocking Redis
+    call and fails over to in-process counters."""
+
+    def __init__(self, app: ASGIApp, limit=60, window=60):
+        self.app = app
+        self.limits = {"default": (limit, window)}
+        self.limits.update({name: parse_limit(value) for name, value in RATE_LIMITS.items()})
+        self.limiter = RateLimiter()
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        route = route_class(scope["method"], scope["path"])
+        if route is None:
+            return await self.app(scope, receive, send)
+
+        client_ip = scope["client"][0] if scope.get("client") else "unknown"
+        identity = client_identity(Headers(scope=scope).get("authorization"), client_ip)
+        limit, window = self.limits.get(route, self.limits["default"])
+        allowed, count = await self.limiter.hit(f"{route}:{identity}", limit, window)
+        if not allowed:
+            logger.warning(f"Rate limit exceeded for {identity} on {route}")
+            response = JSONResponse(
+                status_code=429,
+                content={"detail": "Too Many Requests"},
+                headers={"Retry-After": str(window), "X-RateLimit-Limit": str(limit)}
+            )
+            return await response(scope, receive, send)
+
+        async def send_wrapper(message: Message):
+            if message["type"] == "http.response.start":
+                headers = MutableHeaders(scope=message)
+                headers.append("X-RateLimit-Limit", str(limit))
+                headers.append("X-RateLimit-Remaining", str(max(0, limit - count)))
+            await send(message)
+
+        await self.app(scope, receive, send_wrapper)
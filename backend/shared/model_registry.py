@@ -0,0 +1,107 @@
+import os
+import time
+import logging
+import resource
+import threading
+from typing import Dict, Any
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_EMBEDDING_MODEL = os.getenv("EMBEDDING_MODEL", "all-MiniLM-L6-v2")
+
+# One registry per process. Celery prefork children inherit the parent's memory,
+# so we remember which pid populated the registry and start fresh after a fork
+# instead of sharing torch state (and a held lock) across processes.
+_lock = threading.Lock()
+_models: Dict[str, Any] = {}
+_load_stats: Dict[str, Dict[str, Any]] = {}
+_owner_pid = os.getpid()
+
+
+def _reset_after_fork():
+    global _lock, _owner_pid
+    _lock = threading.Lock()
+    _models.clear()
+    _load_stats.clear()
+    _owner_pid = os.getpid()
+
+
+def _rss_mb() -> float:
+    # Current RSS from /proc when available, peak RSS otherwise (macOS / no procfs)
+    try:
+        with open("/proc/self/statm") as f:
+            pages = int(f.read().split()[1])
+        return pages * os.sysconf("SC_PAGE_SIZE") / (1024 * 1024)
+    except Exception:
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def _load(model_name: str):
+    # Imported lazily so merely importing this module (e.g. in the Celery parent)
+    # does not pull torch into memory before the workers fork.
+    from sentence_transformers import SentenceTransformer
+
+    rss_before = _rss_mb()
+    start = time.perf_counter()
+    model = SentenceTransformer(model_name)
+    load_seconds = time.perf_counter() - start
+    rss_delta = _rss_mb() - rss_before
+
+    try:
+        param_bytes = sum(p.numel() * p.element_size() for p in model.parameters())
+    except Exception:
+        param_bytes = None
+
+    _load_stats[model_name] = {
+        "model": model_name,
+        "pid": os.getpid(),
+        "load_seconds": round(load_seconds, 3),
+        "rss_delta_mb": round(rss_delta, 1),
+        "param_mb": round(param_bytes / (1024 * 1024), 1) if param_bytes is not None else None,
+        "loaded_at": time.time(),
+    }
+    logger.info(
+        f"Loaded embedding model {model_name} in {load_seconds:.2f}s "
+        f"(pid={os.getpid()}, rss +{rss_delta:.1f}MB)"
+    )
+    return model
+
+
+def get_embedding_model(model_name: str = DEFAULT_EMBEDDING_MODEL):
+    if os.getpid() != _owner_pid:
+        _reset_after_fork()
+
+    model = _models.get(model_name)
+    if model is not None:
+        return model
+
+    with _lock:
+        # Another thread may have finished loading while we waited
+        model = _models.get(model_name)
+        if model is None:
+            model = _load(model_name)
+            _models[model_name] = model
+    return model
+
+
+def warm_up(model_name: str = DEFAULT_EMBEDDING_MODEL):
+    if os.getenv("EMBEDDING_WARMUP", "true").lower() not in ("1", "true", "yes"):
+        logger.info("Embedding model warm-up disabled")
+        return None
+    try:
+        get_embedding_model(model_name)
+    except Exception as e:
+        # Never block process start-up; the first request will retry the load
+        logger.error(f"Embedding model warm-up failed: {e}")
+        return None
+    return _load_stats.get(model_name)
+
+
+def model_stats() -> Dict[str, Any]:
+    if os.getpid() != _owner_pid:
+        _reset_after_fork()
+    return {
+        "pid": os.getpid(),
+        "rss_mb": round(_rss_mb(), 1),
+        "models": list(_load_stats.values()),
+    }
@@ -1,6 +1,7 @@
-from sqlalchemy import Column, Integer, String, DateTime, Enum as SqlEnum, JSON, Boolean
+from sqlalchemy import Column, Integer, String, Date, DateTime, Numeric, Enum as SqlEnum, JSON, Boolean, LargeBinary, ForeignKey, UniqueConstraint, Index
 from datetime import datetime
 import enum
+from sqlalchemy.orm import relationship
 from shared.database import Base
 
 class DocumentStatus(str, enum.Enum):
@@ -9,22 +10,93 @@ class DocumentStatus(str, enum.Enum):
     COMPLETED = "COMPLETED"
     FAILED = "FAILED"
 
+# Checkpoints of the document pipeline (parse -> embed -> extract tasks), in
+# order. Chunking is not a checkpoint of its own: chunks are a pure function of
+# the stored pages (with deterministic ids), so they are regenerated and
+# embedded in one resumable step.
+PROCESSING_STAGES = ("downloaded", "parsed", "embedded", "extracted")
+
 class Document(Base):
     __tablename__ = "documents"
 
     id = Column(Integer, primary_key=True, index=True)
     filename = Column(String, index=True)
-    s3_key = Column(String, unique=True, index=True)
+    s3_key = Column(String, index=True) # shared by exact duplicates
     status = Column(SqlEnum(DocumentStatus), default=DocumentStatus.PENDING)
     created_at = Column(DateTime, default=datetime.utcnow)
     extraction_result = Column(JSON, nullable=True)
+    content_sha256 = Column(String(64), index=True, nullable=True)
+    # Last completed pipeline step (see PROCESSING_STAGES); retries resume after it
+    processing_stage = Column(String, nullable=True)
+    # Set when the upload was byte-identical to this earlier document; pages and
+    # chunks are read from the original, which is processed only once
+    duplicate_of_id = Column(Integer, ForeignKey("documents.id"), index=True, nullable=True)
+    # Typed copies of extraction_result fields (shared.document_fields), so
+    # listings and reports filter in SQL instead of reading the JSON
+    doc_type = Column(String, nullable=True)
+    vendor_name = Column(String, nullable=True)
+    vendor_normalized = Column(String, nullable=True)  # normalize_party_name
+    total_amount = Column(Numeric(18, 2, asdecimal=False), nullable=True)
+    currency = Column(String(3), nullable=True)
+    document_date = Column(Date, nullable=True)  # invoice date / contract effective date
+
+    # Keyset pagination of the document list, newest first, optionally filtered
+    __table_args__ = (
+        Index("ix_documents_created_at_id", "created_at", "id"),
+        Index("ix_documents_status_created_at_id", "status", "created_at", "id"),
+        Index("ix_documents_doc_type_created_at_id", "doc_type", "created_at", "id"),
+        # "invoices from vendor X", "invoices over N this month"
+        Index("ix_documents_doc_type_vendor_normalized", "doc_type", "vendor_normalized"),
+        Index("ix_documents_doc_type_document_date", "doc_type", "document_date"),
+    )
+
+class ContractParty(Base):
+    __tablename__ = "contract_parties"
+
+    id = Column(Integer, primary_key=True, index=True)
+    document_id = Column(Integer, ForeignKey("documents.id", ondelete="CASCADE"), index=True, nullable=False)
+    role = Column(String) # party_a, party_b
+    name = Column(String)
+    # See shared.parties.normalize_party_name; trigram-indexed on Postgres
+    normalized_name = Column(String, index=True, nullable=False)
+
+class JobStatus(str, enum.Enum):
+    PENDING = "PENDING"
+    RUNNING = "RUNNING"
+    COMPLETED = "COMPLETED"
+    FAILED = "FAILED"
+
+class Job(Base):
+    __tablename__ = "jobs"
+
+    id = Column(String, primary_key=True) # uuid4, also used as the Celery task id
+    kind = Column(String, index=True) # analyze, risk_assessment, reconcile, report_export
+    document_id = Column(Integer, ForeignKey("documents.id", ondelete="CASCADE"), index=True, nullable=True) # None for batch jobs
+    params = Column(JSON, nullable=True) # batch jobs: {"document_ids": [...]}; exports: range, filter, format
+    dedup_key = Column(String, unique=True, nullable=True) # kind:doc:version, released on force/failure
+    status = Column(SqlEnum(JobStatus), default=JobStatus.PENDING)
+    result = Column(JSON, nullable=True)
+    error = Column(String, nullable=True)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+class DocumentPage(Base):
+    __tablename__ = "document_pages"
+    __table_args__ = (UniqueConstraint("document_id", "page_number", name="uq_document_pages_document_page"),)
+
+    id = Column(Integer, primary_key=True, index=True)
+    document_id = Column(Integer, ForeignKey("documents.id", ondelete="CASCADE"), index=True, nullable=False)
+    page_number = Column(Integer, nullable=False)
+    text_compressed = Column(LargeBinary, nullable=False) # zlib-compressed UTF-8
+    char_count = Column(Integer, default=0)
+    parser_version = Column(String, nullable=False)
 
 class Finding(Base):
     __tablename__ = "findings"
 
     id = Column(Integer, primary_key=True, index=True)
-    document_id = Column(Integer) # ForeignKey('documents.id') - simplified for MVP
-    related_document_id = Column(Integer, nullable=True) # E.g. Contract ID
+    document_id = Column(Integer, ForeignKey("documents.id", ondelete="CASCADE", name="fk_findings_document_id"), index=True, nullable=False)
+    related_document_id = Column(Integer, ForeignKey("documents.id", ondelete="SET NULL", name="fk_findings_related_document_id"), index=True, nullable=True) # E.g. Contract ID
     finding_type = Column(String)
     severity = Column(String)
     description = Column(String)
@@ -32,16 +104,24 @@ class Finding(Base):
     status = Column(String, default="open") # open, reviewed, overridden
     created_at = Column(DateTime, default=datetime.utcnow)
 
+    decisions = relationship("ReviewDecision", back_populates="finding", order_by="ReviewDecision.id",
+                             passive_deletes=True)
+
 class ReviewDecision(Base):
     __tablename__ = "review_decisions"
     
     id = Column(Integer, primary_key=True, index=True)
-    finding_id = Column(Integer, index=True)
+    finding_id = Column(Integer, ForeignKey("findings.id", ondelete="CASCADE", name="fk_review_decisions_finding_id"), index=True, nullable=False)
     decision = Column(String) # APPROVE, OVERRIDE
     comment = Column(String, nullable=True)
     user_id = Column(String)
     created_at = Column(DateTime, default=datetime.utcnow)
 
+    finding = relationship("Finding", back_populates="decisions")
+
+    # Latest decision per finding (shared.reports)
+    __table_args__ = (Index("ix_review_decisions_finding_id_created_at", "finding_id", "created_at"),)
+
 class UserRole(str, enum.Enum):
     ADMIN = "admin"
     AP = "ap"
@@ -0,0 +1,102 @@
+import os
+import zlib
+import logging
+from typing import Callable, Iterable, Iterator, Optional
+
+from sqlalchemy.orm import Session
+
+from shared.models import Document, DocumentPage
+from shared.ingestion import Page, ParsingService, PARSER_VERSION
+from shared.storage import download_to_tmp
+
+logger = logging.getLogger(__name__)
+
+# Pages are committed to the DB in groups while the parser streams them
+FLUSH_EVERY = 50
+
+
+class PageStore:
+    """Parsed page text persisted per page, so readers never re-download the PDF."""
+
+    @staticmethod
+    def clear(db: Session, doc_id: int):
+        db.query(DocumentPage).filter(DocumentPage.document_id == doc_id).delete(synchronize_session=False)
+
+    @staticmethod
+    def save_pages(
+        db: Session, doc_id: int, pages: Iterable[Page], on_parsed: Optional[Callable[[], None]] = None
+    ) -> Iterator[Page]:
+        # Pass-through generator: persists each page and yields it on, so it can
+        # sit between the parser and the chunker without buffering the document.
+        # Pages are committed every FLUSH_EVERY pages, so a failure further down
+        # the stream keeps what was parsed; on_parsed runs once the parser is
+        # exhausted and every page is committed.
+        PageStore.clear(db, doc_id)
+        pending = 0
+        for page in pages:
+            db.add(DocumentPage(
+                document_id=doc_id,
+                page_number=page.page_number,
+                text_compressed=zlib.compress(page.text.encode("utf-8"), 6),
+                char_count=len(page.text),
+                parser_version=PARSER_VERSION
+            ))
+            pending += 1
+            if pending >= FLUSH_EVERY:
+                db.commit()
+                pending = 0
+            yield page
+        db.commit()
+        if on_parsed is not None:
+            on_parsed()
+
+    @staticmethod
+    def is_current(db: Session, doc_id: int) -> bool:
+        row = db.query(DocumentPage.parser_version).filter(DocumentPage.document_id == doc_id).first()
+        if row is None:
+            return False
+        stale = db.query(DocumentPage.id).filter(
+            DocumentPage.document_id == doc_id,
+            DocumentPage.parser_version != PARSER_VERSION
+        ).first()
+        return stale is None
+
+    @staticmethod
+    def iter_pages(db: Session, doc_id: int) -> Iterator[Page]:
+        rows = db.query(DocumentPage.page_number, DocumentPage.text_compressed).filter(
+            DocumentPage.document_id == doc_id
+        ).order_by(DocumentPage.page_number).yield_per(FLUSH_EVERY)
+        for page_number, blob in rows:
+            yield Page(page_number=page_number, text=zlib.decompress(blob).decode("utf-8"))
+
+    @staticmethod
+    def load_text(db: Session, doc_id: int, max_chars: Optional[int] = None) -> str:
+        # Only decompress as many pages as the caller will read
+        parts, length = [], 0
+        for page in PageStore.iter_pages(db, doc_id):
+            parts.append(page.text)
+            length += len(page.text) + 1
+            if max_chars is not None and length >= max_chars:
+                break
+        text = "\n".join(parts)
+        return text[:max_chars] if max_chars is not None else text
+
+
+def get_document_text(db: Session, doc: Document, max_chars: Optional[int] = None) -> str:
+    # Persisted text is the fast path. Older documents, or documents parsed by a
+    # previous parser version, are re-parsed once and the result stored.
+    if doc.duplicate_of_id:
+        # Exact duplicates share the original's pages
+        doc = db.query(Document).filter(Document.id == doc.duplicate_of_id).first() or doc
+    if PageStore.is_current(db, doc.id):
+        return PageStore.load_text(db, doc.id, max_chars=max_chars)
+
+    logger.info(f"No current page text for document {doc.id} (parser {PARSER_VERSION}); re-parsing")
+    local_path = download_to_tmp(doc.s3_key)
+    try:
+        for _ in PageStore.save_pages(db, doc.id, ParsingService.iter_pages(local_path)):
+            pass
+    finally:
+        if os.path.exists(local_path):
+            os.remove(local_path)
+    return PageStore.load_text(db, doc.id, max_chars=max_chars)
@@ -0,0 +1,65 @@
+import json
+import base64
+import logging
+from datetime import datetime
+from typing import Any, List, Optional, Tuple
+
+from sqlalchemy import func, select, tuple_
+from sqlalchemy.orm import Query, Session
+
+logger = logging.getLogger(__name__)
+
+# Below this many estimated rows an exact COUNT(*) is cheap enough to run
+EXACT_COUNT_THRESHOLD = 10_000
+
+
+def encode_cursor(created_at: datetime, row_id: int) -> str:
+    raw = json.dumps([created_at.isoformat() if created_at else None, row_id])
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[Optional[datetime], int]:
+    # Raises ValueError for anything that is not a cursor we issued
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        created_at, row_id = json.loads(raw)
+        return (datetime.fromisoformat(created_at) if created_at else None), int(row_id)
+    except Exception:
+        raise ValueError("Invalid cursor")
+
+
+def keyset_page(query: Query, created_col, id_col, cursor: Optional[str], limit: int) -> Tuple[List[Any], Optional[str]]:
+    """Newest first on (created_at, id). Each page seeks past the previous
+    page's last row through the composite index instead of OFFSET, so page N
+    costs the same as page 1. Rows must expose created_at and id."""
+    if cursor:
+        created_at, row_id = decode_cursor(cursor)
+        query = query.filter(tuple_(created_col, id_col) < tuple_(created_at, row_id))
+    rows = query.order_by(created_col.desc(), id_col.desc()).limit(limit + 1).all()
+    if len(rows) <= limit:
+        return rows, None
+    rows = rows[:limit]
+    return rows, encode_cursor(rows[-1].created_at, rows[-1].id)
+
+
+def estimate_count(db: Session, query: Query) -> Tuple[int, bool]:
+    """Returns (count, is_estimate). On Postgres the planner's row estimate
+    for the query (pg_class statistics, no table scan) is used when it is
+    large; small results and other databases get an exact COUNT(*)."""
+    stmt = query.order_by(None).statement
+    dialect = db.get_bind().dialect
+    if dialect.name == "postgresql":
+        try:
+            sql = stmt.compile(dialect=dialect, compile_kwargs={"literal_binds": True})
+            # In a savepoint so a failed EXPLAIN leaves the transaction usable
+            with db.begin_nested():
+                plan = db.connection().exec_driver_sql(f"EXPLAIN (FORMAT JSON) {sql}").scalar()
+            if isinstance(plan, str):
+                plan = json.loads(plan)
+            estimate = int(plan[0]["Plan"]["Plan Rows"])
+            if estimate >= EXACT_COUNT_THRESHOLD:
+                return estimate, True
+        except Exception as e:
+            logger.warning(f"Row estimate failed, counting exactly: {e}")
+    count = db.execute(select(func.count()).select_from(stmt.subquery())).scalar()
+    return count, False
@@ -0,0 +1,94 @@
+import re
+import logging
+import unicodedata
+from typing import Any, Dict, Optional, Tuple
+
+from sqlalchemy import func, or_
+from sqlalchemy.orm import Session
+
+from shared.models import ContractParty
+
+logger = logging.getLogger(__name__)
+
+PARTY_ROLES = ("party_a", "party_b")
+
+_LEGAL_SUFFIXES = {
+    "inc", "incorporated", "llc", "ltd", "limited", "corp", "corporation", "co", "company",
+    "plc", "gmbh", "sa", "ag", "bv", "nv", "lp", "llp", "pty", "srl",
+}
+_NON_WORD = re.compile(r"[^a-z0-9]+")
+
+
+def normalize_party_name(name: Any) -> str:
+    # "Acme Corp.", "ACME Corporation" and "The Acme Corp, Inc." all become "acme"
+    if not name:
+        return ""
+    text = unicodedata.normalize("NFKD", str(name)).encode("ascii", "ignore").decode("ascii")
+    text = text.lower().replace("&", " and ")
+    tokens = [t for t in _NON_WORD.split(text) if t]
+    if tokens and tokens[0] == "the":
+        tokens = tokens[1:]
+    while len(tokens) > 1 and tokens[-1] in _LEGAL_SUFFIXES:
+        tokens.pop()
+    return " ".join(tokens)
+
+
+def _field_value(data: Dict[str, Any], key: str):
+    value = data.get(key)
+    if isinstance(value, dict):
+        return value.get("value")
+    return value
+
+
+class PartyIndex:
+    """Normalised contract party names, so invoice -> contract lookup is an
+    index probe instead of a scan over every extraction_result."""
+
+    @staticmethod
+    def index_contract(db: Session, doc_id: int, extraction_result: Optional[Dict[str, Any]]):
+        # Called whenever a document's extraction result is (re)written
+        db.query(ContractParty).filter(ContractParty.document_id == doc_id).delete(synchronize_session=False)
+        if not extraction_result or extraction_result.get("doc_type") != "contract":
+            return
+        data = extraction_result.get("data") or {}
+        for role in PARTY_ROLES:
+            name = _field_value(data, role)
+            normalized = normalize_party_name(name)
+            if normalized:
+                db.add(ContractParty(document_id=doc_id, role=role, name=str(name), normalized_name=normalized))
+
+    @staticmethod
+    def find_contract(db: Session, vendor_name: str) -> Optional[Tuple[int, float]]:
+        """Best matching contract as (document_id, score), or None.
+
+        Exact normalised match wins; otherwise the highest trigram similarity
+        (Postgres) or shortest containing name (other backends). Ties go to the
+        most recent contract so the result is deterministic."""
+        normalized = normalize_party_name(vendor_name)
+        if not normalized:
+            return None
+
+        exact = db.query(ContractParty.document_id).filter(
+            ContractParty.normalized_name == normalized
+        ).order_by(ContractParty.document_id.desc()).first()
+        if exact:
+            return exact.document_id, 1.0
+
+        like = f"%{normalized}%"
+        if db.get_bind().dialect.name == "postgresql":
+            score = func.similarity(ContractParty.normalized_name, normalized)
+            row = db.query(ContractParty.document_id, score.label("score")).filter(or_(
+                ContractParty.normalized_name.op("%")(normalized),
+                ContractParty.normalized_name.like(like)
+            )).order_by(score.desc(), ContractParty.document_id.desc()).first()
+            if row:
+                return row.document_id, float(row.score)
+            return None
+
+        # Substring containment (the previous behaviour), closest length first
+        row = db.query(ContractParty.document_id, ContractParty.normalized_name).filter(
+            ContractParty.normalized_name.like(like)
+        ).order_by(func.length(ContractParty.normalized_name), ContractParty.document_id.desc()).first()
+        if row:
+            return row.document_id, len(normalized) / len(row.normalized_name)
+        return None
@@ -0,0 +1,179 @@
+import os
+import re
+import logging
+from dataclasses import dataclass
+from typing import Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+_UNITS = {
+    "zero": 0, "one": 1, "two": 2, "three": 3, "four": 4, "five": 5, "six": 6, "seven": 7, "eight": 8,
+    "nine": 9, "ten": 10, "eleven": 11, "twelve": 12, "thirteen": 13, "fourteen": 14, "fifteen": 15,
+    "sixteen": 16, "seventeen": 17, "eighteen": 18, "nineteen": 19,
+}
+_TENS = {
+    "twenty": 20, "thirty": 30, "forty": 40, "fifty": 50, "sixty": 60, "seventy": 70, "eighty": 80, "ninety": 90,
+}
+_UNIT_WORDS = "|".join(sorted(_UNITS, key=len, reverse=True))
+_SMALL_NUMBER = rf"(?:(?:{'|'.join(_TENS)})(?:[\s-]+(?:{_UNIT_WORDS}))?|(?:{_UNIT_WORDS}))"
+# A whole number phrase ("thirty-five", "one hundred twenty") plus the
+# numerals that often repeat it: "thirty-five (35)"
+_NUMBER_PHRASE = re.compile(
+    rf"\b((?:{_UNIT_WORDS})\s+hundred(?:\s+and)?(?:\s+{_SMALL_NUMBER})?|{_SMALL_NUMBER})\b(?:\s*\(\s*\d+\s*\))?"
+)
+
+_IMMEDIATE = re.compile(
+    r"\b(immediate(ly)?|due (up)?on receipt|(up)?on receipt|payable (up)?on receipt|"
+    r"cash on delivery|c\.?o\.?d\.?|cash in advance|prepaid|due now)\b"
+)
+# "2/10 net 30", "2%/10 n/30", "2% 10 net 30" or "2% discount if paid within
+# 10 days". A bare "a/b" only counts when a net term or a discount keyword
+# follows, so dates ("1/15") and rates ("1/2% per month") are not discounts.
+_DISCOUNT = re.compile(
+    r"\b(\d+(?:\.\d+)?)\s*(?:%\s*/?|/)\s*(\d+)\b(?=\s*,?\s*(?:(?:net|n/)\s*\d+|discount|if paid|early payment))"
+    r"|\b(\d+(?:\.\d+)?)\s*%\s*discount\D*?(\d+)\s*days?\b"
+)
+_NET = re.compile(r"\b(?:net|n/)\s*(\d+)\b")
+_DAYS = re.compile(r"\b(\d+)\s*(?:\)\s*)?(?:calendar\s+|business\s+)?days?\b")
+_EOM = re.compile(r"\b(eom|e\.o\.m\.?|end of (the )?month|following month)\b")
+
+
+@dataclass(frozen=True)
+class PaymentTerms:
+    net_days: int # 0 for immediate / on receipt
+    end_of_month: bool = False
+    discount_percent: Optional[float] = None
+    discount_days: Optional[int] = None
+
+    def describe(self) -> str:
+        if self.net_days == 0:
+            base = "payment on receipt"
+        else:
+            base = f"net {self.net_days} days" + (" from end of month" if self.end_of_month else "")
+        if self.discount_percent is not None:
+            base += f" ({self.discount_percent:g}% discount within {self.discount_days} days)"
+        return base
+
+
+def _number_value(phrase: str) -> int:
+    value = 0
+    for word in re.split(r"[\s-]+", phrase):
+        if word == "hundred":
+            value *= 100
+        elif word != "and":
+            value += _UNITS.get(word) or _TENS.get(word, 0)
+    return value
+
+
+def _replace_number_words(text: str) -> str:
+    # "thirty-five (35) days" and "thirty five days" both become "35 days"
+    return _NUMBER_PHRASE.sub(lambda m: str(_number_value(m.group(1))), text)
+
+
+def parse_payment_terms(text) -> Optional[PaymentTerms]:
+    """Structured form of a payment term string, or None if not recognised."""
+    if not text:
+        return None
+    raw = str(text).lower().strip()
+    normalized = _replace_number_words(raw)
+
+    end_of_month = bool(_EOM.search(normalized))
+    discount_percent = discount_days = None
+    discount = _DISCOUNT.search(normalized)
+    if discount:
+        pct, days = (discount.group(1), discount.group(2)) if discount.group(1) else (discount.group(3), discount.group(4))
+        discount_percent, discount_days = float(pct), int(days)
+        # Remove the discount so its day count is not read as the net term
+        normalized = normalized[:discount.start()] + " " + normalized[discount.end():]
+
+    # Wording the rules cannot read with confidence goes to the LLM instead of
+    # being half-parsed: a rate or discount _DISCOUNT did not capture ("1.5%
+    # interest", "2% 10 days net 30"), several day counts, or "on receipt"
+    # alongside a day count
+    if "%" in normalized or "discount" in normalized:
+        return None
+    day_counts = {int(d) for d in _NET.findall(normalized) + _DAYS.findall(normalized)}
+    if len(day_counts) > 1:
+        return None
+    immediate = bool(_IMMEDIATE.search(raw))
+    if immediate and day_counts:
+        return None
+
+    net = _NET.search(normalized)
+    if net:
+        return PaymentTerms(int(net.group(1)), end_of_month, discount_percent, discount_days)
+
+    days = _DAYS.search(normalized)
+    if days:
+        return PaymentTerms(int(days.group(1)), end_of_month, discount_percent, discount_days)
+
+    if immediate:
+        return PaymentTerms(0, False, discount_percent, discount_days)
+
+    if end_of_month:
+        # Bare "EOM": due at the end of the invoice month
+        return PaymentTerms(0, True, discount_percent, discount_days)
+
+    return None
+
+
+def compare_payment_terms(invoice_terms, contract_terms) -> Optional[Tuple[bool, str]]:
+    """(consistent, explanation) when both sides parse, otherwise None so the
+    caller can fall back to the LLM."""
+    inv = parse_payment_terms(invoice_terms)
+    cont = parse_payment_terms(contract_terms)
+    if inv is None or cont is None:
+        return None
+    if (inv.discount_percent is None) != (cont.discount_percent is None):
+        # A discount on one side only may be an optional early-payment offer
+        # rather than a conflict; the LLM reads the full wording
+        return None
+    if inv == cont:
+        return True, f"Both specify {inv.describe()}."
+
+    reasons = []
+    if inv.net_days != cont.net_days or inv.end_of_month != cont.end_of_month:
+        reasons.append(f"invoice requires {inv.describe()} but the contract allows {cont.describe()}")
+    if (inv.discount_percent, inv.discount_days) != (cont.discount_percent, cont.discount_days):
+        reasons.append("early payment discount terms differ")
+    return False, "; ".join(reasons).capitalize() + "."
+
+
+# Comparisons run on the workers; the counts are kept in Redis so the API's
+# /debug/term_comparisons reports every worker's totals
+TERM_STATS_KEY = "term_comparison_stats"
+
+
+class ComparisonStats:
+    """How term comparisons were resolved (rules, llm or fallback)."""
+
+    def __init__(self, redis_url: Optional[str] = None):
+        self.redis_url = redis_url or os.getenv("REDIS_URL", "redis://redis:6379/0")
+        self._redis = None
+
+    def _client(self):
+        if self._redis is None:
+            import redis
+            # Counting must never stall a comparison
+            self._redis = redis.from_url(self.redis_url, socket_timeout=1, socket_connect_timeout=1)
+        return self._redis
+
+    def record(self, method: str):
+        try:
+            self._client().hincrby(TERM_STATS_KEY, method, 1)
+        except Exception as e:
+            logger.warning(f"Failed to record term comparison: {e}")
+
+    def snapshot(self):
+        raw = self._client().hgetall(TERM_STATS_KEY)
+        counts = {"rules": 0, "llm": 0, "fallback": 0}
+        counts.update({(k.decode() if isinstance(k, bytes) else k): int(v) for k, v in raw.items()})
+        total = sum(counts.values())
+        return {
+            **counts,
+            "total": total,
+            "rules_fraction": round(counts["rules"] / total, 4) if total else 0.0,
+        }
+
+
+comparison_stats = ComparisonStats()
@@ -0,0 +1,79 @@
+import time
+from typing import Any, Dict
+
+from celery import chain
+
+# Queues by resource profile. CPU-bound stages run on prefork workers sized to
+# cores; LLM-bound tasks (mostly waiting on HTTP) run on a thread pool with
+# high concurrency, bounded per provider by shared.llm.provider_slot.
+QUEUE_DEFAULT = "celery"
+QUEUE_PARSE = "parse"
+QUEUE_EMBED = "embed"
+QUEUE_LLM = "llm"
+# Report exports: long, mostly waiting on the database and MinIO
+QUEUE_EXPORT = "export"
+QUEUES = (QUEUE_DEFAULT, QUEUE_PARSE, QUEUE_EMBED, QUEUE_LLM, QUEUE_EXPORT)
+
+# Routing happens where the task is published, so the API and the worker both
+# apply this table (configure_routes)
+TASK_ROUTES = {
+    "ingest_document": {"queue": QUEUE_EMBED},
+    "parse_document": {"queue": QUEUE_PARSE},
+    "embed_document": {"queue": QUEUE_EMBED},
+    "extract_document": {"queue": QUEUE_LLM},
+    "analyze_document": {"queue": QUEUE_LLM},
+    "assess_risk": {"queue": QUEUE_LLM},
+    "reconcile_invoices": {"queue": QUEUE_LLM},
+    "export_report": {"queue": QUEUE_EXPORT},
+}
+
+STATS_PREFIX = "queue_stats"
+THROUGHPUT_BUCKET_TTL = 3600
+
+
+def configure_routes(app):
+    app.conf.task_routes = TASK_ROUTES
+    app.conf.task_default_queue = QUEUE_DEFAULT
+
+
+def document_pipeline(app, document_id: int):
+    # ingest (CPU: parse and embed in one streamed pass, model in memory) ->
+    # extract (LLM). Immutable signatures: each stage reads its input from the
+    # DB, not the previous result.
+    return chain(
+        app.signature("ingest_document", args=[document_id], immutable=True),
+        app.signature("extract_document", args=[document_id], immutable=True),
+    )
+
+
+def record_task(redis, queue: str, succeeded: bool, runtime: float):
+    # Cumulative counters plus per-minute completion buckets for throughput
+    minute = int(time.time() // 60)
+    p = redis.pipeline()
+    p.hincrby(f"{STATS_PREFIX}:{queue}", "succeeded" if succeeded else "failed", 1)
+    p.hincrbyfloat(f"{STATS_PREFIX}:{queue}", "runtime_seconds", runtime)
+    p.incr(f"{STATS_PREFIX}:{queue}:{minute}")
+    p.expire(f"{STATS_PREFIX}:{queue}:{minute}", THROUGHPUT_BUCKET_TTL)
+    p.execute()
+
+
+def queue_stats(redis) -> Dict[str, Any]:
+    # The Redis transport keeps each queue's pending messages in a list named
+    # after the queue, so depth is one LLEN
+    minute = int(time.time() // 60)
+    stats = {}
+    for queue in QUEUES:
+        totals = redis.hgetall(f"{STATS_PREFIX}:{queue}")
+        totals = {k.decode() if isinstance(k, bytes) else k: float(v) for k, v in totals.items()}
+        done = totals.get("succeeded", 0) + totals.get("failed", 0)
+        recent = redis.mget([f"{STATS_PREFIX}:{queue}:{m}" for m in range(minute - 4, minute + 1)])
+        recent = [int(v) if v else 0 for v in recent]
+        stats[queue] = {
+            "depth": redis.llen(queue),
+            "succeeded": int(totals.get("succeeded", 0)),
+            "failed": int(totals.get("failed", 0)),
+            "avg_runtime_seconds": round(totals.get("runtime_seconds", 0) / done, 3) if done else None,
+            "completed_last_minute": recent[-1],
+            "completed_last_5_minutes": sum(recent),
+        }
+    return stats
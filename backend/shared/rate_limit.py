@@ -0,0 +1,154 @@
+import os
+import time
+import logging
+from typing import Dict, Optional, Tuple
+
+from jose import JWTError, jwt
+
+from shared.auth import SECRET_KEY, ALGORITHM
+
+logger = logging.getLogger(__name__)
+
+# "<requests>/<seconds>" per route class; "default" comes from the middleware's
+# limit/window arguments unless RATE_LIMIT_DEFAULT is set
+RATE_LIMITS = {
+    "auth": os.getenv("RATE_LIMIT_AUTH", "10/60"),
+    "upload": os.getenv("RATE_LIMIT_UPLOAD", "30/60"),
+    "llm": os.getenv("RATE_LIMIT_LLM", "20/60"),
+}
+if os.getenv("RATE_LIMIT_DEFAULT"):
+    RATE_LIMITS["default"] = os.getenv("RATE_LIMIT_DEFAULT")
+# Redis calls give up quickly; after a failure the in-process limiter is used
+# for this long before Redis is tried again
+RATE_LIMIT_REDIS_TIMEOUT = float(os.getenv("RATE_LIMIT_REDIS_TIMEOUT", 0.1))
+RATE_LIMIT_REDIS_RETRY_SECONDS = float(os.getenv("RATE_LIMIT_REDIS_RETRY_SECONDS", 5))
+
+EXEMPT_PATHS = {"/health", "/metrics"}
+LLM_SUFFIXES = ("/analyze", "/risk_assessment", "/reprocess", "/invoices/reconcile")
+
+
+def parse_limit(value: str) -> Tuple[int, int]:
+    limit, window = value.split("/")
+    return int(limit), int(window)
+
+
+def route_class(method: str, path: str) -> Optional[str]:
+    # None means the route is not limited
+    if path in EXEMPT_PATHS:
+        return None
+    if method == "POST":
+        if path == "/token":
+            return "auth"
+        if path in ("/upload", "/upload/batch"):
+            return "upload"
+        if path.endswith(LLM_SUFFIXES):
+            return "llm"
+    return "default"
+
+
+def client_identity(authorization: Optional[str], client_ip: str) -> str:
+    # Authenticated requests are limited per user and role, anonymous ones per
+    # IP. Only the signature is checked here (no DB lookup); a bad or expired
+    # token falls back to the IP and is rejected later by the route.
+    if authorization and authorization.lower().startswith("bearer "):
+        try:
+            claims = jwt.decode(authorization[7:], SECRET_KEY, algorithms=[ALGORITHM])
+            if claims.get("sub"):
+                return f"user:{claims.get('role', '')}:{claims['sub']}"
+        except JWTError:
+            pass
+    return f"ip:{client_ip}"
+
+
+def _window(now: float, window: int) -> Tuple[int, float]:
+    # Sliding window counter: the current fixed window's count plus the
+    # previous window's, weighted by how much of it still overlaps the
+    # sliding window
+    index = int(now // window)
+    return index, 1 - (now % window) / window
+
+
+# Check-and-increment in one round trip. KEYS: current and previous window
+# counters. ARGV: previous-window weight, limit, counter TTL. Returns
+# {allowed, requests counted in the sliding window}.
+SLIDING_WINDOW_LUA = """
+local current = tonumber(redis.call('GET', KEYS[1]) or '0')
+local previous = tonumber(redis.call('GET', KEYS[2]) or '0')
+local count = math.floor(previous * tonumber(ARGV[1])) + current
+if count >= tonumber(ARGV[2]) then
+    return {0, count}
+end
+if redis.call('INCR', KEYS[1]) == 1 then
+    redis.call('EXPIRE', KEYS[1], ARGV[3])
+end
+return {1, count + 1}
+"""
+
+
+class LocalRateLimiter:
+    """In-process sliding window counter, used while Redis is unreachable.
+    Limits are per process, so N API workers allow up to N times the limit."""
+
+    def __init__(self, max_keys: int = 100_000):
+        self.max_keys = max_keys
+        self.counters: Dict[str, Tuple[int, int, int]] = {}  # key -> (window index, current, previous)
+
+    def hit(self, key: str, limit: int, window: int, now: Optional[float] = None) -> Tuple[bool, int]:
+        index, weight = _window(time.time() if now is None else now, window)
+        start, current, previous = self.counters.get(key, (index, 0, 0))
+        if index != start:
+            previous = current if index == start + 1 else 0
+            current = 0
+        count = int(previous * weight) + current
+        allowed = count < limit
+        if allowed:
+            current += 1
+            count += 1
+        if key not in self.counters and len(self.counters) >= self.max_keys:
+            self._prune(index)
+        self.counters[key] = (index, current, previous)
+        return allowed, count
+
+    def _prune(self, index: int):
+        # Keys idle for two windows carry no weight any more
+        self.counters = {k: v for k, v in self.counters.items() if v[0] >= index - 1}
+        if len(self.counters) >= self.max_keys:
+            self.counters.clear()
+
+
+class RateLimiter:
+    """Sliding window rate limit shared through Redis (redis.asyncio + one Lua
+    script call per request), falling back to LocalRateLimiter."""
+
+    def __init__(self, redis_url: Optional[str] = None, prefix: str = "rate_limit"):
+        self.prefix = prefix
+        self.local = LocalRateLimiter()
+        self.redis_down_until = 0.0
+        self.redis = None
+        self.script = None
+        try:
+            import redis.asyncio as aioredis
+            self.redis = aioredis.from_url(
+                redis_url or os.getenv("REDIS_URL", "redis://redis:6379/0"),
+                socket_timeout=RATE_LIMIT_REDIS_TIMEOUT,
+                socket_connect_timeout=RATE_LIMIT_REDIS_TIMEOUT,
+            )
+            # EVALSHA, loading the script on the first NOSCRIPT
+            self.script = self.redis.register_script(SLIDING_WINDOW_LUA)
+        except Exception as e:
+            logger.error(f"Rate limiting falls back to in-process counters: {e}")
+
+    async def hit(self, key: str, limit: int, window: int) -> Tuple[bool, int]:
+        now = time.time()
+        if self.script is not None and now >= self.redis_down_until:
+            index, weight = _window(now, window)
+            try:
+                allowed, count = await self.script(
+                    keys=[f"{self.prefix}:{key}:{index}", f"{self.prefix}:{key}:{index - 1}"],
+                    args=[weight, limit, window * 2],
+                )
+                return bool(allowed), int(count)
+            except Exception as e:
+                logger.error(f"Rate limit Redis error, using in-process limiter: {e}")
+                self.redis_down_until = now + RATE_LIMIT_REDIS_RETRY_SECONDS
+        return self.local.hit(key, limit, window, now)
@@ -0,0 +1,86 @@
+import os
+import time
+import atexit
+import logging
+import threading
+from typing import Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+# Increments are buffered in the process and written to Redis at most this
+# often, so counting adds no round trip to the call being counted. After a
+# failed write, writes pause for STATS_REDIS_RETRY_SECONDS (the counts are kept
+# and sent with the next write).
+STATS_FLUSH_SECONDS = float(os.getenv("STATS_FLUSH_SECONDS", 5))
+STATS_REDIS_TIMEOUT = float(os.getenv("STATS_REDIS_TIMEOUT", 0.5))
+STATS_REDIS_RETRY_SECONDS = float(os.getenv("STATS_REDIS_RETRY_SECONDS", 30))
+
+
+class RedisCounters:
+    """Counters summed over every process in Redis hashes (one hash per key,
+    one field per counter)."""
+
+    def __init__(self, redis_url: Optional[str] = None):
+        self.redis_url = redis_url or os.getenv("REDIS_URL", "redis://redis:6379/0")
+        self._redis = None
+        self._reset()
+        # A forked child must not send the parent's pending counts again
+        os.register_at_fork(after_in_child=self._reset)
+        atexit.register(self.flush)
+
+    def _reset(self):
+        self._lock = threading.Lock()
+        self._pending: Dict[str, Dict[str, float]] = {}
+        self._next_flush = 0.0
+
+    def _client(self):
+        if self._redis is None:
+            import redis
+            self._redis = redis.from_url(
+                self.redis_url, socket_timeout=STATS_REDIS_TIMEOUT, socket_connect_timeout=STATS_REDIS_TIMEOUT
+            )
+        return self._redis
+
+    def _add(self, pending: Dict[str, Dict[str, float]]):
+        for key, amounts in pending.items():
+            counts = self._pending.setdefault(key, {})
+            for field, amount in amounts.items():
+                counts[field] = counts.get(field, 0) + amount
+
+    def incr(self, key: str, **amounts: float):
+        with self._lock:
+            self._add({key: amounts})
+            if time.monotonic() < self._next_flush:
+                return
+            pending, self._pending = self._pending, {}
+            self._next_flush = time.monotonic() + STATS_FLUSH_SECONDS
+        self._write(pending)
+
+    def flush(self):
+        with self._lock:
+            pending, self._pending = self._pending, {}
+        self._write(pending)
+
+    def _write(self, pending: Dict[str, Dict[str, float]]):
+        if not pending:
+            return
+        try:
+            p = self._client().pipeline()
+            for key, counts in pending.items():
+                for field, amount in counts.items():
+                    if isinstance(amount, float):
+                        p.hincrbyfloat(key, field, amount)
+                    else:
+                        p.hincrby(key, field, amount)
+            p.execute()
+        except Exception as e:
+            logger.warning(f"Failed to write counters to Redis, retrying in {STATS_REDIS_RETRY_SECONDS:g}s: {e}")
+            with self._lock:
+                self._add(pending)
+                self._next_flush = time.monotonic() + STATS_REDIS_RETRY_SECONDS
+
+    def snapshot(self, key: str) -> Dict[str, float]:
+        # Includes this process' pending counts; raises if Redis is unreachable
+        self.flush()
+        raw = self._client().hgetall(key)
+        return {(k.decode() if isinstance(k, bytes) else k): float(v) for k, v in raw.items()}
@@ -0,0 +1,163 @@
+import csv
+import io
+import os
+import json
+import zlib
+from datetime import datetime, timedelta
+from typing import Any, Dict, Iterable, Iterator, Optional, Sequence
+
+from fastapi.encoders import jsonable_encoder
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session, aliased, contains_eager
+
+from shared.models import Document, Finding, ReviewDecision
+
+# Rows fetched per round trip while streaming a report
+REPORT_FETCH_SIZE = 1000
+# Lifetime of the presigned links to exported reports
+EXPORT_URL_EXPIRY = timedelta(hours=int(os.getenv("EXPORT_URL_EXPIRY_HOURS", 24)))
+
+REPORT_COLUMNS = (
+    "finding_id", "type", "severity", "description", "status",
+    "review_decision", "review_comment", "reviewed_by", "reviewed_at",
+)
+PORTFOLIO_COLUMNS = (
+    "document_id", "filename", "doc_type", "vendor_name", "total_amount", "currency", "document_date",
+) + REPORT_COLUMNS
+
+
+def _findings_with_latest_decision(db: Session, finding_ids, *entities):
+    """Findings outer-joined with their latest review decision, from a single
+    query: the decisions are ranked per finding with a window function and
+    only the top one is joined, so no id list is built. finding_ids (a select
+    of Finding.id) limits the ranking to the decisions of the findings being
+    reported, so its cost follows the report, not the whole table."""
+    ranked = db.query(
+        ReviewDecision,
+        func.row_number().over(
+            partition_by=ReviewDecision.finding_id,
+            order_by=(ReviewDecision.created_at.desc(), ReviewDecision.id.desc())
+        ).label("rank")
+    ).filter(ReviewDecision.finding_id.in_(finding_ids)).subquery()
+    latest = aliased(ReviewDecision, ranked)
+    return db.query(*entities, Finding, latest).select_from(Finding).outerjoin(
+        latest, (latest.finding_id == Finding.id) & (ranked.c.rank == 1)
+    )
+
+
+def _finding_row(f: Finding, decision: Optional[ReviewDecision]) -> Dict[str, Any]:
+    return {
+        "finding_id": f.id,
+        "type": f.finding_type,
+        "severity": f.severity,
+        "description": f.description,
+        "status": f.status,
+        "review_decision": decision.decision if decision else None,
+        "review_comment": decision.comment if decision else None,
+        "reviewed_by": decision.user_id if decision else None,
+        "reviewed_at": decision.created_at if decision else None
+    }
+
+
+def report_rows(db: Session, doc_id: int) -> Iterator[Dict[str, Any]]:
+    # One row per finding of the document with its latest review decision
+    finding_ids = select(Finding.id).where(Finding.document_id == doc_id)
+    query = _findings_with_latest_decision(db, finding_ids).filter(Finding.document_id == doc_id).order_by(Finding.id)
+    for f, decision in query.yield_per(REPORT_FETCH_SIZE):
+        yield _finding_row(f, decision)
+
+
+def _in_range(query, created_from: Optional[datetime], created_to: Optional[datetime], doc_type: Optional[str]):
+    if created_from:
+        query = query.filter(Document.created_at >= created_from)
+    if created_to:
+        query = query.filter(Document.created_at < created_to)
+    if doc_type:
+        query = query.filter(Document.doc_type == doc_type)
+    return query
+
+
+def portfolio_rows(db: Session, created_from: Optional[datetime] = None, created_to: Optional[datetime] = None,
+                   doc_type: Optional[str] = None) -> Iterator[Dict[str, Any]]:
+    """Every finding (with its latest decision) of every document uploaded in
+    [created_from, created_to), ordered by document. yield_per streams the
+    rows through a server-side cursor on Postgres, so memory stays at one
+    fetch batch however large the export."""
+    finding_ids = _in_range(
+        select(Finding.id).join(Document, Document.id == Finding.document_id), created_from, created_to, doc_type
+    )
+    query = _in_range(_findings_with_latest_decision(
+        db, finding_ids, Document.id, Document.filename, Document.doc_type, Document.vendor_name,
+        Document.total_amount, Document.currency, Document.document_date
+    ).join(Document, Document.id == Finding.document_id), created_from, created_to, doc_type)
+
+    for row in query.order_by(Document.id, Finding.id).yield_per(REPORT_FETCH_SIZE):
+        *doc, f, decision = row
+        yield {**dict(zip(PORTFOLIO_COLUMNS, doc)), **_finding_row(f, decision)}
+
+
+def export_watermark(db: Session, created_from: Optional[datetime] = None, created_to: Optional[datetime] = None,
+                     doc_type: Optional[str] = None) -> Dict[str, Any]:
+    """Summary of the data a portfolio export would read: finding count, and
+    the newest finding and review decision ids in the range. Any finding or
+    decision added (or finding removed) since changes it."""
+    findings, last_finding, last_decision = _in_range(
+        db.query(func.count(func.distinct(Finding.id)), func.max(Finding.id), func.max(ReviewDecision.id))
+        .select_from(Finding)
+        .join(Document, Document.id == Finding.document_id)
+        .outerjoin(ReviewDecision, ReviewDecision.finding_id == Finding.id),
+        created_from, created_to, doc_type
+    ).one()
+    return {"findings": findings, "last_finding_id": last_finding, "last_decision_id": last_decision}
+
+
+def audit_decisions(db: Session, doc_id: int):
+    # Every decision on the document's findings, oldest first, with its finding
+    # loaded by the same join
+    return db.query(ReviewDecision).join(ReviewDecision.finding).options(
+        contains_eager(ReviewDecision.finding)
+    ).filter(Finding.document_id == doc_id).order_by(ReviewDecision.created_at, ReviewDecision.id).all()
+
+
+def to_ndjson(rows: Iterable[Dict[str, Any]]) -> Iterator[str]:
+    for row in rows:
+        yield json.dumps(jsonable_encoder(row)) + "\n"
+
+
+def to_csv(rows: Iterable[Dict[str, Any]], columns: Sequence[str] = REPORT_COLUMNS) -> Iterator[str]:
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=columns)
+    writer.writeheader()
+    for row in rows:
+        writer.writerow(jsonable_encoder(row))
+        if buffer.tell() >= 64 * 1024:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+    yield buffer.getvalue()
+
+
+class GzipReader:
+    """Read-only file object that gzips text chunks as they are read, so an
+    export can be handed to storage.upload_stream without ever holding the
+    whole file (compressed or not) in memory or on disk."""
+
+    def __init__(self, chunks: Iterable[str]):
+        self.chunks = iter(chunks)
+        self.compressor = zlib.compressobj(6, zlib.DEFLATED, 31)  # wbits 31: gzip container
+        self.buffer = bytearray()
+        self.done = False
+
+    def read(self, size: int = -1) -> bytes:
+        while not self.done and (size < 0 or len(self.buffer) < size):
+            chunk = next(self.chunks, None)
+            if chunk is None:
+                self.buffer += self.compressor.flush()
+                self.done = True
+            else:
+                self.buffer += self.compressor.compress(chunk.encode("utf-8"))
+        if size < 0:
+            size = len(self.buffer)
+        data = bytes(self.buffer[:size])
+        del self.buffer[:size]
+        return data
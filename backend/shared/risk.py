@@ -3,18 +3,21 @@ import logging
 import json
 import os
 from enum import Enum
+from concurrent.futures import ThreadPoolExecutor
 
-from langchain_openai import ChatOpenAI
-from langchain_mistralai import ChatMistralAI
 from langchain.prompts import ChatPromptTemplate
 from langchain.output_parsers import PydanticOutputParser
 from langgraph.graph import StateGraph, END
 
 from shared.schemas import RiskFinding, RiskLevel
-from shared.ingestion import VectorService
+from shared.ingestion import get_vector_service
+from shared.llm import llm_provider, provider_slot, get_llm, per_process
 
 logger = logging.getLogger(__name__)
 
+# Max clauses scored at once for a single contract
+RISK_CLAUSE_CONCURRENCY = int(os.getenv("RISK_CLAUSE_CONCURRENCY", 8))
+
 class RiskState(TypedDict):
     doc_id: int
     doc_text: str
@@ -22,17 +25,12 @@ class RiskState(TypedDict):
     risk_findings: List[RiskFinding]
 
 class RiskAssessmentGraph:
+    # Shared per process through get_risk_graph()
     def __init__(self):
-        self.vector_service = VectorService(collection_name="clause_library")
-        self.openai_key = os.getenv("OPENAI_API_KEY")
-        self.mistral_key = os.getenv("MISTRAL_API_KEY")
-        
-        if self.mistral_key:
-            self.llm = ChatMistralAI(model="mistral-small-latest", temperature=0)
-        elif self.openai_key:
-            self.llm = ChatOpenAI(model="gpt-3.5-turbo", temperature=0)
-        else:
-            self.llm = None
+        self.vector_service = get_vector_service("clause_library")
+        self.provider = llm_provider()
+        self.llm = get_llm()
+        self.app = self.build_graph()
 
     def identify_clauses(self, state: RiskState):
         logger.info("Node: Identify Clauses")
@@ -69,12 +67,9 @@ class RiskAssessmentGraph:
             logger.error(f"Clause extraction failed: {e}")
             return {"extracted_clauses": {}}
 
-    def assess_risk(self, state: RiskState):
-        logger.info("Node: Assess Risk")
-        extracted = state["extracted_clauses"]
-        findings = []
-        
-        for clause_type, clause_text in extracted.items():
+    def _assess_clause(self, clause_type: str, clause_text: str) -> Optional[RiskFinding]:
+        # Any failure (Qdrant, LLM, parsing) only drops this clause
+        try:
             # Retrieve Standard Clause
             results = self.vector_service.search(query=clause_type, limit=1)
             standard_text = results[0].payload.get("text") if results else "Standard not found."
@@ -82,7 +77,7 @@ class RiskAssessmentGraph:
             if not self.llm:
                 # Mock Assessment
                 if "unlimited" in clause_text.lower():
-                     findings.append(RiskFinding(
+                    return RiskFinding(
                         clause_type=clause_type,
                         risk_score=9,
                         risk_level=RiskLevel.HIGH,
@@ -90,8 +85,8 @@ class RiskAssessmentGraph:
                         original_text=clause_text,
                         redline_text="Liability limited to 1x Fees.",
                         standard_clause=standard_text
-                    ))
-                continue
+                    )
+                return None
 
             # LLM Assessment
             parser = PydanticOutputParser(pydantic_object=RiskFinding)
@@ -111,23 +106,38 @@ class RiskAssessmentGraph:
                 """
             )
             chain = prompt | self.llm | parser
-            try:
+            with provider_slot(self.provider):
                 finding = chain.invoke({
                     "clause_type": clause_type,
                     "actual": clause_text,
                     "standard": standard_text,
                     "format_instructions": parser.get_format_instructions()
                 })
-                # Inject extras
-                finding.original_text = clause_text
-                finding.standard_clause = standard_text
-                
-                if finding.risk_score > 3: # Filter low risk
-                    findings.append(finding)
-            except Exception as e:
-                logger.error(f"Risk assessment failed for {clause_type}: {e}")
+            # Inject extras
+            finding.original_text = clause_text
+            finding.standard_clause = standard_text
+            
+            if finding.risk_score > 3: # Filter low risk
+                return finding
+        except Exception as e:
+            logger.error(f"Risk assessment failed for {clause_type}: {e}")
+        return None
+
+    def assess_risk(self, state: RiskState):
+        logger.info("Node: Assess Risk")
+        clauses = list(state["extracted_clauses"].items())
+        
+        # Clauses are independent, so score them concurrently; wall-clock is then
+        # roughly the slowest clause. provider_slot caps in-flight LLM calls per
+        # provider across the process. Results keep the extraction order.
+        workers = min(len(clauses), RISK_CLAUSE_CONCURRENCY)
+        if workers <= 1:
+            results = [self._assess_clause(clause_type, text) for clause_type, text in clauses]
+        else:
+            with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="risk-clause") as pool:
+                results = list(pool.map(lambda item: self._assess_clause(*item), clauses))
         
-        return {"risk_findings": findings}
+        return {"risk_findings": [f for f in results if f is not None]}
 
     def build_graph(self):
         workflow = StateGraph(RiskState)
@@ -141,11 +151,12 @@ class RiskAssessmentGraph:
         return workflow.compile()
 
     def run(self, doc_id: int, text: str):
-        app = self.build_graph()
-        result = app.invoke({
+        result = self.app.invoke({
             "doc_id": doc_id,
             "doc_text": text,
             "extracted_clauses": {},
             "risk_findings": []
         })
         return result["risk_findings"]
+
+get_risk_graph = per_process(RiskAssessmentGraph)
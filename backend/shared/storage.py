@@ -0,0 +1,98 @@
+import os
+import hashlib
+import tempfile
+import logging
+from datetime import timedelta
+from typing import Tuple
+from minio import Minio
+
+logger = logging.getLogger(__name__)
+
+MINIO_ENDPOINT = os.getenv("MINIO_ENDPOINT", "minio:9000")
+MINIO_ACCESS_KEY = os.getenv("MINIO_ACCESS_KEY", "minioadmin")
+MINIO_SECRET_KEY = os.getenv("MINIO_SECRET_KEY", "minioadmin")
+MINIO_BUCKET = os.getenv("MINIO_BUCKET", "documents")
+MINIO_SECURE = False
+# Host clients use for presigned download links (the signature covers the host,
+# so it must be the one browsers reach, not the in-cluster name)
+MINIO_PUBLIC_ENDPOINT = os.getenv("MINIO_PUBLIC_ENDPOINT", MINIO_ENDPOINT)
+MINIO_REGION = os.getenv("MINIO_REGION", "us-east-1")
+# Multipart part size for streamed uploads (S3 minimum is 5 MiB). Memory per
+# in-flight upload is bounded by this, not by the file size.
+MINIO_PART_SIZE = max(5 * 1024 * 1024, int(os.getenv("MINIO_PART_SIZE", 10 * 1024 * 1024)))
+
+minio_client = Minio(
+    MINIO_ENDPOINT.replace("http://", "").replace("https://", ""), # Minio client expects host:port
+    access_key=MINIO_ACCESS_KEY,
+    secret_key=MINIO_SECRET_KEY,
+    secure=MINIO_SECURE
+)
+
+# Signs URLs only; with the region given it never makes a request itself
+presign_client = Minio(
+    MINIO_PUBLIC_ENDPOINT.replace("http://", "").replace("https://", ""),
+    access_key=MINIO_ACCESS_KEY,
+    secret_key=MINIO_SECRET_KEY,
+    secure=MINIO_PUBLIC_ENDPOINT.startswith("https://"),
+    region=MINIO_REGION
+)
+
+def download_to_tmp(s3_key: str) -> str:
+    # A new file per call: exact duplicates share an s3_key, and concurrent
+    # re-parses must not overwrite or delete each other's copy. The caller
+    # removes it.
+    with tempfile.NamedTemporaryFile(delete=False, suffix=os.path.splitext(s3_key)[1]) as f:
+        local_path = f.name
+    try:
+        minio_client.fget_object(MINIO_BUCKET, s3_key, local_path)
+    except Exception:
+        os.remove(local_path)
+        raise
+    return local_path
+
+_bucket_ready = False
+
+def ensure_bucket():
+    # Checked once per process (API startup), not on every upload
+    global _bucket_ready
+    if _bucket_ready:
+        return
+    if not minio_client.bucket_exists(MINIO_BUCKET):
+        minio_client.make_bucket(MINIO_BUCKET)
+    _bucket_ready = True
+
+class HashingReader:
+    """File wrapper that SHA-256 hashes bytes as the uploader reads them."""
+
+    def __init__(self, stream):
+        self.stream = stream
+        self.sha256 = hashlib.sha256()
+        self.size = 0
+
+    def read(self, size: int = -1) -> bytes:
+        data = self.stream.read(size)
+        self.sha256.update(data)
+        self.size += len(data)
+        return data
+
+def upload_stream(s3_key: str, stream, content_type: str = None) -> Tuple[str, int]:
+    """Blocking: streams a file object to MinIO as a multipart upload of
+    MINIO_PART_SIZE parts, without knowing (or buffering) its full length.
+    Returns the content's SHA-256 hex digest and size, computed in the same pass."""
+    ensure_bucket()
+    reader = HashingReader(stream)
+    minio_client.put_object(
+        MINIO_BUCKET,
+        s3_key,
+        reader,
+        length=-1,
+        part_size=MINIO_PART_SIZE,
+        content_type=content_type or "application/octet-stream"
+    )
+    return reader.sha256.hexdigest(), reader.size
+
+def remove_object(s3_key: str):
+    minio_client.remove_object(MINIO_BUCKET, s3_key)
+
+def presigned_url(s3_key: str, expires: timedelta) -> str:
+    return presign_client.presigned_get_object(MINIO_BUCKET, s3_key, expires=expires)
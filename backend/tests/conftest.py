@@ -4,6 +4,9 @@ import os
 # Add backend directory to path so imports like 'shared.database' work
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
+# The app's own engines (sync and async) use the test database too
+os.environ.setdefault("DATABASE_URL", "sqlite:///./test.db")
+
 import pytest
 from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker
@@ -0,0 +1,60 @@
+import asyncio
+
+import httpx
+import pytest
+from passlib.context import CryptContext
+
+import shared.auth as auth
+from api.main import app
+from shared.database import SessionLocal, dispose_async_engine
+from shared.models import Job, JobStatus, User
+
+
+@pytest.fixture
+def committed(db_engine, monkeypatch):
+    # The endpoints read through their own (async) sessions, so the rows must
+    # be committed rather than live in the db fixture's rolled-back transaction.
+    # bcrypt is deliberately slow; a cheaper scheme keeps the test fast.
+    monkeypatch.setattr(auth, "pwd_context", CryptContext(schemes=["sha256_crypt"]))
+    session = SessionLocal()
+    session.add(User(username="reader", email="reader@example.com",
+                     hashed_password=auth.get_password_hash("secret"), role="admin"))
+    session.add(Job(id="job-read-1", kind="analyze", status=JobStatus.COMPLETED, result={"findings_count": 2}))
+    session.commit()
+    yield
+    session.query(User).delete()
+    session.query(Job).delete()
+    session.commit()
+    session.close()
+
+
+def _requests(*calls):
+    async def run():
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+            responses = [await call(client) for call in calls]
+        # Each asyncio.run has its own loop; pooled connections must not outlive it
+        await dispose_async_engine()
+        return responses
+    return asyncio.run(run())
+
+
+def test_token_and_authenticated_route(committed):
+    login, wrong = _requests(
+        lambda c: c.post("/token", data={"username": "reader", "password": "secret"}),
+        lambda c: c.post("/token", data={"username": "reader", "password": "nope"}),
+    )
+    assert login.status_code == 200 and wrong.status_code == 401
+
+    token = login.json()["access_token"]
+    [created] = _requests(lambda c: c.post(
+        "/users", json={"username": "second", "email": "s@example.com", "password": "x"},
+        headers={"Authorization": f"Bearer {token}"}
+    ))
+    assert created.status_code == 200
+
+
+def test_job_status(committed):
+    found, missing = _requests(lambda c: c.get("/jobs/job-read-1"), lambda c: c.get("/jobs/unknown"))
+    assert found.status_code == 200
+    assert (found.json()["status"], found.json()["result"]) == ("COMPLETED", {"findings_count": 2})
+    assert missing.status_code == 404
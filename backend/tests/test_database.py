@@ -0,0 +1,38 @@
+import pytest
+from sqlalchemy import create_engine, text
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+
+from shared.database import DB_MAX_CONNECTIONS, InstrumentedQueuePool, engine_options
+from shared.metrics import db_pool_checkouts, db_pool_in_use, db_pool_timeouts, db_pool_wait
+
+
+def test_pool_records_checkouts_waits_and_timeouts():
+    engine = create_engine(
+        "sqlite://", poolclass=InstrumentedQueuePool, pool_logging_name="test",
+        pool_size=1, max_overflow=0, pool_timeout=0.05
+    )
+    conn = engine.connect()
+    conn.execute(text("SELECT 1"))
+    assert db_pool_in_use.values[("test",)] == 1
+    with pytest.raises(PoolTimeoutError):
+        engine.connect()
+    conn.close()
+
+    assert db_pool_checkouts.values[("test",)] == 1
+    assert db_pool_timeouts.values[("test",)] == 1
+    assert db_pool_in_use.values[("test",)] == 0
+    # Both attempts are timed, the failed one for the full pool_timeout
+    assert sum(db_pool_wait.series[("test",)][:-1]) == 2
+    assert db_pool_wait.series[("test",)][-1] >= 0.05
+
+
+def test_engine_options_for_postgres():
+    sync = engine_options("postgresql://db/app", "sync")
+    assert sync["poolclass"] is InstrumentedQueuePool
+    assert sync["pool_pre_ping"] is True
+    assert sync["connect_args"]["options"].startswith("-c statement_timeout=")
+    async_ = engine_options("postgresql+asyncpg://db/app", "async", async_driver=True)
+    assert "statement_timeout" in async_["connect_args"]["server_settings"]
+    # Both API pools together stay within one process budget
+    limit = lambda o: o["pool_size"] + o["max_overflow"]
+    assert limit(sync) + limit(async_) == DB_MAX_CONNECTIONS
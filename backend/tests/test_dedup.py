@@ -0,0 +1,41 @@
+from shared.dedup import DocumentDedup
+from shared.models import Document, DocumentStatus
+from shared.parties import PartyIndex
+
+CONTRACT = {"doc_type": "contract", "data": {"party_a": {"value": "Our Company"}, "party_b": {"value": "Hooli Inc."}}}
+
+
+def _upload(db, key, sha256, **fields):
+    doc = Document(filename=f"{key}.pdf", s3_key=key, content_sha256=sha256, **fields)
+    db.add(doc)
+    db.flush()
+    return doc
+
+
+def test_duplicate_of_completed_document_reuses_result(db):
+    original = _upload(db, "dedup-a", "h1", status=DocumentStatus.COMPLETED, extraction_result=CONTRACT)
+    _upload(db, "dedup-failed", "h2", status=DocumentStatus.FAILED)
+
+    originals = DocumentDedup.find_originals(db, ["h1", "h2"])
+    assert originals == {"h1": original}
+
+    dup = _upload(db, "dedup-b", "h1", status=DocumentStatus.PENDING)
+    DocumentDedup.link(db, dup, originals["h1"])
+
+    assert (dup.s3_key, dup.status, dup.extraction_result) == ("dedup-a", DocumentStatus.COMPLETED, CONTRACT)
+    assert DocumentDedup.content_id(db, dup.id) == original.id
+    assert PartyIndex.find_contract(db, "Hooli")[0] == dup.id
+
+
+def test_duplicate_of_pending_document_completes_with_it(db):
+    original = _upload(db, "dedup-c", "h3", status=DocumentStatus.PROCESSING)
+    dup = _upload(db, "dedup-d", "h3", status=DocumentStatus.PENDING)
+    DocumentDedup.link(db, dup, original)
+    assert dup.status == DocumentStatus.PENDING
+
+    original.extraction_result = CONTRACT
+    original.status = DocumentStatus.COMPLETED
+    DocumentDedup.propagate(db, original)
+
+    assert (dup.status, dup.extraction_result) == (DocumentStatus.COMPLETED, CONTRACT)
+    assert DocumentDedup.stats(db)["duplicates"] == 1
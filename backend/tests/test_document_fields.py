@@ -0,0 +1,40 @@
+from datetime import date
+
+from shared.document_fields import apply_document_fields, document_fields, parse_amount, parse_date
+from shared.models import Document
+
+
+def test_invoice_fields_are_typed_and_normalised():
+    fields = document_fields({"doc_type": "invoice", "data": {
+        "vendor_name": {"value": "ACME Corp.", "evidence": None},
+        "total_amount": {"value": "$12,500.00"},
+        "invoice_date": {"value": "March 5, 2026"},
+    }})
+    assert fields == {
+        "doc_type": "invoice", "vendor_name": "ACME Corp.", "vendor_normalized": "acme",
+        "total_amount": 12500.0, "currency": "USD", "document_date": date(2026, 3, 5),
+    }
+
+
+def test_unparseable_values_become_null():
+    assert parse_date("sometime next week") is None
+    assert parse_amount("n/a") is None
+    assert document_fields(None)["doc_type"] is None
+
+
+def test_query_by_typed_columns(db):
+    for i, amount in enumerate([5000.0, 15000.0, 25000.0]):
+        doc = Document(filename=f"inv{i}.pdf", extraction_result={"doc_type": "invoice", "data": {
+            "vendor_name": "Acme Inc", "total_amount": amount, "invoice_date": f"2026-03-0{i + 1}",
+        }})
+        apply_document_fields(doc)
+        db.add(doc)
+    db.flush()
+
+    large = db.query(Document.filename).filter(
+        Document.doc_type == "invoice",
+        Document.vendor_normalized == "acme",
+        Document.document_date >= date(2026, 3, 1),
+        Document.total_amount > 10000
+    ).order_by(Document.id).all()
+    assert [r.filename for r in large] == ["inv1.pdf", "inv2.pdf"]
@@ -0,0 +1,75 @@
+import numpy as np
+import pytest
+
+from shared.embedding_cache import SQLiteEmbeddingCache
+
+
+def test_key_ignores_whitespace_but_not_model(tmp_path):
+    cache = SQLiteEmbeddingCache("model-a", path=str(tmp_path / "cache.db"))
+    other = SQLiteEmbeddingCache("model-b", path=str(tmp_path / "cache.db"))
+
+    assert cache.key("Net  30\ndays") == cache.key(" Net 30 days ")
+    assert cache.key("Net 30 days") != other.key("Net 30 days")
+
+
+def test_roundtrip_and_lru_eviction(tmp_path):
+    cache = SQLiteEmbeddingCache("model-a", path=str(tmp_path / "cache.db"), max_entries=2)
+    vec = np.arange(4, dtype=np.float32)
+
+    cache.put_many({"a": vec, "b": vec + 1})
+    # Touch "a" so "b" becomes the least recently used entry
+    assert np.array_equal(cache.get_many(["a"])["a"], vec)
+    cache.put_many({"c": vec + 2})
+
+    found = cache.get_many(["a", "b", "c"])
+    assert set(found) == {"a", "c"}
+
+
+def test_replacing_a_key_does_not_count_towards_the_limit(tmp_path):
+    cache = SQLiteEmbeddingCache("model-a", path=str(tmp_path / "cache.db"), max_entries=2)
+    vec = np.arange(4, dtype=np.float32)
+
+    cache.put_many({"a": vec})
+    cache.put_many({"a": vec + 1})
+    cache.put_many({"b": vec})
+
+    found = cache.get_many(["a", "b"])
+    assert set(found) == {"a", "b"}
+    assert np.array_equal(found["a"], vec + 1)
+
+
+class _FakeRedis:
+    def __init__(self):
+        self.hashes = {}
+
+    def pipeline(self):
+        return self
+
+    def hincrby(self, name, field, amount):
+        counts = self.hashes.setdefault(name, {})
+        counts[field] = counts.get(field, 0) + amount
+
+    hincrbyfloat = hincrby
+
+    def execute(self):
+        pass
+
+    def hgetall(self, name):
+        return {k.encode(): str(v).encode() for k, v in self.hashes.get(name, {}).items()}
+
+
+def test_counters_are_shared_and_kept_per_model(tmp_path, monkeypatch):
+    from shared.embedding_cache import EmbeddingCache, embedding_cache_stats
+
+    monkeypatch.setattr(embedding_cache_stats.counters, "_redis", _FakeRedis())
+    path = str(tmp_path / "cache.db")
+    SQLiteEmbeddingCache("model-a", path=path).record(hits=3, misses=1, encode_seconds=0.5)
+    SQLiteEmbeddingCache("model-b", path=path).record(hits=0, misses=2, encode_seconds=1.0)
+
+    stats = embedding_cache_stats.snapshot("model-a")
+    assert stats["hits"] == 3
+    assert stats["misses"] == 1
+    assert stats["encode_seconds_saved"] == 1.5
+    assert embedding_cache_stats.snapshot("model-b")["hits"] == 0
+    with pytest.raises(TypeError):
+        EmbeddingCache("model-a")
@@ -0,0 +1,85 @@
+from types import SimpleNamespace
+
+from shared.extraction import ExtractionGraph
+
+
+class _FakeVectorService:
+    def __init__(self, chunks, search_hits=None):
+        self.chunks = chunks
+        self.search_hits = search_hits or {}
+        self.batches = []
+
+    def scroll_document(self, doc_id, max_page=None, limit=1000):
+        return list(self.chunks)
+
+    def search_batch(self, queries, limit=5, doc_id=None):
+        self.batches.append(queries)
+        return [self.search_hits.get(q, []) for q in queries]
+
+
+def _point(point_id, text, page_number=1, score=None):
+    return SimpleNamespace(id=point_id, payload={"text": text, "page_number": page_number}, score=score)
+
+
+def _graph(vector_service):
+    graph = ExtractionGraph.__new__(ExtractionGraph)
+    graph.vector_service = vector_service
+    return graph
+
+
+def test_values_in_the_first_pages_link_without_vector_search():
+    vectors = _FakeVectorService([
+        _point("p2", "Total due: $1,000.00", page_number=2),
+        _point("p1", "Invoice from ACME   Corp\nfor services", page_number=1),
+    ])
+    data = {"vendor_name": "Acme Corp", "total_amount": 1000.0}
+
+    result = _graph(vectors).link_evidence({"doc_id": 7, "extracted_data": data})
+
+    output = result["final_output"]
+    assert output["vendor_name"]["evidence"]["chunk_id"] == "p1"
+    assert output["total_amount"]["evidence"] == {
+        "chunk_id": "p2", "text": "Total due: $1,000.00", "page_number": 2, "score": 1.0, "match": "exact"
+    }
+    assert vectors.batches == []
+    assert result["evidence_stats"] == {"fields": 2, "exact_matches": 2, "vector_searches": 0, "vector_calls": 1}
+
+
+def test_unmatched_values_share_one_batch_search():
+    hit = _point("p9", "Payment within forty-five days", page_number=4, score=0.82)
+    vectors = _FakeVectorService(
+        [_point("p1", "Invoice from Acme Corp")],
+        search_hits={"payment_terms: Net 45 days": [hit]},
+    )
+    data = {"vendor_name": "Acme Corp", "payment_terms": "Net 45 days", "invoice_number": "INV-2207", "line_items": [{"sku": "A"}]}
+
+    result = _graph(vectors).link_evidence({"doc_id": 7, "extracted_data": data})
+
+    output = result["final_output"]
+    assert vectors.batches == [["payment_terms: Net 45 days", "invoice_number: INV-2207"]]
+    assert output["payment_terms"]["evidence"]["match"] == "vector"
+    assert output["payment_terms"]["evidence"]["score"] == 0.82
+    assert output["invoice_number"]["evidence"] is None
+    assert output["line_items"] == {"value": [{"sku": "A"}], "evidence": None}
+    assert result["evidence_stats"] == {"fields": 3, "exact_matches": 1, "vector_searches": 2, "vector_calls": 2}
+
+
+def test_numbers_inside_larger_numbers_are_not_exact_evidence():
+    vectors = _FakeVectorService(
+        [_point("p1", "Subtotal 1000 units, total due $2,100.00.")],
+        search_hits={"total_amount: 100.0": [_point("p3", "Amount payable: 100.00", page_number=3, score=0.71)]},
+    )
+
+    result = _graph(vectors).link_evidence({"doc_id": 7, "extracted_data": {"total_amount": 100.0}})
+
+    evidence = result["final_output"]["total_amount"]["evidence"]
+    assert (evidence["chunk_id"], evidence["match"]) == ("p3", "vector")
+    assert result["evidence_stats"]["exact_matches"] == 0
+
+
+def test_trailing_punctuation_still_matches_exactly():
+    vectors = _FakeVectorService([_point("p1", "Total due: $2,100.00.")])
+
+    result = _graph(vectors).link_evidence({"doc_id": 7, "extracted_data": {"total_amount": 2100.0}})
+
+    assert result["final_output"]["total_amount"]["evidence"]["match"] == "exact"
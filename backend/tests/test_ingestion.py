@@ -0,0 +1,81 @@
+from shared.ingestion import ChunkingService, Page
+
+
+def test_iter_chunks_is_lazy_over_pages():
+    consumed = []
+
+    def pages():
+        for n in range(1, 4):
+            consumed.append(n)
+            yield Page(page_number=n, text=f"page {n} " * 100)
+
+    chunks = ChunkingService.iter_chunks(7, pages(), metadata={"filename": "a.pdf", "type": "text"})
+    first = next(chunks)
+
+    assert first.page_number == 1
+    assert first.metadata == {"filename": "a.pdf", "type": "text"}
+    assert consumed == [1]
+
+
+def test_chunk_document_matches_streaming_chunker():
+    pages = [Page(page_number=1, text="word " * 300), Page(page_number=2, text="")]
+
+    listed = ChunkingService.chunk_document(1, pages)
+    streamed = list(ChunkingService.iter_chunks(1, pages))
+
+    assert [(c.text, c.page_number) for c in listed] == [(c.text, c.page_number) for c in streamed]
+    assert all(c.page_number == 1 for c in listed)
+
+
+def test_chunk_ids_are_deterministic():
+    pages = [Page(page_number=1, text="word " * 300), Page(page_number=2, text="other " * 300)]
+
+    first = ChunkingService.chunk_document(7, pages)
+    again = ChunkingService.chunk_document(7, pages)
+
+    assert [c.id for c in first] == [c.id for c in again]
+    assert len({c.id for c in first}) == len(first)
+    assert not {c.id for c in first} & {c.id for c in ChunkingService.chunk_document(8, pages)}
+
+
+def _write_pdf(path, page_count):
+    from reportlab.pdfgen import canvas
+
+    pdf = canvas.Canvas(str(path))
+    for n in range(1, page_count + 1):
+        pdf.drawString(72, 720, f"Clause {n} of the agreement")
+        pdf.showPage()
+    pdf.save()
+
+
+def test_parallel_parsing_matches_serial_order(tmp_path):
+    from shared import ingestion
+    from shared.ingestion import ParsingService
+
+    path = tmp_path / "long.pdf"
+    _write_pdf(path, 20)
+    try:
+        parallel = list(ParsingService._iter_parallel(str(path), 20, 2))
+    finally:
+        ingestion._reset_parse_pool()
+    serial = list(ParsingService.iter_pages(str(path), workers=1))
+
+    assert [p.page_number for p in parallel] == list(range(1, 21))
+    assert [(p.page_number, p.text) for p in parallel] == [(p.page_number, p.text) for p in serial]
+    assert parallel[19].text == "Clause 20 of the agreement"
+
+
+def test_daemon_process_parses_serially(tmp_path, monkeypatch):
+    import multiprocessing
+    from shared import ingestion
+    from shared.ingestion import ParsingService
+
+    path = tmp_path / "long.pdf"
+    _write_pdf(path, 4)
+    monkeypatch.setattr(ingestion, "PDF_PARALLEL_MIN_PAGES", 2)
+    monkeypatch.setattr(multiprocessing.current_process(), "daemon", True)
+    monkeypatch.setattr(ParsingService, "_iter_parallel", lambda *args: (_ for _ in ()).throw(AssertionError("pool used")))
+
+    pages = list(ParsingService.iter_pages(str(path), workers=2))
+
+    assert [p.page_number for p in pages] == [1, 2, 3, 4]
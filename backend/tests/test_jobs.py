@@ -0,0 +1,100 @@
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from shared.database import Base
+from shared.jobs import submit_batch_job, submit_export_job, submit_job, run_job
+from shared.models import Document, Finding, JobStatus, ReviewDecision
+from shared.reports import export_watermark
+
+
+@pytest.fixture
+def db():
+    # run_job commits and rolls back itself, which the shared fixture's outer
+    # transaction cannot contain, so these tests get their own database
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine)
+    session = sessionmaker(bind=engine)()
+    yield session
+    session.close()
+    engine.dispose()
+
+
+def _contract(db, key):
+    doc = Document(filename="msa.pdf", s3_key=key, extraction_result={"doc_type": "contract", "data": {}})
+    db.add(doc)
+    db.commit()
+    return doc
+
+
+def test_duplicate_submission_reuses_job(db):
+    doc = _contract(db, "jobs-dedup.pdf")
+
+    first, created = submit_job(db, "risk_assessment", doc)
+    second, created_again = submit_job(db, "risk_assessment", doc)
+
+    assert created and not created_again
+    assert second.id == first.id
+
+
+def test_new_version_or_force_creates_new_job(db):
+    doc = _contract(db, "jobs-version.pdf")
+    first, _ = submit_job(db, "analyze", doc)
+
+    forced, created = submit_job(db, "analyze", doc, force=True)
+    assert created and forced.id != first.id
+
+    doc.extraction_result = {"doc_type": "contract", "data": {"party_b": {"value": "Acme"}}}
+    db.commit()
+    reprocessed, created = submit_job(db, "analyze", doc)
+    assert created and reprocessed.id != forced.id
+
+
+def test_failed_job_can_be_resubmitted(db):
+    doc = _contract(db, "jobs-failed.pdf")
+    job, _ = submit_job(db, "analyze", doc)
+
+    def boom(_job):
+        raise RuntimeError("provider down")
+
+    try:
+        run_job(db, job.id, boom)
+    except RuntimeError:
+        pass
+
+    assert job.status == JobStatus.FAILED
+    retry, created = submit_job(db, "analyze", doc)
+    assert created and retry.id != job.id
+
+
+def test_export_is_rebuilt_when_its_data_changes(db):
+    doc = _contract(db, "jobs-export.pdf")
+    finding = Finding(document_id=doc.id, finding_type="MISMATCH", severity="HIGH", description="Price differs")
+    db.add(finding)
+    db.commit()
+    params = {"created_from": None, "created_to": None, "doc_type": None, "format": "csv"}
+
+    first, _ = submit_export_job(db, params, export_watermark(db))
+    again, created = submit_export_job(db, params, export_watermark(db))
+    assert not created and again.id == first.id
+
+    db.add(ReviewDecision(finding_id=finding.id, user_id="alice", decision="APPROVE"))
+    db.commit()
+    reviewed, created = submit_export_job(db, params, export_watermark(db))
+    assert created and reviewed.id != first.id
+    assert export_watermark(db, doc_type="invoice") == {"findings": 0, "last_finding_id": None, "last_decision_id": None}
+
+
+def test_batch_is_new_when_a_document_is_reprocessed(db):
+    first_doc, second_doc = _contract(db, "jobs-batch-1.pdf"), _contract(db, "jobs-batch-2.pdf")
+    ids = [second_doc.id, first_doc.id]
+
+    first, _ = submit_batch_job(db, "reconcile", ids)
+    again, created = submit_batch_job(db, "reconcile", list(reversed(ids)))
+    assert not created and again.id == first.id
+
+    second_doc.extraction_result = {"doc_type": "invoice", "data": {"total_amount": {"value": 10}}}
+    db.commit()
+    reprocessed, created = submit_batch_job(db, "reconcile", ids)
+    assert created and reprocessed.id != first.id
+    assert reprocessed.params == {"document_ids": sorted(ids)}
@@ -0,0 +1,48 @@
+import threading
+import time
+
+from shared import llm
+from shared.llm import provider_slot
+from shared.risk import RiskAssessmentGraph
+
+
+def test_provider_slot_caps_concurrent_calls(monkeypatch):
+    monkeypatch.setitem(llm.LLM_MAX_CONCURRENCY, "test-provider", 2)
+    monkeypatch.setattr(llm, "_semaphores", {})
+    lock = threading.Lock()
+    active, peak = 0, 0
+
+    def call():
+        nonlocal active, peak
+        with provider_slot("test-provider"):
+            with lock:
+                active += 1
+                peak = max(peak, active)
+            time.sleep(0.05)
+            with lock:
+                active -= 1
+
+    threads = [threading.Thread(target=call) for _ in range(6)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert peak == 2
+
+
+def test_assess_risk_keeps_clause_order():
+    graph = RiskAssessmentGraph.__new__(RiskAssessmentGraph)
+    delays = {"Liability Cap": 0.06, "Payment Terms": 0.0, "Indemnification": 0.03, "Termination": 0.0}
+
+    def assess(clause_type, clause_text):
+        # Earlier clauses finish last
+        time.sleep(delays[clause_type])
+        return None if clause_type == "Termination" else f"{clause_type}: {clause_text}"
+
+    graph._assess_clause = assess
+    clauses = {"Liability Cap": "unlimited", "Payment Terms": "Net 60", "Indemnification": "mutual", "Termination": "30 days"}
+
+    findings = graph.assess_risk({"extracted_clauses": clauses})["risk_findings"]
+
+    assert findings == ["Liability Cap: unlimited", "Payment Terms: Net 60", "Indemnification: mutual"]
@@ -0,0 +1,73 @@
+import pytest
+from langchain_core.outputs import Generation
+
+from shared.llm_cache import SQLiteResponseCache
+from shared.redis_counters import RedisCounters
+
+
+def test_hit_after_update_and_key_includes_llm_string(tmp_path):
+    cache = SQLiteResponseCache(path=str(tmp_path / "llm.db"))
+    cache.update("prompt", "mistral-small temperature=0", [Generation(text="Net 30")])
+
+    hit = cache.lookup("prompt", "mistral-small temperature=0")
+    assert [g.text for g in hit] == ["Net 30"]
+    assert cache.lookup("prompt", "mistral-small temperature=0.7") is None
+
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"]) == (1, 1)
+
+
+def test_expired_entries_miss(tmp_path):
+    cache = SQLiteResponseCache(path=str(tmp_path / "llm.db"), ttl_seconds=-1)
+    cache.update("prompt", "llm", [Generation(text="stale")])
+
+    assert cache.lookup("prompt", "llm") is None
+
+
+class _FakeRedis:
+    def __init__(self):
+        self.hashes = {}
+
+    def pipeline(self):
+        return self
+
+    def execute(self):
+        pass
+
+    def hincrby(self, name, field, amount):
+        self.hincrbyfloat(name, field, amount)
+
+    def hincrbyfloat(self, name, field, amount):
+        counts = self.hashes.setdefault(name, {})
+        counts[field] = counts.get(field, 0) + amount
+
+    def hgetall(self, name):
+        return {k.encode(): str(v).encode() for k, v in self.hashes.get(name, {}).items()}
+
+
+def test_lookups_are_counted_in_the_shared_stats(tmp_path, monkeypatch):
+    from shared.llm_cache import ResponseCache, llm_cache_stats
+
+    # Fresh counters, without lookups other tests left pending
+    counters = RedisCounters()
+    counters._redis = _FakeRedis()
+    monkeypatch.setattr(llm_cache_stats, "counters", counters)
+    cache = SQLiteResponseCache(path=str(tmp_path / "llm.db"))
+    cache.update("prompt", "llm", [Generation(text="Net 30")])
+    cache.lookup("prompt", "llm")
+    cache.lookup("other prompt", "llm")
+
+    assert llm_cache_stats.snapshot() == {"hits": 1, "misses": 1, "hit_rate": 0.5}
+    with pytest.raises(TypeError):
+        ResponseCache()
+
+
+def test_oldest_entries_are_evicted_past_max_entries(tmp_path):
+    cache = SQLiteResponseCache(path=str(tmp_path / "llm.db"), max_entries=2)
+    cache.update("first", "llm", [Generation(text="1")])
+    cache.update("first", "llm", [Generation(text="1 again")])
+    cache.update("second", "llm", [Generation(text="2")])
+    cache.update("third", "llm", [Generation(text="3")])
+
+    assert cache.lookup("first", "llm") is None
+    assert [g.text for g in cache.lookup("third", "llm")] == ["3"]
@@ -11,3 +11,8 @@ def test_upload_unauthorized(client):
     # Should be 403 or 401 depending on how RoleChecker is implemented without token
     # RoleChecker usually expects a user dependency. If user dependency fails (no token), it raises 401.
     assert response.status_code == 401
+
+def test_batch_upload_unauthorized(client):
+    files = [('files', ('a.pdf', b"content")), ('files', ('b.pdf', b"content"))]
+    response = client.post("/upload/batch", files=files)
+    assert response.status_code == 401
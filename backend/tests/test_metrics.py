@@ -0,0 +1,40 @@
+import asyncio
+
+import httpx
+from fastapi import FastAPI
+
+from shared.metrics import Histogram, http_request_duration, render_metrics
+from shared.middleware import RequestLoggerMiddleware
+
+
+def test_quantiles_interpolate_within_buckets():
+    h = Histogram("t_seconds", "test", ("route", "status"), buckets=(0.1, 1.0),
+                  quantile_labels=("route",), registry=[])
+    for value, status in [(0.05, 200)] * 8 + [(0.5, 200), (0.5, 500)]:
+        h.observe(value, ("/a", status))
+
+    q = h.quantiles()[("/a",)]
+    assert q[0.5] == 0.1 * 5 / 8
+    assert 0.1 < q[0.95] < 1.0
+    text = "\n".join(h.render())
+    assert 't_seconds_bucket{route="/a",status="200",le="+Inf"} 9' in text
+    assert 't_seconds_quantile{route="/a",quantile="0.5"}' in text
+
+
+def test_middleware_labels_by_route_template():
+    app = FastAPI()
+
+    @app.get("/things/{thing_id}")
+    def thing(thing_id: int):
+        return {"id": thing_id}
+
+    app.add_middleware(RequestLoggerMiddleware)
+
+    async def requests():
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+            for i in range(3):
+                assert (await client.get(f"/things/{i}")).status_code == 200
+    asyncio.run(requests())
+
+    assert ("GET", "/things/{thing_id}") in http_request_duration.quantiles()
+    assert 'route="/things/{thing_id}",status="200",le="+Inf"} 3' in render_metrics()
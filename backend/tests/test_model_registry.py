@@ -0,0 +1,30 @@
+from shared import model_registry
+
+
+def test_model_loaded_once_per_process(monkeypatch):
+    loads = []
+
+    def fake_load(name):
+        loads.append(name)
+        return object()
+
+    monkeypatch.setattr(model_registry, "_load", fake_load)
+    model_registry._reset_after_fork()
+
+    first = model_registry.get_embedding_model("test-model")
+    second = model_registry.get_embedding_model("test-model")
+
+    assert first is second
+    assert loads == ["test-model"]
+
+
+def test_registry_resets_after_fork(monkeypatch):
+    monkeypatch.setattr(model_registry, "_load", lambda name: object())
+    model_registry._reset_after_fork()
+    parent_model = model_registry.get_embedding_model("test-model")
+
+    # Simulate running in a forked child
+    monkeypatch.setattr(model_registry, "_owner_pid", -1)
+    child_model = model_registry.get_embedding_model("test-model")
+
+    assert child_model is not parent_model
@@ -0,0 +1,62 @@
+import pytest
+
+from shared.ingestion import Page
+from shared.models import Document, DocumentPage
+from shared.page_store import PageStore
+
+
+def test_pages_roundtrip_and_prefix(db):
+    doc = Document(filename="msa.pdf", s3_key="msa-roundtrip.pdf")
+    db.add(doc)
+    db.flush()
+
+    pages = [Page(page_number=n, text=f"Page {n} " + "x" * 100) for n in range(1, 6)]
+    streamed = list(PageStore.save_pages(db, doc.id, iter(pages)))
+
+    assert streamed == pages
+    assert PageStore.is_current(db, doc.id)
+    assert list(PageStore.iter_pages(db, doc.id)) == pages
+    assert PageStore.load_text(db, doc.id) == "\n".join(p.text for p in pages)
+    assert PageStore.load_text(db, doc.id, max_chars=150) == "\n".join(p.text for p in pages)[:150]
+
+
+def test_stale_parser_version_is_not_current(db):
+    doc = Document(filename="old.pdf", s3_key="old-parser.pdf")
+    db.add(doc)
+    db.flush()
+    list(PageStore.save_pages(db, doc.id, iter([Page(page_number=1, text="hello")])))
+
+    db.query(DocumentPage).filter(DocumentPage.document_id == doc.id).update({"parser_version": "pdfplumber-0.0/0"})
+
+    assert not PageStore.is_current(db, doc.id)
+
+
+def test_pages_are_committed_in_batches_and_on_parsed_waits_for_the_parser(db, monkeypatch):
+    from shared import page_store
+
+    monkeypatch.setattr(page_store, "FLUSH_EVERY", 2)
+    doc = Document(filename="big.pdf", s3_key="batched-pages.pdf")
+    db.add(doc)
+    db.flush()
+
+    def parser_failing_after(n):
+        for number in range(1, n + 1):
+            yield Page(page_number=number, text=f"Page {number}")
+        raise RuntimeError("parser crashed")
+
+    commits, parsed = [], []
+
+    def commit():
+        db.flush()
+        commits.append(db.query(DocumentPage).filter(DocumentPage.document_id == doc.id).count())
+
+    monkeypatch.setattr(db, "commit", commit)
+    with pytest.raises(RuntimeError):
+        list(PageStore.save_pages(db, doc.id, parser_failing_after(3), on_parsed=lambda: parsed.append(True)))
+    assert commits == [2] and parsed == []
+
+    # The worker rolls back a failed run; here the unflushed page is dropped
+    db.expunge_all()
+    commits.clear()
+    list(PageStore.save_pages(db, doc.id, iter([Page(page_number=1, text="a")]), on_parsed=lambda: parsed.append(True)))
+    assert commits == [1] and parsed == [True]
@@ -0,0 +1,47 @@
+from datetime import datetime, timedelta
+
+import pytest
+from fastapi import HTTPException
+
+from api.main import list_documents
+from shared.models import Document, DocumentStatus
+
+
+def _seed(db):
+    base = datetime(2026, 1, 1)
+    for i in range(7):
+        db.add(Document(
+            filename=f"doc{i}.pdf",
+            status=DocumentStatus.COMPLETED if i % 2 else DocumentStatus.PENDING,
+            doc_type="invoice" if i < 4 else "contract",
+            # Two documents share each timestamp, so id breaks the tie
+            created_at=base + timedelta(minutes=i // 2),
+            extraction_result={"doc_type": "invoice" if i < 4 else "contract"}
+        ))
+    db.flush()
+
+
+def test_keyset_pages_cover_every_document_once(db):
+    _seed(db)
+    seen, cursor = [], None
+    while True:
+        page = list_documents(limit=3, cursor=cursor, db=db)
+        seen.extend(d["id"] for d in page["documents"])
+        cursor = page["next_cursor"]
+        if cursor is None:
+            break
+
+    expected = [d.id for d in db.query(Document).order_by(Document.created_at.desc(), Document.id.desc())]
+    assert seen == expected
+    assert page["total"] == 7 and page["total_is_estimate"] is False
+
+
+def test_filters_and_bad_cursor(db):
+    _seed(db)
+    page = list_documents(limit=10, doc_type="invoice", status=DocumentStatus.COMPLETED, db=db)
+    assert [d["filename"] for d in page["documents"]] == ["doc3.pdf", "doc1.pdf"]
+    assert page["total"] == 2 and page["next_cursor"] is None
+
+    with pytest.raises(HTTPException) as exc:
+        list_documents(cursor="not-a-cursor", db=db)
+    assert exc.value.status_code == 400
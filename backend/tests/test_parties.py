@@ -0,0 +1,33 @@
+from shared.models import Document
+from shared.parties import PartyIndex, normalize_party_name
+
+
+def test_normalize_party_name():
+    assert normalize_party_name("The Acme Corp., Inc.") == "acme"
+    assert normalize_party_name("ACME Corporation") == "acme"
+    assert normalize_party_name("Smith & Sons Ltd") == "smith and sons"
+    assert normalize_party_name(None) == ""
+
+
+def _contract(db, key, party_b):
+    result = {"doc_type": "contract", "data": {"party_a": {"value": "Our Company"}, "party_b": {"value": party_b}}}
+    doc = Document(filename=f"{key}.pdf", s3_key=key, extraction_result=result)
+    db.add(doc)
+    db.flush()
+    PartyIndex.index_contract(db, doc.id, result)
+    db.flush()
+    return doc
+
+
+def test_exact_match_prefers_latest_contract(db):
+    _contract(db, "parties-old", "Globex LLC")
+    newer = _contract(db, "parties-new", "Globex Corporation")
+
+    assert PartyIndex.find_contract(db, "GLOBEX, LLC") == (newer.id, 1.0)
+
+
+def test_substring_fallback_and_miss(db):
+    doc = _contract(db, "parties-initech", "Initech Software Services")
+
+    assert PartyIndex.find_contract(db, "Initech")[0] == doc.id
+    assert PartyIndex.find_contract(db, "Umbrella") is None
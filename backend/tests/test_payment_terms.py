@@ -0,0 +1,53 @@
+import pytest
+
+from shared.payment_terms import PaymentTerms, parse_payment_terms, compare_payment_terms
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("Net 30", PaymentTerms(30)),
+    ("Payment due within thirty (30) days of invoice", PaymentTerms(30)),
+    ("2/10 Net 30", PaymentTerms(30, discount_percent=2.0, discount_days=10)),
+    ("2% 10 Net 30", PaymentTerms(30, discount_percent=2.0, discount_days=10)),
+    ("Net 45 EOM", PaymentTerms(45, end_of_month=True)),
+    ("Due upon receipt", PaymentTerms(0)),
+    ("Payment within thirty-five (35) days", PaymentTerms(35)),
+    ("one hundred twenty days", PaymentTerms(120)),
+    ("2% discount if paid within 10 days, net 30", PaymentTerms(30, discount_percent=2.0, discount_days=10)),
+    # Dates are not "2/10"-style discounts
+    ("Net 30 (invoice dated 1/15)", PaymentTerms(30)),
+])
+def test_parse(text, expected):
+    assert parse_payment_terms(text) == expected
+
+
+def test_unparseable_returns_none_for_llm_fallback():
+    assert parse_payment_terms("As agreed with procurement") is None
+    assert compare_payment_terms("As agreed with procurement", "Net 30") is None
+
+
+@pytest.mark.parametrize("text", [
+    "Due on receipt; 1.5% interest on balances unpaid after 30 days",
+    "two percent (2%) discount if paid within ten (10) days",
+    "2% 10 days net 30",
+    "1/2% per month interest on overdue amounts, net 30",
+    "Net 30, or net 45 for orders over $10,000",
+    "Payable on receipt, and in any case within 15 days",
+])
+def test_ambiguous_wording_defers_to_llm(text):
+    assert parse_payment_terms(text) is None
+    assert compare_payment_terms(text, "Net 30") is None
+
+
+def test_compare():
+    consistent, _ = compare_payment_terms("Net 30", "within 30 days")
+    assert consistent
+
+    consistent, explanation = compare_payment_terms("Immediate", "Net 60")
+    assert not consistent
+    assert "net 60" in explanation
+
+
+def test_discount_on_one_side_only_goes_to_llm():
+    assert compare_payment_terms("2/10 Net 30", "Net 30") is None
+    consistent, _ = compare_payment_terms("2/10 Net 30", "2%/10 n/30")
+    assert consistent
@@ -0,0 +1,40 @@
+from celery import Celery
+
+from shared.queues import configure_routes, document_pipeline
+
+
+def test_pipeline_stages_route_to_their_queues():
+    app = Celery("test", broker="memory://")
+    configure_routes(app)
+
+    chain = document_pipeline(app, 42)
+
+    routed = [(sig.task, app.amqp.router.route({}, sig.task, args=sig.args)["queue"].name) for sig in chain.tasks]
+    assert routed == [("ingest_document", "embed"), ("extract_document", "llm")]
+    assert all(sig.immutable and sig.args == (42,) for sig in chain.tasks)
+
+
+def test_exports_do_not_land_on_the_default_queue():
+    app = Celery("test", broker="memory://")
+    configure_routes(app)
+
+    assert app.amqp.router.route({}, "export_report", args=("job",))["queue"].name == "export"
+
+
+def test_only_the_embed_worker_warms_up_the_model(monkeypatch):
+    from shared import model_registry
+    from worker.celery_app import celery_app, warm_up_embedding_model
+
+    calls = []
+    monkeypatch.setattr(model_registry, "warm_up", lambda: calls.append(True))
+    queues = celery_app.amqp.queues
+    try:
+        queues.select(["llm"])
+        warm_up_embedding_model()
+        assert calls == []
+
+        queues.select(["embed"])
+        warm_up_embedding_model()
+        assert calls == [True]
+    finally:
+        queues._consume_from = None
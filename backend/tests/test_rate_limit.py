@@ -0,0 +1,39 @@
+import asyncio
+
+from shared.auth import create_access_token
+from shared.rate_limit import LocalRateLimiter, RateLimiter, client_identity, route_class
+
+
+def test_local_limiter_slides_over_previous_window():
+    limiter = LocalRateLimiter()
+    results = [limiter.hit("k", limit=3, window=60, now=10)[0] for _ in range(4)]
+    assert results == [True, True, True, False]
+
+    # Halfway into the next window half of the previous 3 still count
+    assert limiter.hit("k", limit=3, window=60, now=90) == (True, 2)
+    assert limiter.hit("k", limit=3, window=60, now=90) == (True, 3)
+    assert limiter.hit("k", limit=3, window=60, now=90)[0] is False
+    # Two windows later nothing carries over
+    assert limiter.hit("k", limit=3, window=60, now=200) == (True, 1)
+
+
+def test_route_class_and_identity():
+    assert route_class("GET", "/health") is None
+    assert route_class("POST", "/upload/batch") == "upload"
+    assert route_class("POST", "/documents/5/analyze") == "llm"
+    assert route_class("POST", "/token") == "auth"
+    assert route_class("GET", "/documents") == "default"
+
+    token = create_access_token({"sub": "alice", "role": "ap"})
+    assert client_identity(f"Bearer {token}", "10.0.0.1") == "user:ap:alice"
+    assert client_identity("Bearer forged", "10.0.0.1") == "ip:10.0.0.1"
+
+
+def test_falls_back_to_local_limiter_when_redis_is_down():
+    limiter = RateLimiter(redis_url="redis://127.0.0.1:1/0")
+
+    async def hits():
+        return [(await limiter.hit("ip:1", limit=2, window=60))[0] for _ in range(3)]
+
+    assert asyncio.run(hits()) == [True, True, False]
+    assert limiter.redis_down_until > 0
@@ -0,0 +1,41 @@
+from shared.comparison import get_comparison_graph
+from shared.document_fields import apply_document_fields
+from shared.models import Document
+from shared.parties import PartyIndex
+from shared.schemas import FindingType
+
+
+def _doc(db, key, doc_type, data):
+    doc = Document(filename=f"{key}.pdf", s3_key=key, extraction_result={"doc_type": doc_type, "data": data})
+    apply_document_fields(doc)
+    db.add(doc)
+    db.flush()
+    if doc_type == "contract":
+        PartyIndex.index_contract(db, doc.id, doc.extraction_result)
+        db.flush()
+    return doc
+
+
+def _invoice(db, key, vendor, terms):
+    return _doc(db, key, "invoice", {"vendor_name": {"value": vendor}, "payment_terms": {"value": terms}})
+
+
+def test_run_batch_groups_by_vendor_and_reports_each_invoice(db, monkeypatch):
+    monkeypatch.delenv("MISTRAL_API_KEY", raising=False)
+    monkeypatch.delenv("OPENAI_API_KEY", raising=False)
+    contract = _doc(db, "recon-msa", "contract", {
+        "party_a": {"value": "Our Company"}, "party_b": {"value": "Globex LLC"},
+        "payment_terms": {"value": "Net 30"},
+    })
+    ok = _invoice(db, "recon-ok", "Globex, LLC", "within thirty (30) days")
+    late = _invoice(db, "recon-late", "GLOBEX LLC", "Net 15")
+    orphan = _invoice(db, "recon-orphan", "Umbrella Corp", "Net 30")
+
+    results = get_comparison_graph().run_batch(db, [ok.id, late.id, orphan.id, contract.id, 999999])
+
+    assert [r["invoice_id"] for r in results] == [ok.id, late.id, orphan.id, contract.id, 999999]
+    by_id = {r["invoice_id"]: r for r in results}
+    assert by_id[ok.id]["contract_id"] == contract.id and by_id[ok.id]["findings"] == []
+    assert [f.finding_type for f in by_id[late.id]["findings"]] == [FindingType.TERM_MISMATCH]
+    assert by_id[orphan.id]["contract_id"] is None and len(by_id[orphan.id]["findings"]) == 1
+    assert by_id[contract.id]["status"] == by_id[999999]["status"] == "skipped"
@@ -0,0 +1,50 @@
+from shared import redis_counters
+from shared.redis_counters import RedisCounters
+
+
+class _Redis:
+    def __init__(self):
+        self.up = True
+        self.calls = 0
+        self.hashes = {}
+        self.queued = []
+
+    def pipeline(self):
+        return self
+
+    def hincrby(self, key, field, amount):
+        self.queued.append((key, field, amount))
+
+    hincrbyfloat = hincrby
+
+    def execute(self):
+        self.calls += 1
+        queued, self.queued = self.queued, []
+        if not self.up:
+            raise ConnectionError("redis down")
+        for key, field, amount in queued:
+            counts = self.hashes.setdefault(key, {})
+            counts[field] = counts.get(field, 0) + amount
+
+    def hgetall(self, key):
+        return {k.encode(): str(v).encode() for k, v in self.hashes.get(key, {}).items()}
+
+
+def test_counts_are_buffered_and_survive_an_outage(monkeypatch):
+    clock = [100.0]
+    monkeypatch.setattr(redis_counters.time, "monotonic", lambda: clock[0])
+    counters = RedisCounters()
+    redis = counters._redis = _Redis()
+
+    redis.up = False
+    counters.incr("stats", hits=1)
+    # Within the retry window nothing is sent, however many increments
+    for _ in range(50):
+        counters.incr("stats", hits=1, seconds=0.5)
+    assert redis.calls == 1
+
+    redis.up = True
+    clock[0] += redis_counters.STATS_REDIS_RETRY_SECONDS
+    counters.incr("stats", misses=2)
+    assert redis.calls == 2
+    assert counters.snapshot("stats") == {"hits": 51.0, "seconds": 25.0, "misses": 2.0}
@@ -0,0 +1,68 @@
+import gzip
+import json
+from datetime import datetime
+
+from shared.models import Document, Finding, ReviewDecision
+from shared.reports import (
+    PORTFOLIO_COLUMNS, GzipReader, audit_decisions, portfolio_rows, report_rows, to_csv, to_ndjson
+)
+
+
+def _seed(db):
+    doc = Document(filename="inv.pdf")
+    other = Document(filename="other.pdf")
+    db.add_all([doc, other])
+    db.flush()
+    reviewed = Finding(document_id=doc.id, finding_type="MISMATCH", severity="HIGH", description="Price differs")
+    open_ = Finding(document_id=doc.id, finding_type="MISSING", severity="LOW", description="No PO")
+    elsewhere = Finding(document_id=other.id, finding_type="MISMATCH", severity="LOW", description="Other doc")
+    db.add_all([reviewed, open_, elsewhere])
+    db.flush()
+    db.add_all([
+        ReviewDecision(finding_id=reviewed.id, user_id="alice", decision="REJECT", created_at=datetime(2026, 1, 1)),
+        ReviewDecision(finding_id=reviewed.id, user_id="bob", decision="APPROVE", comment="ok",
+                       created_at=datetime(2026, 1, 2)),
+        ReviewDecision(finding_id=elsewhere.id, user_id="carol", decision="APPROVE", created_at=datetime(2026, 1, 3)),
+    ])
+    db.flush()
+    return doc, reviewed, open_
+
+
+def test_report_rows_use_latest_decision(db):
+    doc, reviewed, open_ = _seed(db)
+    rows = list(report_rows(db, doc.id))
+    assert [r["finding_id"] for r in rows] == [reviewed.id, open_.id]
+    assert rows[0]["review_decision"] == "APPROVE" and rows[0]["reviewed_by"] == "bob"
+    assert rows[1]["review_decision"] is None
+
+
+def test_audit_decisions_in_order_with_findings(db):
+    doc, reviewed, _ = _seed(db)
+    decisions = audit_decisions(db, doc.id)
+    assert [d.user_id for d in decisions] == ["alice", "bob"]
+    assert all(d.finding is reviewed for d in decisions)
+
+
+def test_streamed_formats(db):
+    doc, _, _ = _seed(db)
+    lines = "".join(to_ndjson(report_rows(db, doc.id))).splitlines()
+    assert json.loads(lines[0])["reviewed_at"] == "2026-01-02T00:00:00"
+    csv_lines = "".join(to_csv(report_rows(db, doc.id))).splitlines()
+    assert csv_lines[0].startswith("finding_id,type,severity")
+    assert len(csv_lines) == 3
+
+
+def test_portfolio_rows_span_documents(db):
+    doc, reviewed, open_ = _seed(db)
+    rows = list(portfolio_rows(db))
+    assert [(r["document_id"], r["finding_id"]) for r in rows][:2] == [(doc.id, reviewed.id), (doc.id, open_.id)]
+    assert rows[0]["filename"] == "inv.pdf" and rows[0]["review_decision"] == "APPROVE"
+    assert rows[2]["filename"] == "other.pdf" and rows[2]["reviewed_by"] == "carol"
+
+
+def test_gzip_reader_streams_in_parts(db):
+    _seed(db)
+    text = "".join(to_csv(portfolio_rows(db), PORTFOLIO_COLUMNS))
+    reader = GzipReader(to_csv(portfolio_rows(db), PORTFOLIO_COLUMNS))
+    parts = iter(lambda: reader.read(16), b"")
+    assert gzip.decompress(b"".join(parts)).decode("utf-8") == text
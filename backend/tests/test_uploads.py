@@ -0,0 +1,32 @@
+import asyncio
+
+import pytest
+from fastapi import HTTPException
+
+from api import main
+from shared.models import Document, DocumentStatus
+
+
+class _BrokerDown:
+    def __init__(self, signatures):
+        list(signatures)
+
+    def apply_async(self):
+        raise ConnectionError("broker unreachable")
+
+
+def test_enqueue_failure_marks_batch_failed(db, monkeypatch):
+    removed = []
+    monkeypatch.setattr(main, "group", _BrokerDown)
+    monkeypatch.setattr(main, "remove_object", removed.append)
+    uploads = [("a.pdf", "upload-a", "sha-a"), ("a copy.pdf", "upload-a2", "sha-a"), ("b.pdf", "upload-b", "sha-b")]
+
+    with pytest.raises(HTTPException) as raised:
+        asyncio.run(main._create_documents(db, uploads))
+
+    assert raised.value.status_code == 503
+    docs = db.query(Document).filter(Document.content_sha256.in_(["sha-a", "sha-b"])).order_by(Document.id).all()
+    assert [d.status for d in docs] == [DocumentStatus.FAILED] * 3
+    # The in-batch duplicate is still linked to its original and its object removed
+    assert docs[1].duplicate_of_id == docs[0].id
+    assert removed == ["upload-a2"]
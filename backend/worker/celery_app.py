@@ -1,5 +1,10 @@
 import os
+import time
 from celery import Celery
+from celery.concurrency.prefork import TaskPool as PreforkPool
+from celery.signals import worker_process_init, worker_ready, task_prerun, task_postrun
+
+from shared.queues import QUEUE_EMBED, configure_routes, record_task
 
 REDIS_URL = os.getenv("REDIS_URL", "redis://redis:6379/0")
 
@@ -16,4 +21,60 @@ celery_app.conf.update(
     result_serializer="json",
     timezone="UTC",
     enable_utc=True,
+    # Stages are long and idempotent: take one message at a time and only ack
+    # it once done, so a killed worker's task is redelivered
+    worker_prefetch_multiplier=1,
+    task_acks_late=True,
 )
+configure_routes(celery_app)
+
+@worker_process_init.connect
+def reset_db_pool(**kwargs):
+    # Connections inherited from the parent would be shared across the forked
+    # children; drop them (without closing the parent's) and start a fresh pool
+    from shared.database import engine
+    engine.dispose(close=False)
+
+def _consumes_embed_queue() -> bool:
+    # Only the worker started with -Q ...embed... ever embeds; the others
+    # (parse/default, llm) never load the model
+    return QUEUE_EMBED in celery_app.amqp.queues.consume_from
+
+@worker_process_init.connect
+def warm_up_embedding_model(**kwargs):
+    # Runs in each prefork child after the fork, so every worker process loads
+    # the model exactly once before it accepts its first task.
+    if _consumes_embed_queue():
+        from shared.model_registry import warm_up
+        warm_up()
+
+@worker_ready.connect
+def warm_up_embedding_model_in_place(sender=None, **kwargs):
+    # Thread and solo pools run tasks in the main process, where
+    # worker_process_init never fires
+    if _consumes_embed_queue() and not isinstance(sender.controller.pool, PreforkPool):
+        from shared.model_registry import warm_up
+        warm_up()
+
+_task_started = {}
+_stats_redis = None
+
+@task_prerun.connect
+def _mark_task_start(task_id=None, **kwargs):
+    _task_started[task_id] = time.monotonic()
+
+@task_postrun.connect
+def _record_task_stats(task_id=None, task=None, state=None, **kwargs):
+    # Per-queue throughput and runtime, read by the API's /queues endpoint
+    global _stats_redis
+    started = _task_started.pop(task_id, None)
+    if started is None or state == "RETRY":
+        return
+    queue = (task.request.delivery_info or {}).get("routing_key") or "celery"
+    try:
+        if _stats_redis is None:
+            import redis
+            _stats_redis = redis.from_url(REDIS_URL)
+        record_task(_stats_redis, queue, state == "SUCCESS", time.monotonic() - started)
+    except Exception as e:
+        print(f"Failed to record task stats: {e}")
@@ -3,84 +3,350 @@ import os
 import shutil
 from worker.celery_app import celery_app
 from shared.database import SessionLocal, get_db
-from shared.models import Document, DocumentStatus
-from shared.ingestion import ParsingService, ChunkingService, VectorService
-from shared.extraction import ExtractionGraph
-from minio import Minio
-
-# MinIO Client (Should be shared potentially, but init here for worker context)
-MINIO_ENDPOINT = os.getenv("MINIO_ENDPOINT", "minio:9000")
-MINIO_ACCESS_KEY = os.getenv("MINIO_ACCESS_KEY", "minioadmin")
-MINIO_SECRET_KEY = os.getenv("MINIO_SECRET_KEY", "minioadmin")
-MINIO_BUCKET = os.getenv("MINIO_BUCKET", "documents")
-MINIO_SECURE = False
-
-minio_client = Minio(
-    MINIO_ENDPOINT.replace("http://", "").replace("https://", ""),
-    access_key=MINIO_ACCESS_KEY,
-    secret_key=MINIO_SECRET_KEY,
-    secure=MINIO_SECURE
-)
-
-# Initialize Services
-# vector_service = VectorService() # Moved inside task for fork safety
+from shared.models import Document, DocumentStatus, Job, PROCESSING_STAGES
+from shared.ingestion import ParsingService, ChunkingService, get_vector_service, EXTRACTION_CONTEXT_CHARS, PARSER_VERSION
+from shared.extraction import get_extraction_graph
+from shared.storage import minio_client, MINIO_BUCKET, upload_stream, presigned_url
+from shared.page_store import PageStore
+from shared.jobs import run_job
+from shared.parties import PartyIndex
+from shared.dedup import DocumentDedup
+from shared.document_fields import apply_document_fields
+from shared.reports import GzipReader, EXPORT_URL_EXPIRY
+from shared.queues import document_pipeline
+
+# Graphs, LLM clients and VectorServices are built once per worker process
+# (get_* accessors); the embedding model comes from shared.model_registry,
+# warmed up in worker_process_init.
+
+PROCESS_MAX_RETRIES = int(os.getenv("PROCESS_MAX_RETRIES", 3))
+PROCESS_RETRY_BACKOFF = int(os.getenv("PROCESS_RETRY_BACKOFF", 10)) # seconds, doubled per retry
+EXPORT_PROGRESS_ROWS = int(os.getenv("EXPORT_PROGRESS_ROWS", 10000))
+
+def _stage_done(doc, stage):
+    return doc.processing_stage is not None and \
+        PROCESSING_STAGES.index(doc.processing_stage) >= PROCESSING_STAGES.index(stage)
+
+def _checkpoint(db, doc, stage):
+    doc.processing_stage = stage
+    db.commit()
+    print(f"Document {doc.id}: {stage}")
+
+def _local_path(doc):
+    return f"/tmp/{doc.id}_{doc.s3_key}"
+
+def _ingest(db, doc):
+    if _stage_done(doc, "parsed") and not PageStore.is_current(db, doc.id):
+        print(f"Stored pages for document {doc.id} predate parser {PARSER_VERSION}; starting over")
+        doc.processing_stage = None
+    if _stage_done(doc, "embedded"):
+        return
+
+    local_path = _local_path(doc)
+    if _stage_done(doc, "parsed"):
+        # Pages are stored but embedding did not finish: embed from them
+        pages = PageStore.iter_pages(db, doc.id)
+    else:
+        if doc.processing_stage is None:
+            # Starting over: drop whatever chunks the document had (e.g. random-id
+            # chunks from before chunk ids were deterministic)
+            get_vector_service().delete_document(doc.id)
 
-@celery_app.task(name="process_document")
-def process_document(document_id: int):
-    print(f"Starting processing for document {document_id}")
-    db = SessionLocal()
-    local_path = None
-    try:
-        # Lazy init service
-        vector_service = VectorService()
-        doc = db.query(Document).filter(Document.id == document_id).first()
-        if not doc:
-            print(f"Document {document_id} not found")
-            return
-        
         doc.status = DocumentStatus.PROCESSING
         db.commit()
 
-        # 1. Download file
-        local_path = f"/tmp/{doc.s3_key}"
-        minio_client.fget_object(MINIO_BUCKET, doc.s3_key, local_path)
-        print(f"Downloaded {doc.s3_key} to {local_path}")
-
-        # 2. Parse
-        pages = ParsingService.parse_pdf(local_path)
-        print(f"Parsed {len(pages)} pages")
-
-        # 3. Chunk
-        chunks = ChunkingService.chunk_document(doc.id, pages)
-        print(f"Generated {len(chunks)} chunks")
-
-        # 4. Embed and Upsert
-        # Add metadata
-        for chunk in chunks:
-            chunk.metadata["filename"] = doc.filename
-            chunk.metadata["type"] = "text"
-        
-        vector_service.upsert_chunks(chunks)
-        print(f"Upserted chunks to Qdrant")
-
-        # 5. Extraction
-        print(f"Running extraction graph for document {document_id}")
-        full_text = "\n".join([p.text for p in pages])
-        extractor = ExtractionGraph()
-        extraction_result = extractor.run(doc.id, full_text)
-        
+        if not (_stage_done(doc, "downloaded") and os.path.exists(local_path)):
+            minio_client.fget_object(MINIO_BUCKET, doc.s3_key, local_path)
+            print(f"Downloaded {doc.s3_key} to {local_path}")
+            _checkpoint(db, doc, "downloaded")
+
+        # Parsed pages are persisted (compressed) and committed in batches as
+        # they stream out of the parser; "parsed" is written as soon as the
+        # parser finishes, so later stages and retries never need the PDF again
+        pages = PageStore.save_pages(
+            db, doc.id, ParsingService.iter_pages(local_path), on_parsed=lambda: _checkpoint(db, doc, "parsed")
+        )
+
+    # Each page is chunked and embedded as soon as it is parsed, so embedding
+    # overlaps parsing. A failure while embedding after "parsed" resumes from
+    # the stored pages; one during parsing re-parses. Either way the retry
+    # overwrites the same point ids (chunk_point_id).
+    chunks = ChunkingService.iter_chunks(doc.id, pages, metadata={"filename": doc.filename, "type": "text"})
+    chunk_count = get_vector_service().upsert_chunks(chunks)
+    print(f"Upserted {chunk_count} chunks to Qdrant")
+    _checkpoint(db, doc, "embedded")
+    if os.path.exists(local_path):
+        os.remove(local_path)
+
+def _extract(db, doc):
+    if not _stage_done(doc, "extracted"):
+        # Extraction only reads the start of the document
+        print(f"Running extraction graph for document {doc.id}")
+        full_text = PageStore.load_text(db, doc.id, max_chars=EXTRACTION_CONTEXT_CHARS)
+        extraction_result = get_extraction_graph().run(doc.id, full_text)
         print(f"Extraction complete: {extraction_result['doc_type']}")
-        
+
         doc.extraction_result = extraction_result
-        doc.status = DocumentStatus.COMPLETED
-        db.commit()
-        print(f"Finished processing document {document_id}")
+        apply_document_fields(doc)
+        PartyIndex.index_contract(db, doc.id, extraction_result)
+        _checkpoint(db, doc, "extracted")
 
+    doc.status = DocumentStatus.COMPLETED
+    # Duplicates uploaded while this document was processing
+    DocumentDedup.propagate(db, doc)
+    db.commit()
+    print(f"Finished processing document {doc.id}")
+
+# Each stage commits its output together with doc.processing_stage, and every
+# stage is safe to repeat (pages are replaced, chunk ids are deterministic, the
+# party index is rewritten), so a retry or a redelivery after the worker died
+# (acks_late) resumes after the last checkpoint instead of starting over.
+def _run_stage(task, document_id: int, stage_fn):
+    print(f"{task.name} for document {document_id} (attempt {task.request.retries + 1})")
+    db = SessionLocal()
+    doc = None
+    try:
+        doc = db.query(Document).filter(Document.id == document_id).first()
+        if not doc:
+            print(f"Document {document_id} not found")
+            return document_id
+        stage_fn(db, doc)
+        return document_id
     except Exception as e:
-        print(f"Error processing document {document_id}: {e}")
+        print(f"Error in {task.name} for document {document_id} after stage {doc.processing_stage if doc else None}: {e}")
+        db.rollback()
+        if doc is None:
+            raise
+        if task.request.retries < task.max_retries:
+            raise task.retry(exc=e, countdown=PROCESS_RETRY_BACKOFF * 2 ** task.request.retries)
         doc.status = DocumentStatus.FAILED
+        DocumentDedup.propagate(db, doc)
         db.commit()
+        if os.path.exists(_local_path(doc)):
+            os.remove(_local_path(doc))
+        # Re-raise so the rest of the chain does not run
+        raise
+    finally:
+        db.close()
+
+_stage_options = dict(bind=True, acks_late=True, reject_on_worker_lost=True, max_retries=PROCESS_MAX_RETRIES)
+
+@celery_app.task(name="ingest_document", **_stage_options)
+def ingest_document(self, document_id: int):
+    return _run_stage(self, document_id, _ingest)
+
+# parse_document -> embed_document chains queued before ingest_document existed:
+# the parse step passes through and embed_document runs the whole pass
+
+@celery_app.task(name="parse_document")
+def parse_document(document_id: int):
+    return document_id
+
+@celery_app.task(name="embed_document", **_stage_options)
+def embed_document(self, document_id: int):
+    return _run_stage(self, document_id, _ingest)
+
+@celery_app.task(name="extract_document", **_stage_options)
+def extract_document(self, document_id: int):
+    return _run_stage(self, document_id, _extract)
+
+@celery_app.task(name="process_document")
+def process_document(document_id: int):
+    # Kept for callers (and queued messages) that enqueue by name; the work
+    # itself runs as ingest -> extract on their own queues
+    document_pipeline(celery_app, document_id).apply_async()
+
+@celery_app.task(name="backfill_document_fields")
+def backfill_document_fields(batch_size: int = 500):
+    # One-off: fill the typed extraction columns for documents extracted
+    # before they existed
+    db = SessionLocal()
+    last_id, updated = 0, 0
+    try:
+        while True:
+            docs = db.query(Document).filter(
+                Document.id > last_id,
+                Document.extraction_result.isnot(None)
+            ).order_by(Document.id).limit(batch_size).all()
+            if not docs:
+                break
+            for doc in docs:
+                apply_document_fields(doc)
+                updated += 1
+            last_id = docs[-1].id
+            db.commit()
+            db.expunge_all()
+        print(f"Filled extraction fields for {updated} documents")
+        return updated
+    finally:
+        db.close()
+
+@celery_app.task(name="backfill_contract_parties")
+def backfill_contract_parties(batch_size: int = 500):
+    # One-off: index documents extracted before the party index existed
+    db = SessionLocal()
+    last_id, indexed = 0, 0
+    try:
+        while True:
+            docs = db.query(Document).filter(
+                Document.id > last_id,
+                Document.extraction_result.isnot(None)
+            ).order_by(Document.id).limit(batch_size).all()
+            if not docs:
+                break
+            for doc in docs:
+                PartyIndex.index_contract(db, doc.id, doc.extraction_result)
+                indexed += 1
+            last_id = docs[-1].id
+            db.commit()
+            db.expunge_all()
+        print(f"Indexed parties for {indexed} documents")
+        return indexed
+    finally:
+        db.close()
+
+def _run_analysis(db, job):
+    from shared.comparison import get_comparison_graph
+    from shared.models import Finding as DBFinding
+
+    findings = get_comparison_graph().run(db, job.document_id)
+
+    for f in findings:
+        db.add(DBFinding(
+            document_id=job.document_id,
+            finding_type=f.finding_type,
+            severity=f.severity,
+            description=f.description,
+            evidence=f.evidence or {},
+            status="open"
+        ))
+    db.flush()
+    return {"findings_count": len(findings)}
+
+def _run_risk_assessment(db, job):
+    from shared.risk import get_risk_graph
+    from shared.models import Finding as DBFinding
+    from shared.page_store import get_document_text
+
+    doc = db.query(Document).filter(Document.id == job.document_id).first()
+    full_text = get_document_text(db, doc, max_chars=EXTRACTION_CONTEXT_CHARS)
+
+    findings = get_risk_graph().run(doc.id, full_text)
+
+    for f in findings:
+        db.add(DBFinding(
+            document_id=doc.id,
+            finding_type=f.clause_type, # e.g. "Liability Cap"
+            severity=f.risk_level, # "high"
+            description=f"{f.explanation}\nOriginal: {f.original_text}\nRedline: {f.redline_text}",
+            evidence={"original": f.original_text, "standard": f.standard_clause, "risk_score": f.risk_score},
+            status="open"
+        ))
+    db.flush()
+    return {"findings_count": len(findings), "risks": [f.dict() for f in findings]}
+
+def _run_reconciliation(db, job):
+    from shared.comparison import get_comparison_graph
+    from shared.models import Finding as DBFinding
+
+    results = get_comparison_graph().run_batch(db, job.params["document_ids"])
+
+    rows = []
+    invoices = []
+    for r in results:
+        findings = r.pop("findings", [])
+        rows.extend({
+            "document_id": r["invoice_id"],
+            "related_document_id": r.get("contract_id"),
+            "finding_type": f.finding_type,
+            "severity": f.severity,
+            "description": f.description,
+            "evidence": f.evidence or {},
+            "status": "open"
+        } for f in findings)
+        invoices.append({**r, "findings_count": len(findings)})
+    # One multi-row insert for the whole batch
+    if rows:
+        db.bulk_insert_mappings(DBFinding, rows)
+    db.flush()
+
+    summary = {"total": len(invoices), "findings_count": len(rows)}
+    for status in ("compared", "failed", "skipped"):
+        summary[status] = sum(1 for i in invoices if i["status"] == status)
+    return {**summary, "invoices": invoices}
+
+@celery_app.task(name="analyze_document")
+def analyze_document(job_id: str):
+    db = SessionLocal()
+    try:
+        return run_job(db, job_id, lambda job: _run_analysis(db, job))
+    finally:
+        db.close()
+
+@celery_app.task(name="assess_risk")
+def assess_risk(job_id: str):
+    db = SessionLocal()
+    try:
+        return run_job(db, job_id, lambda job: _run_risk_assessment(db, job))
+    finally:
+        db.close()
+
+@celery_app.task(name="reconcile_invoices")
+def reconcile_invoices(job_id: str):
+    db = SessionLocal()
+    try:
+        return run_job(db, job_id, lambda job: _run_reconciliation(db, job))
+    finally:
+        db.close()
+
+def _with_progress(rows, job_id, progress):
+    # The export's own session is inside the server-side cursor's transaction,
+    # so progress is committed through a second one
+    progress_db = SessionLocal()
+    try:
+        for row in rows:
+            progress["rows_written"] += 1
+            if progress["rows_written"] % EXPORT_PROGRESS_ROWS == 0:
+                progress_db.query(Job).filter(Job.id == job_id).update({"result": dict(progress)})
+                progress_db.commit()
+            yield row
+    finally:
+        progress_db.close()
+
+def _run_report_export(db, job):
+    from datetime import datetime
+    from shared.reports import portfolio_rows, to_csv, to_ndjson, PORTFOLIO_COLUMNS
+
+    params = job.params
+    rows = portfolio_rows(
+        db,
+        created_from=datetime.fromisoformat(params["created_from"]) if params.get("created_from") else None,
+        created_to=datetime.fromisoformat(params["created_to"]) if params.get("created_to") else None,
+        doc_type=params.get("doc_type")
+    )
+    progress = {"rows_written": 0}
+    rows = _with_progress(rows, job.id, progress)
+    chunks = to_csv(rows, PORTFOLIO_COLUMNS) if params["format"] == "csv" else to_ndjson(rows)
+
+    # Rows -> text -> gzip -> multipart upload, one bounded chunk at a time
+    s3_key = f"exports/{job.id}.{params['format']}.gz"
+    sha256, size = upload_stream(s3_key, GzipReader(chunks), content_type="application/gzip")
+    print(f"Export {job.id}: {progress['rows_written']} rows, {size} bytes gzipped")
+
+    return {
+        **progress,
+        "format": params["format"],
+        "s3_key": s3_key,
+        "size_bytes": size,
+        "sha256": sha256,
+        "download_url": presigned_url(s3_key, EXPORT_URL_EXPIRY),
+        "download_url_expires_at": (datetime.utcnow() + EXPORT_URL_EXPIRY).isoformat(),
+    }
+
+@celery_app.task(name="export_report")
+def export_report(job_id: str):
+    db = SessionLocal()
+    try:
+        return run_job(db, job_id, lambda job: _run_report_export(db, job))
     finally:
         db.close()
-        if local_path and os.path.exists(local_path):
-            os.remove(local_path)
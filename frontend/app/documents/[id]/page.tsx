@@ -2,9 +2,8 @@
 
 import { useEffect, useState } from 'react';
 import { useParams } from 'next/navigation';
-import { getDocument, getFindings, reviewFinding, Document, Finding } from '@/lib/api';
+import { getDocument, getFindings, reviewFinding, runRiskAssessment, Document, Finding } from '@/lib/api';
 import { AlertCircle, Check, X, ShieldAlert, FileText, ChevronRight } from 'lucide-react';
-import axios from 'axios';
 
 export default function DocumentDetails() {
     const { id } = useParams();
@@ -46,9 +45,9 @@ export default function DocumentDetails() {
 
     const runRiskAnalysis = async () => {
         try {
-            const res = await axios.post(`${process.env.NEXT_PUBLIC_API_URL}/contracts/${docId}/risk_assessment`);
-            if (res.data.status === 'success') {
-                setRisks(res.data.risks);
+            const job = await runRiskAssessment(docId);
+            if (job.status === 'COMPLETED') {
+                setRisks(job.result.risks);
                 setActiveTab('risk');
                 // Ideally we reload findings if risks are stored as findings (Wait, are they?)
                 // The current implementation returns risks in the response but doesn't strictly adhere to storing them 
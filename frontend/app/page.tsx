@@ -1,12 +1,14 @@
 "use client";
 
 import { useEffect, useState } from 'react';
-import { getDocuments, uploadDocument, Document } from '../lib/api';
+import { getDocuments, uploadDocuments, Document } from '../lib/api';
 import Link from 'next/link';
 import { Upload, FileText, AlertTriangle, CheckCircle, Loader2 } from 'lucide-react';
 
 export default function Dashboard() {
     const [docs, setDocs] = useState<Document[]>([]);
+    const [nextCursor, setNextCursor] = useState<string | null>(null);
+    const [loadingMore, setLoadingMore] = useState(false);
     const [uploading, setUploading] = useState(false);
 
     useEffect(() => {
@@ -17,16 +19,32 @@ export default function Dashboard() {
         try {
             const data = await getDocuments();
             setDocs(data.documents);
+            setNextCursor(data.next_cursor);
         } catch (e) {
             console.error(e);
         }
     };
 
+    // Older documents, one page at a time after the first
+    const loadMore = async () => {
+        if (!nextCursor) return;
+        setLoadingMore(true);
+        try {
+            const data = await getDocuments(nextCursor);
+            setDocs(prev => [...prev, ...data.documents]);
+            setNextCursor(data.next_cursor);
+        } catch (e) {
+            console.error(e);
+        } finally {
+            setLoadingMore(false);
+        }
+    };
+
     const handleUpload = async (e: React.ChangeEvent<HTMLInputElement>) => {
-        if (!e.target.files?.[0]) return;
+        if (!e.target.files?.length) return;
         setUploading(true);
         try {
-            await uploadDocument(e.target.files[0]);
+            await uploadDocuments(Array.from(e.target.files));
             await fetchDocs(); // Refresh
             // Simulating polling for updates would be better
         } catch (err) {
@@ -46,6 +64,7 @@ export default function Dashboard() {
                 <div className="relative">
                     <input
                         type="file"
+                        multiple
                         onChange={handleUpload}
                         className="absolute inset-0 opacity-0 cursor-pointer"
                         accept=".pdf"
@@ -92,6 +111,17 @@ export default function Dashboard() {
                     </div>
                 ))}
 
+                {nextCursor && (
+                    <button
+                        onClick={loadMore}
+                        disabled={loadingMore}
+                        className="mx-auto flex items-center gap-2 text-sm font-medium text-slate-600 hover:text-slate-900 disabled:opacity-50"
+                    >
+                        {loadingMore && <Loader2 className="animate-spin h-4 w-4" />}
+                        Load more
+                    </button>
+                )}
+
                 {docs.length === 0 && (
                     <div className="text-center py-20 text-slate-400">
                         <p>No documents found. Upload a contract or invoice to get started.</p>
@@ -11,6 +11,7 @@ export interface Document {
     filename: string;
     status: string;
     created_at: string;
+    doc_type?: string | null;
     extraction_result?: any;
 }
 
@@ -24,11 +25,15 @@ export interface Finding {
     status: string;
 }
 
-export const getDocuments = async () => {
-    const res = await api.get('/search?q=&limit=100'); // Hacky: search all? Or specific endpoint?
-    // Actually we don't have a "list all" endpoint. Let's add one or use search.
-    // Search returns chunks. We need list of docs.
-    // Let's implement /documents endpoint.
+export interface DocumentPage {
+    documents: Document[];
+    next_cursor: string | null;
+}
+
+// Newest first, one page at a time: pass the returned next_cursor to get the
+// following page (null on the last one).
+export const getDocuments = async (cursor?: string | null, limit: number = 100): Promise<DocumentPage> => {
+    const res = await api.get('/documents', { params: { limit, cursor: cursor ?? undefined } });
     return res.data;
 };
 
@@ -47,8 +52,41 @@ export const reviewFinding = async (id: number, decision: 'APPROVE' | 'OVERRIDE'
     await api.post(`/findings/${id}/review`, { decision, comment });
 };
 
+export interface Job {
+    job_id: string;
+    kind: string;
+    document_id: number;
+    status: 'PENDING' | 'RUNNING' | 'COMPLETED' | 'FAILED';
+    result: any;
+    error?: string;
+    status_url: string;
+}
+
+// Analysis and risk assessment run on the worker: the POST returns 202 with a job to poll
+export const waitForJob = async (job: Job, intervalMs = 1000): Promise<Job> => {
+    while (job.status === 'PENDING' || job.status === 'RUNNING') {
+        await new Promise(resolve => setTimeout(resolve, intervalMs));
+        const res = await api.get(job.status_url);
+        job = res.data;
+    }
+    return job;
+};
+
+export const runRiskAssessment = async (id: number): Promise<Job> => {
+    const res = await api.post(`/contracts/${id}/risk_assessment`);
+    return waitForJob(res.data);
+};
+
 export const uploadDocument = async (file: File) => {
     const formData = new FormData();
     formData.append('file', file);
     await api.post('/upload', formData);
 };
+
+// Several files in one request: streamed to storage and queued together
+export const uploadDocuments = async (files: File[]) => {
+    const formData = new FormData();
+    files.forEach(file => formData.append('files', file));
+    const res = await api.post('/upload/batch', formData);
+    return res.data;
+};